@@ -0,0 +1,98 @@
+# audio/fingerprint.py
+# ✅ 업로드 음성 지문: 디코딩된 PCM 해시 + 가벼운 음향 임베딩(로그 대역 에너지 통계)
+# - 같은 녹음이면 pcm_hash 가 같고, 재인코딩된 같은 녹음이면 임베딩 코사인 유사도가 매우 높다
+# - content_hash 는 업로드 파일 바이트 그대로의 sha256 (audio/ingest.py 가 수신하면서 계산, 디코딩 전에 비교 가능)
+import hashlib
+import os
+from dataclasses import dataclass, field
+from typing import List
+
+import numpy as np
+
+from audio.preprocess import decode_audio, FFMPEG_PATH
+
+FINGERPRINT_SAMPLE_RATE = 16000
+FRAME_SIZE = 1024
+HOP_SIZE = 512
+N_BANDS = 32
+VOICE_MATCH_THRESHOLD = float(os.getenv("VOICE_MATCH_THRESHOLD", "0.99"))
+
+
+@dataclass
+class VoiceFingerprint:
+    pcm_hash: str
+    embedding: List[float] = field(default_factory=list)
+    duration: float = 0.0
+    content_hash: str = ""
+
+    def similarity(self, other: "VoiceFingerprint") -> float:
+        if not self.embedding or not other.embedding or len(self.embedding) != len(other.embedding):
+            return 0.0
+        a = np.asarray(self.embedding, dtype=np.float32)
+        b = np.asarray(other.embedding, dtype=np.float32)
+        denom = float(np.linalg.norm(a) * np.linalg.norm(b))
+        return float(a @ b) / denom if denom else 0.0
+
+    def matches(self, other: "VoiceFingerprint", threshold: float = VOICE_MATCH_THRESHOLD) -> bool:
+        if self.content_hash and self.content_hash == other.content_hash:
+            return True
+        if self.pcm_hash and self.pcm_hash == other.pcm_hash:
+            return True
+        return self.similarity(other) >= threshold
+
+    def to_dict(self) -> dict:
+        return {"pcmHash": self.pcm_hash, "embedding": self.embedding, "duration": self.duration,
+                "contentHash": self.content_hash}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "VoiceFingerprint":
+        return cls(
+            pcm_hash=data.get("pcmHash", ""),
+            embedding=list(data.get("embedding", [])),
+            duration=float(data.get("duration", 0.0)),
+            content_hash=data.get("contentHash", ""),
+        )
+
+
+def _band_edges(n_bins: int) -> np.ndarray:
+    # 80Hz ~ 8kHz 로그 간격 대역
+    freqs = np.geomspace(80, FINGERPRINT_SAMPLE_RATE / 2, N_BANDS + 1)
+    return np.clip((freqs / (FINGERPRINT_SAMPLE_RATE / 2) * (n_bins - 1)).astype(int), 0, n_bins - 1)
+
+
+def acoustic_embedding(wav: np.ndarray) -> np.ndarray:
+    """ 프레임별 로그 대역 에너지의 평균/표준편차 (음성 구간만) → 2*N_BANDS 차원 """
+    if wav.size < FRAME_SIZE:
+        wav = np.pad(wav, (0, FRAME_SIZE - wav.size))
+    n_frames = 1 + (wav.size - FRAME_SIZE) // HOP_SIZE
+    idx = np.arange(FRAME_SIZE)[None, :] + HOP_SIZE * np.arange(n_frames)[:, None]
+    frames = wav[idx] * np.hanning(FRAME_SIZE)[None, :]
+    power = np.abs(np.fft.rfft(frames, axis=1)) ** 2
+
+    edges = _band_edges(power.shape[1])
+    bands = np.stack([power[:, lo:max(hi, lo + 1)].sum(axis=1) for lo, hi in zip(edges[:-1], edges[1:])], axis=1)
+    log_bands = np.log10(bands + 1e-10)
+
+    # 무음 프레임 제외 (프레임 에너지 상위 70%)
+    energy = log_bands.sum(axis=1)
+    voiced = log_bands[energy >= np.percentile(energy, 30)]
+    if voiced.shape[0] == 0:
+        voiced = log_bands
+    emb = np.concatenate([voiced.mean(axis=0), voiced.std(axis=0)])
+    emb = emb - emb.mean()
+    norm = np.linalg.norm(emb)
+    return emb / norm if norm else emb
+
+
+def compute_fingerprint(data: bytes, ffmpeg_path: str = FFMPEG_PATH, content_hash: str = "") -> VoiceFingerprint:
+    """ 업로드 바이트 → VoiceFingerprint (디코딩 1회) """
+    wav = decode_audio(data, FINGERPRINT_SAMPLE_RATE, ffmpeg_path=ffmpeg_path)
+    pcm16 = np.clip(wav * 32767.0, -32768, 32767).astype(np.int16)
+    pcm_hash = hashlib.sha256(pcm16.tobytes()).hexdigest()
+    embedding = acoustic_embedding(wav)
+    return VoiceFingerprint(
+        pcm_hash=pcm_hash,
+        embedding=[round(float(x), 6) for x in embedding],
+        duration=round(wav.size / FINGERPRINT_SAMPLE_RATE, 3),
+        content_hash=content_hash,
+    )
@@ -0,0 +1,220 @@
+# audio/ingest.py
+# ✅ 업로드 음성 수신: 고정 크기 청크로 읽으면서 크기 제한 / 포맷 확인 / 해시 계산을 한 번에
+# - 첫 청크의 헤더 바이트로 컨테이너를 판별해서, 지원하지 않는 파일은 나머지를 읽기 전에 415
+# - UPLOAD_MAX_BYTES 를 넘는 순간 413 (전체를 메모리에 올린 뒤가 아니라 읽는 도중에)
+# - 헤더로 길이를 알 수 있는 포맷(WAV / FLAC / MP3 / MP4 / OGG)은 UPLOAD_MAX_SECONDS 초과 시 413
+# - sha256 은 읽으면서 계산 → 같은 파일 재업로드면 디코딩 없이 기존 voice 재사용 (scripts/register_voice.py)
+# 전처리 / 지문 계산 / Storage 업로드는 모두 이 검사를 통과한 뒤에 시작한다.
+import hashlib
+import os
+import struct
+from dataclasses import dataclass
+from typing import Optional
+
+from fastapi import HTTPException, UploadFile
+
+from core import metrics
+
+UPLOAD_MAX_BYTES = int(os.getenv("UPLOAD_MAX_BYTES", str(25 * 1024 * 1024)))
+UPLOAD_MAX_SECONDS = float(os.getenv("UPLOAD_MAX_SECONDS", "300"))
+UPLOAD_CHUNK_SIZE = int(os.getenv("UPLOAD_CHUNK_SIZE", str(256 * 1024)))
+SNIFF_BYTES = 64
+
+_rejected = metrics.registry.counter("upload_rejected_total", "업로드 단계에서 거절된 음성 파일 수")
+_upload_bytes = metrics.registry.counter("upload_bytes_total", "받은 업로드 바이트 수")
+
+# MPEG Layer III 비트레이트(kbps) — [MPEG1, MPEG2/2.5]
+MP3_BITRATES = (
+    (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+)
+
+
+class UploadRejected(HTTPException):
+    """ 크기 초과(413) / 지원하지 않는 포맷(415) / 빈 파일(400) """
+
+    def __init__(self, status_code: int, reason: str, detail: str):
+        _rejected.inc(reason=reason)
+        super().__init__(status_code=status_code, detail=detail)
+
+
+@dataclass
+class AudioUpload:
+    data: bytes
+    sha256: str
+    size: int
+    format: str
+    duration: Optional[float] = None   # 헤더로 알 수 없으면 None
+
+    def to_dict(self) -> dict:
+        return {"sha256": self.sha256, "size": self.size, "format": self.format, "duration": self.duration}
+
+
+# ---------- 포맷 판별 ----------
+
+def _mp3_frame(header: bytes, offset: int = 0):
+    """ offset 위치가 MPEG 오디오 프레임 헤더면 (layer, version_index, bitrate_index), 아니면 None """
+    if len(header) < offset + 3 or header[offset] != 0xFF or header[offset + 1] & 0xE0 != 0xE0:
+        return None
+    version = (header[offset + 1] >> 3) & 0x03
+    layer = (header[offset + 1] >> 1) & 0x03
+    return layer, version, header[offset + 2] >> 4
+
+
+def sniff_format(header: bytes) -> Optional[str]:
+    """ 앞부분 바이트로 컨테이너 판별 (모르는 포맷이면 None) """
+    if header[:4] == b"RIFF" and header[8:12] == b"WAVE":
+        return "wav"
+    if header[4:8] == b"ftyp":
+        return "mp4"      # m4a / mp4 / 3gp (iOS, 안드로이드 녹음 앱)
+    if header[:4] == b"OggS":
+        return "ogg"
+    if header[:4] == b"fLaC":
+        return "flac"
+    if header[:4] == b"\x1a\x45\xdf\xa3":
+        return "webm"     # webm / mkv (브라우저 MediaRecorder)
+    if header[:5] == b"#!AMR":
+        return "amr"
+    if header[:3] == b"ID3":
+        return "mp3"
+    frame = _mp3_frame(header)
+    if frame is not None:
+        layer, version, _ = frame
+        if layer == 0:
+            return "aac"  # ADTS (layer 비트가 00)
+        if version != 1:
+            return "mp3"
+    return None
+
+
+# ---------- 길이 추정 ----------
+
+def _wav_duration(data: bytes, total_size: Optional[int]) -> Optional[float]:
+    offset, byte_rate = 12, None
+    while offset + 8 <= len(data):
+        chunk_id, chunk_size = data[offset:offset + 4], struct.unpack_from("<I", data, offset + 4)[0]
+        if chunk_id == b"fmt " and offset + 20 <= len(data):
+            byte_rate = struct.unpack_from("<I", data, offset + 16)[0]
+        elif chunk_id == b"data":
+            if not byte_rate:
+                return None
+            if chunk_size in (0, 0xFFFFFFFF) and total_size:
+                chunk_size = total_size - offset - 8   # 스트리밍 녹음은 data 크기가 비어 있음
+            return chunk_size / byte_rate
+        offset += 8 + chunk_size + (chunk_size & 1)
+    return None
+
+
+def _flac_duration(data: bytes) -> Optional[float]:
+    if len(data) < 8 + 18:
+        return None
+    info = data[8:8 + 18]    # STREAMINFO 본문
+    sample_rate = (info[10] << 12) | (info[11] << 4) | (info[12] >> 4)
+    total = ((info[13] & 0x0F) << 32) | int.from_bytes(info[14:18], "big")
+    return total / sample_rate if sample_rate and total else None
+
+
+def _mp3_duration(data: bytes, total_size: Optional[int]) -> Optional[float]:
+    """ 첫 프레임 비트레이트로 추정 (CBR 기준, VBR 은 근사치) """
+    if not total_size:
+        return None
+    offset = 0
+    if data[:3] == b"ID3" and len(data) >= 10:
+        offset = 10 + ((data[6] & 0x7F) << 21 | (data[7] & 0x7F) << 14 | (data[8] & 0x7F) << 7 | (data[9] & 0x7F))
+    frame = _mp3_frame(data, offset)
+    if frame is None:
+        return None
+    _, version, bitrate_index = frame
+    kbps = MP3_BITRATES[0 if version == 3 else 1][bitrate_index] if bitrate_index < 15 else 0
+    return (total_size - offset) * 8 / (kbps * 1000) if kbps else None
+
+
+def _mp4_duration(data: bytes) -> Optional[float]:
+    index = data.find(b"mvhd")
+    if index < 0 or len(data) < index + 32:
+        return None
+    if data[index + 4] == 1:
+        timescale, duration = struct.unpack_from(">IQ", data, index + 4 + 4 + 16)
+    else:
+        timescale, duration = struct.unpack_from(">II", data, index + 4 + 4 + 8)
+    return duration / timescale if timescale else None
+
+
+def _ogg_duration(data: bytes) -> Optional[float]:
+    if b"OpusHead" in data[:SNIFF_BYTES * 2]:
+        sample_rate = 48000
+    else:
+        index = data.find(b"\x01vorbis")
+        if index < 0 or len(data) < index + 16:
+            return None
+        sample_rate = struct.unpack_from("<I", data, index + 12)[0]
+    last = data.rfind(b"OggS")
+    if last < 0 or len(data) < last + 14 or not sample_rate:
+        return None
+    granule = struct.unpack_from("<q", data, last + 6)[0]
+    return granule / sample_rate if granule > 0 else None
+
+
+def estimate_duration(fmt: str, data: bytes, total_size: Optional[int] = None) -> Optional[float]:
+    """ 헤더(또는 전체 바이트)로 재생 길이(초) 추정. 알 수 없으면 None """
+    try:
+        if fmt == "wav":
+            return _wav_duration(data, total_size)
+        if fmt == "flac":
+            return _flac_duration(data)
+        if fmt == "mp3":
+            return _mp3_duration(data, total_size)
+        if fmt == "mp4":
+            return _mp4_duration(data)
+        if fmt == "ogg":
+            return _ogg_duration(data)
+    except (struct.error, IndexError):
+        return None
+    return None
+
+
+def _too_large(max_bytes: int):
+    return UploadRejected(413, "size", f"음성 파일이 너무 큽니다. (최대 {max_bytes / (1024 * 1024):g}MB)")
+
+
+def _check_duration(duration: Optional[float], max_seconds: float):
+    if duration is not None and duration > max_seconds:
+        raise UploadRejected(413, "duration", f"음성 파일이 너무 깁니다. ({duration:.0f}초, 최대 {max_seconds:.0f}초)")
+
+
+# ---------- 수신 ----------
+
+async def read_upload(file: UploadFile, max_bytes: int = UPLOAD_MAX_BYTES, max_seconds: float = UPLOAD_MAX_SECONDS,
+                      chunk_size: int = UPLOAD_CHUNK_SIZE) -> AudioUpload:
+    """ UploadFile → 검증된 AudioUpload. 잘못된 파일은 가능한 한 일찍 UploadRejected """
+    declared = getattr(file, "size", None)
+    if declared is not None and declared > max_bytes:
+        raise _too_large(max_bytes)
+
+    with metrics.span("upload.read"):
+        first = await file.read(chunk_size)
+        if not first:
+            raise UploadRejected(400, "empty", "음성 파일이 비어 있습니다.")
+        fmt = sniff_format(first[:SNIFF_BYTES])
+        if fmt is None:
+            raise UploadRejected(415, "format", "지원하지 않는 음성 파일 형식입니다. (wav, mp3, m4a, ogg, flac, webm, amr)")
+        _check_duration(estimate_duration(fmt, first, declared), max_seconds)
+
+        digest = hashlib.sha256(first)
+        buffer = bytearray(first)
+        while True:
+            chunk = await file.read(chunk_size)
+            if not chunk:
+                break
+            if len(buffer) + len(chunk) > max_bytes:
+                raise _too_large(max_bytes)
+            digest.update(chunk)
+            buffer.extend(chunk)
+
+    data = bytes(buffer)
+    # moov / 마지막 Ogg 페이지처럼 뒤쪽에 있는 길이 정보는 다 읽은 뒤에 확인
+    duration = estimate_duration(fmt, data, len(data))
+    _check_duration(duration, max_seconds)
+    _upload_bytes.inc(len(data), format=fmt)
+    return AudioUpload(data=data, sha256=digest.hexdigest(), size=len(data), format=fmt,
+                       duration=round(duration, 3) if duration is not None else None)
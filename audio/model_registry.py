@@ -0,0 +1,62 @@
+# audio/model_registry.py
+# ✅ 프로세스 단위 모델 레지스트리: VoiceFixer 를 한 번만 로드해서 재사용
+# (VAD 는 audio/vad.py 의 NumPy 검출기라 로드할 모델이 없음)
+import threading
+
+_load_lock = threading.Lock()
+_restore_lock = threading.Lock()
+_ready = threading.Event()
+
+_voicefixer = None
+_warmup_error = None
+
+
+def get_voicefixer():
+    """ VoiceFixer 모델을 프로세스당 한 번만 로드해서 반환 """
+    global _voicefixer
+    if _voicefixer is None:
+        with _load_lock:
+            if _voicefixer is None:
+                from voicefixer import VoiceFixer
+                _voicefixer = VoiceFixer()
+                print("✅ VoiceFixer 모델 로드 완료")
+    return _voicefixer
+
+
+def voicefixer_restore_inmem(wav, mode: int = 1):
+    """ 공유 VoiceFixer 인스턴스로 44.1kHz mono 버퍼 복원 (동시 호출은 직렬화) """
+    vf = get_voicefixer()
+    with _restore_lock:
+        return vf.restore_inmem(wav, cuda=False, mode=mode)
+
+
+def warmup():
+    """ 앱 시작 시 모델을 미리 로드 (실패해도 예외를 올리지 않고 기록만) """
+    global _warmup_error
+    try:
+        get_voicefixer()
+        _warmup_error = None
+        _ready.set()
+        print("✅ 모델 워밍업 완료")
+    except Exception as e:
+        _warmup_error = str(e)
+        print("❌ 모델 워밍업 실패:", e)
+
+
+def is_ready() -> bool:
+    return _ready.is_set()
+
+
+def status() -> dict:
+    return {
+        "ready": is_ready(),
+        "voicefixer_loaded": _voicefixer is not None,
+        "error": _warmup_error,
+    }
+
+
+def warmup_status() -> dict:
+    """ 워밍업 후 상태 반환 (프로세스 풀 워커에서 호출용) """
+    if not is_ready():
+        warmup()
+    return status()
@@ -0,0 +1,89 @@
+# audio/preprocess.py
+# ✅ 고급 전처리 함수: VAD + (필요할 때만) VoiceFixer + mp3 변환
+# - 업로드 바이트를 한 번만 디코딩해서 메모리(NumPy/torch)에서 모든 단계를 처리
+# - 무음을 먼저 잘라서 VoiceFixer 입력 길이를 줄이고, 이미 깨끗한 녹음은 음질 점수로 복원을 건너뛰거나 mode 0 으로
+# - ffmpeg 는 stdin/stdout 파이프로만 사용 → 임시 파일 없음 (read-only 컨테이너에서도 동작)
+# (프로세스 풀에서 spawn 으로 import 되므로 무거운 의존성은 여기서만 가져온다)
+import os
+import subprocess
+
+import numpy as np
+
+from audio import model_registry, quality
+from audio.vad import trim_silence
+# torch / torchaudio 는 무거우므로 실제로 전처리할 때만 import
+
+FFMPEG_PATH = os.getenv("FFMPEG_PATH", "ffmpeg")   # PATH 에 없으면 환경변수로 절대 경로 지정
+WORK_SAMPLE_RATE = 44100    # VoiceFixer 입력/출력 샘플레이트
+OUTPUT_SAMPLE_RATE = 22050
+OUTPUT_BITRATE = "64k"
+HIGHPASS_HZ = 300
+LOWPASS_HZ = 3000
+
+
+class AudioDecodeError(ValueError):
+    """ ffmpeg 가 업로드 파일을 디코딩하지 못했을 때 """
+
+
+def decode_audio(data: bytes, sample_rate: int = WORK_SAMPLE_RATE, ffmpeg_path: str = FFMPEG_PATH) -> np.ndarray:
+    """ 임의 포맷 오디오 바이트 → mono float32 PCM (ffmpeg 파이프 1회) """
+    proc = subprocess.run(
+        [ffmpeg_path, "-hide_banner", "-loglevel", "error",
+         "-i", "pipe:0",
+         "-f", "f32le", "-ac", "1", "-ar", str(sample_rate), "pipe:1"],
+        input=data, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+    )
+    if proc.returncode != 0:
+        raise AudioDecodeError(proc.stderr.decode(errors="ignore").strip() or "오디오 디코딩 실패")
+    return np.frombuffer(proc.stdout, dtype=np.float32).copy()
+
+
+def encode_mp3(wav: np.ndarray, sample_rate: int, bitrate: str = OUTPUT_BITRATE, ffmpeg_path: str = FFMPEG_PATH) -> bytes:
+    """ mono float32 PCM → mp3 바이트 (ffmpeg 파이프 1회) """
+    pcm = np.ascontiguousarray(wav, dtype=np.float32).tobytes()
+    proc = subprocess.run(
+        [ffmpeg_path, "-hide_banner", "-loglevel", "error",
+         "-f", "f32le", "-ac", "1", "-ar", str(sample_rate), "-i", "pipe:0",
+         "-b:a", bitrate, "-f", "mp3", "pipe:1"],
+        input=pcm, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True,
+    )
+    return proc.stdout
+
+
+def apply_voicefixer(wav: np.ndarray, mode: int = 1) -> np.ndarray:
+    restored = model_registry.voicefixer_restore_inmem(wav, mode=mode)
+    return np.asarray(restored, dtype=np.float32).reshape(-1)
+
+
+def apply_vad(wav: np.ndarray, sample_rate: int) -> np.ndarray:
+    """ 앞/뒤 + 중간의 긴 무음 제거 (audio/vad.py) """
+    return trim_silence(wav, sample_rate)
+
+
+def apply_band_filter(wav: np.ndarray, sample_rate: int) -> np.ndarray:
+    """ highpass=300 / lowpass=3000 후 출력 샘플레이트로 리샘플 """
+    import torch
+    import torchaudio.functional as AF
+
+    x = torch.from_numpy(wav).unsqueeze(0)
+    x = AF.highpass_biquad(x, sample_rate, HIGHPASS_HZ)
+    x = AF.lowpass_biquad(x, sample_rate, LOWPASS_HZ)
+    x = AF.resample(x, sample_rate, OUTPUT_SAMPLE_RATE)
+    return x.squeeze(0).clamp(-1.0, 1.0).numpy()
+
+
+def preprocess_for_elevenlabs(data: bytes, ffmpeg_path: str = FFMPEG_PATH) -> bytes:
+    """ 업로드 음성 바이트 → VoiceFixer / VAD / 필터 → 최종 mp3 바이트 """
+    wav = decode_audio(data, WORK_SAMPLE_RATE, ffmpeg_path=ffmpeg_path)
+    if wav.size == 0:
+        raise AudioDecodeError("오디오 데이터가 비어 있습니다.")
+
+    report = quality.assess(wav, WORK_SAMPLE_RATE)
+    mode = quality.restore_mode(report)
+    voiced = apply_vad(wav, WORK_SAMPLE_RATE)
+    print(f"🎚️ 음질 {report.to_dict()} → VoiceFixer {'생략' if mode is None else f'mode {mode}'}, "
+          f"VAD {report.duration:.1f}s → {voiced.size / WORK_SAMPLE_RATE:.1f}s")
+
+    cleaned = voiced if mode is None else apply_voicefixer(voiced, mode=mode)
+    filtered = apply_band_filter(cleaned, WORK_SAMPLE_RATE)
+    return encode_mp3(filtered, OUTPUT_SAMPLE_RATE, ffmpeg_path=ffmpeg_path)
@@ -0,0 +1,74 @@
+# audio/quality.py
+# ✅ 디코딩된 버퍼로 계산하는 가벼운 음질 지표 → VoiceFixer 실행 여부 / 모드 결정
+# - snr_db      : 프레임 에너지 상위(말소리) - 하위(잡음 바닥) 백분위 차이
+# - clipping    : |x| 가 거의 1.0 인 샘플 비율
+# - bandwidth_hz: 말소리가 큰 프레임의 평균 스펙트럼이 최고점에서 AUDIO_BANDWIDTH_FLOOR_DB 아래로 떨어지기 전 최고 주파수
+#                 (전화/저비트레이트 녹음은 4kHz 근처에서 잘린다)
+# AUDIO_RESTORE=auto(기본) / always(항상 mode 1) / never(항상 건너뜀)
+import os
+from dataclasses import dataclass, asdict
+from typing import Optional
+
+import numpy as np
+
+from audio.vad import frame_signal, frame_energy_db
+
+AUDIO_RESTORE = os.getenv("AUDIO_RESTORE", "auto")
+AUDIO_CLEAN_SNR_DB = float(os.getenv("AUDIO_CLEAN_SNR_DB", "35"))     # 이상이면 복원 생략
+AUDIO_LIGHT_SNR_DB = float(os.getenv("AUDIO_LIGHT_SNR_DB", "20"))     # 이상이면 가벼운 mode 0
+AUDIO_MAX_CLIPPING = float(os.getenv("AUDIO_MAX_CLIPPING", "0.001"))
+AUDIO_MIN_BANDWIDTH_HZ = float(os.getenv("AUDIO_MIN_BANDWIDTH_HZ", "6000"))
+AUDIO_BANDWIDTH_FLOOR_DB = -50.0
+CLIP_LEVEL = 0.999
+SPECTRUM_FRAME = 2048
+SPECTRUM_MAX_FRAMES = 200
+
+
+@dataclass
+class QualityReport:
+    snr_db: float
+    clipping: float
+    bandwidth_hz: float
+    duration: float
+
+    def to_dict(self) -> dict:
+        return {k: round(v, 4) for k, v in asdict(self).items()}
+
+
+def _bandwidth(wav: np.ndarray, sample_rate: int) -> float:
+    frames = frame_signal(wav, SPECTRUM_FRAME, SPECTRUM_FRAME // 2)
+    energy = frame_energy_db(frames)
+    # 큰 프레임(말소리) 위주로 최대 SPECTRUM_MAX_FRAMES 개만
+    loudest = np.argsort(energy)[-SPECTRUM_MAX_FRAMES:]
+    spectrum = np.mean(np.abs(np.fft.rfft(frames[loudest] * np.hanning(SPECTRUM_FRAME), axis=1)) ** 2, axis=0)
+    spectrum_db = 10.0 * np.log10(spectrum + 1e-12)
+    above = np.flatnonzero(spectrum_db > spectrum_db.max() + AUDIO_BANDWIDTH_FLOOR_DB)
+    if above.size == 0:
+        return 0.0
+    return float(above[-1] * sample_rate / SPECTRUM_FRAME)
+
+
+def assess(wav: np.ndarray, sample_rate: int) -> QualityReport:
+    frame = sample_rate * 30 // 1000
+    energy = frame_energy_db(frame_signal(wav, frame, frame // 3))
+    noise_floor, speech = np.percentile(energy, [10, 90])
+    return QualityReport(
+        snr_db=float(speech - noise_floor),
+        clipping=float(np.mean(np.abs(wav) >= CLIP_LEVEL)) if wav.size else 0.0,
+        bandwidth_hz=_bandwidth(wav, sample_rate),
+        duration=wav.size / sample_rate,
+    )
+
+
+def restore_mode(report: QualityReport, policy: str = AUDIO_RESTORE) -> Optional[int]:
+    """ None: VoiceFixer 건너뜀, 0: 가벼운 복원, 1: 전처리 포함 복원 (기존 동작) """
+    if policy == "never":
+        return None
+    if policy == "always":
+        return 1
+    damaged = report.clipping > AUDIO_MAX_CLIPPING or report.bandwidth_hz < AUDIO_MIN_BANDWIDTH_HZ
+    if damaged or report.snr_db < AUDIO_LIGHT_SNR_DB:
+        return 1
+    if report.snr_db < AUDIO_CLEAN_SNR_DB:
+        return 0
+    return None
@@ -0,0 +1,121 @@
+# audio/vad.py
+# ✅ 프레임 단위로 벡터화한 VAD (torchaudio Vad 대체)
+# - 기본: NumPy 에너지 검출기. 잡음 바닥(하위 백분위)과 말소리 크기(상위 백분위)로 임계값을 잡는다
+# - VAD_BACKEND=webrtc 이고 webrtcvad 가 설치돼 있으면 WebRTC GMM 검출기로 프레임 판정
+# - 앞/뒤 무음은 잘라내고, 중간의 긴 무음은 VAD_MAX_PAUSE_MS 까지만 남긴다 (자연스러운 쉼은 유지)
+# 말소리를 하나도 못 찾으면 원본을 그대로 돌려준다 (빈 음성으로 클로닝하지 않도록).
+import os
+
+import numpy as np
+
+VAD_BACKEND = os.getenv("VAD_BACKEND", "energy")
+VAD_FRAME_MS = 30
+VAD_HOP_MS = 10
+VAD_MARGIN_DB = float(os.getenv("VAD_MARGIN_DB", "6"))         # 잡음 바닥보다 이만큼 커야 말소리
+VAD_DYNAMIC_RANGE_DB = 40.0                                      # 말소리 크기에서 이만큼 아래까지만
+VAD_ABS_FLOOR_DB = -60.0
+VAD_HANGOVER_MS = int(os.getenv("VAD_HANGOVER_MS", "150"))      # 말소리 앞뒤로 붙여 두는 여유
+VAD_MIN_SPEECH_MS = int(os.getenv("VAD_MIN_SPEECH_MS", "90"))   # 이보다 짧은 소리는 잡음으로 본다
+VAD_MAX_PAUSE_MS = int(os.getenv("VAD_MAX_PAUSE_MS", "300"))
+WEBRTC_SAMPLE_RATE = 16000
+WEBRTC_AGGRESSIVENESS = int(os.getenv("VAD_WEBRTC_AGGRESSIVENESS", "2"))
+
+
+def frame_signal(wav: np.ndarray, frame: int, hop: int) -> np.ndarray:
+    """ (프레임 수, frame) 뷰 (복사 없음). 프레임 하나보다 짧으면 0 으로 채운다 """
+    if wav.size < frame:
+        wav = np.pad(wav, (0, frame - wav.size))
+    return np.lib.stride_tricks.sliding_window_view(wav, frame)[::hop]
+
+
+def frame_energy_db(frames: np.ndarray) -> np.ndarray:
+    return 10.0 * np.log10(np.mean(np.square(frames, dtype=np.float64), axis=1) + 1e-10)
+
+
+def _energy_mask(wav: np.ndarray, sample_rate: int):
+    frame = sample_rate * VAD_FRAME_MS // 1000
+    hop = sample_rate * VAD_HOP_MS // 1000
+    energy = frame_energy_db(frame_signal(wav, frame, hop))
+    noise_floor, loud = np.percentile(energy, [10, 95])
+    threshold = max(noise_floor + VAD_MARGIN_DB, loud - VAD_DYNAMIC_RANGE_DB, VAD_ABS_FLOOR_DB)
+    return energy > threshold, frame, hop
+
+
+def _webrtc_mask(wav: np.ndarray, sample_rate: int):
+    import webrtcvad
+
+    # 16kHz 로 선형 보간 (판정용이라 충분) → 16bit PCM 30ms 프레임
+    n = int(wav.size * WEBRTC_SAMPLE_RATE / sample_rate)
+    resampled = np.interp(np.linspace(0, wav.size - 1, n), np.arange(wav.size), wav)
+    pcm = (np.clip(resampled, -1.0, 1.0) * 32767).astype("<i2")
+    frame16 = WEBRTC_SAMPLE_RATE * VAD_FRAME_MS // 1000
+    count = pcm.size // frame16
+    vad = webrtcvad.Vad(WEBRTC_AGGRESSIVENESS)
+    mask = np.fromiter(
+        (vad.is_speech(pcm[i * frame16:(i + 1) * frame16].tobytes(), WEBRTC_SAMPLE_RATE) for i in range(count)),
+        dtype=bool, count=count,
+    )
+    frame = sample_rate * VAD_FRAME_MS // 1000
+    return mask, frame, frame
+
+
+def speech_mask(wav: np.ndarray, sample_rate: int):
+    """ 프레임별 말소리 여부 → (mask, frame, hop) """
+    if VAD_BACKEND == "webrtc":
+        try:
+            return _webrtc_mask(wav, sample_rate)
+        except ImportError:
+            print("⚠️ VAD_BACKEND=webrtc 지만 webrtcvad 가 없어 에너지 VAD 사용")
+    return _energy_mask(wav, sample_rate)
+
+
+def _runs(mask: np.ndarray):
+    edges = np.diff(np.concatenate(([0], mask.astype(np.int8), [0])))
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+
+
+def speech_segments(wav: np.ndarray, sample_rate: int) -> list:
+    """ 말소리 구간 [(시작 샘플, 끝 샘플)] (짧은 잡음 제거 + 앞뒤 여유 포함, 겹치면 합침) """
+    mask, frame, hop = speech_mask(wav, sample_rate)
+    if not mask.any():
+        return []
+
+    starts, ends = _runs(mask)
+    keep = (ends - starts) * hop >= sample_rate * VAD_MIN_SPEECH_MS // 1000
+    starts, ends = starts[keep], ends[keep]
+    if starts.size == 0:
+        return []
+
+    pad = sample_rate * VAD_HANGOVER_MS // 1000
+    begin = np.maximum(starts * hop - pad, 0)
+    finish = np.minimum((ends - 1) * hop + frame + pad, wav.size)
+
+    segments = [[int(begin[0]), int(finish[0])]]
+    for b, f in zip(begin[1:], finish[1:]):
+        if b <= segments[-1][1]:
+            segments[-1][1] = max(segments[-1][1], int(f))
+        else:
+            segments.append([int(b), int(f)])
+    return [tuple(s) for s in segments]
+
+
+def trim_silence(wav: np.ndarray, sample_rate: int, max_pause_ms: int = VAD_MAX_PAUSE_MS) -> np.ndarray:
+    """ 앞/뒤 무음 제거 + 중간 무음을 max_pause_ms 로 줄인 버퍼 """
+    segments = speech_segments(wav, sample_rate)
+    if not segments:
+        return wav
+
+    max_pause = sample_rate * max_pause_ms // 1000
+    pieces = []
+    for i, (start, end) in enumerate(segments):
+        if i > 0:
+            gap_start, gap_end = segments[i - 1][1], start
+            if gap_end - gap_start > max_pause:
+                # 긴 무음은 앞/뒤 절반씩만 남겨서 이어 붙인다
+                half = max_pause // 2
+                pieces.append(wav[gap_start:gap_start + half])
+                pieces.append(wav[gap_end - (max_pause - half):gap_end])
+            else:
+                pieces.append(wav[gap_start:gap_end])
+        pieces.append(wav[start:end])
+    return np.concatenate(pieces).astype(np.float32, copy=False)
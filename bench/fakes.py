@@ -0,0 +1,402 @@
+# bench/fakes.py
+# ✅ 벤치마크용 외부 서비스 대역 (프로세스 내)
+# - OpenAI: 기록해 둔 응답을 지연 시간만 흉내 내서 반환 (chat / 구조화 출력 / 임베딩)
+# - ElevenLabs: httpx.MockTransport 로 TTS 응답, SDK 대역으로 음성 클로닝(IVC)
+# - Firestore: 엔드포인트가 쓰는 만큼만 구현한 메모리 DB, Storage 는 core.storage.LocalStorage 사용
+# install() 은 main 을 import 하기 전에 호출해야 한다 (main 이 import 시점에 storage 종류를 확인).
+import asyncio
+import hashlib
+import json
+import random
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+from uuid import uuid4
+
+import httpx
+
+RECORDED_STRUCTURED = {
+    "allowed_terms": [],
+    "reminder_text": "그날 바닷가에서 모래성을 쌓던 기억나세요? 파도 소리가 참 좋았지요…",
+    "quiz_type": 1,
+    "quiz_question": "그날 바닷가에서 무엇을 만들었는지 기억나세요?",
+    "quiz_options": ["모래성", "연", "눈사람", "종이배"],
+    "answer_index": 1,
+}
+
+RECORDED_TEXT = """회상 문장: 그날 바닷가에서 모래성을 쌓던 기억나세요? 파도 소리가 참 좋았지요…
+퀴즈 유형: 1
+퀴즈 문제: 그날 바닷가에서 무엇을 만들었는지 기억나세요?
+선택지:
+1번. 모래성
+2번. 연
+3번. 눈사람
+4번. 종이배
+
+정답: 1번. 모래성
+"""
+
+RECORDED_TERMS = '["바닷가", "모래성"]'
+
+
+class Latency:
+    """ 평균 mean 초, ± jitter 비율만큼 흔들리는 지연 """
+
+    def __init__(self, mean: float = 0.0, jitter: float = 0.2):
+        self.mean = mean
+        self.jitter = jitter
+
+    def sample(self) -> float:
+        if self.mean <= 0:
+            return 0.0
+        return max(0.0, random.uniform(self.mean * (1 - self.jitter), self.mean * (1 + self.jitter)))
+
+
+# ---------- OpenAI ----------
+
+def _usage(prompt: str, completion: str):
+    # 한국어는 대략 글자 수 = 토큰 수로 잡는다 (벤치마크용 근사치)
+    return SimpleNamespace(prompt_tokens=len(prompt), completion_tokens=len(completion),
+                           total_tokens=len(prompt) + len(completion))
+
+
+class _FakeChatCompletions:
+    def __init__(self, owner):
+        self.owner = owner
+
+    def create(self, model: str, messages: list, response_format: dict = None, **kwargs):
+        prompt = "\n".join(m.get("content", "") for m in messages)
+        if response_format and response_format.get("type") == "json_schema":
+            content = json.dumps(RECORDED_STRUCTURED, ensure_ascii=False)
+        elif "JSON 배열" in prompt:
+            content = RECORDED_TERMS
+        else:
+            content = RECORDED_TEXT
+        time.sleep(self.owner.latency.sample())
+        self.owner.calls += 1
+        message = SimpleNamespace(content=content, role="assistant")
+        return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason="stop")],
+                               usage=_usage(prompt, content), model=model)
+
+
+class _FakeEmbeddings:
+    def __init__(self, owner):
+        self.owner = owner
+
+    def create(self, model: str, input, **kwargs):
+        # 입력 해시로 만든 결정적 벡터 (같은 문장 → 같은 벡터)
+        seed = int.from_bytes(hashlib.sha256(str(input).encode("utf-8")).digest()[:8], "big")
+        rng = random.Random(seed)
+        vector = [rng.uniform(-1, 1) for _ in range(256)]
+        time.sleep(self.owner.embed_latency.sample())
+        return SimpleNamespace(data=[SimpleNamespace(embedding=vector)], usage=_usage(str(input), ""))
+
+
+class FakeOpenAI:
+    def __init__(self, latency: Latency = None, embed_latency: Latency = None):
+        self.latency = latency or Latency()
+        self.embed_latency = embed_latency or Latency()
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=_FakeChatCompletions(self))
+        self.embeddings = _FakeEmbeddings(self)
+
+    def close(self):
+        pass
+
+
+class _FakeAsyncChatCompletions:
+    """ stream=True 이면 RECORDED_TEXT 를 몇 글자씩 흘려보낸다 (첫 토큰까지 latency, 이후 균등 분배) """
+
+    def __init__(self, owner, chunk_chars: int = 8):
+        self.owner = owner
+        self.chunk_chars = chunk_chars
+
+    async def create(self, model: str, messages: list, stream: bool = False, **kwargs):
+        prompt = "\n".join(m.get("content", "") for m in messages)
+        content = RECORDED_TEXT
+        self.owner.calls += 1
+        if not stream:
+            await asyncio.sleep(self.owner.latency.sample())
+            message = SimpleNamespace(content=content, role="assistant")
+            return SimpleNamespace(choices=[SimpleNamespace(message=message, finish_reason="stop")],
+                                   usage=_usage(prompt, content), model=model)
+        return self._stream(prompt, content)
+
+    async def _stream(self, prompt: str, content: str):
+        total = self.owner.latency.sample()
+        pieces = [content[i:i + self.chunk_chars] for i in range(0, len(content), self.chunk_chars)]
+        await asyncio.sleep(total * 0.3)
+        for piece in pieces:
+            await asyncio.sleep(total * 0.7 / len(pieces))
+            yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))], usage=None)
+        yield SimpleNamespace(choices=[], usage=_usage(prompt, content))
+
+
+class FakeAsyncOpenAI:
+    def __init__(self, latency: Latency = None):
+        self.latency = latency or Latency()
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=_FakeAsyncChatCompletions(self))
+
+    async def close(self):
+        pass
+
+
+# ---------- ElevenLabs ----------
+
+class FakeElevenLabsSDK:
+    """ voices.ivc.create 만 흉내 """
+
+    def __init__(self, latency: Latency = None):
+        self.latency = latency or Latency()
+        self.created = 0
+        owner = self
+
+        class _IVC:
+            def create(self, name: str, files: list, **kwargs):
+                time.sleep(owner.latency.sample())
+                owner.created += 1
+                return SimpleNamespace(voice_id=f"fake_{uuid4().hex[:12]}", name=name)
+
+        class _Voices:
+            ivc = _IVC()
+
+        self.voices = _Voices()
+
+
+def elevenlabs_transport(audio: bytes, latency: Latency = None, chunk_size: int = 4096) -> httpx.MockTransport:
+    """ /text-to-speech/{voice_id}(/stream) 에 녹음된 mp3 를 돌려주는 transport """
+    latency = latency or Latency()
+
+    async def handler(request: httpx.Request) -> httpx.Response:
+        await asyncio.sleep(latency.sample())
+        if not request.url.path.startswith("/v1/text-to-speech/"):
+            return httpx.Response(404, json={"detail": "not faked"})
+        if request.url.path.endswith("/stream"):
+            chunks = [audio[i:i + chunk_size] for i in range(0, len(audio), chunk_size)]
+            return httpx.Response(200, content=_aiter(chunks), headers={"content-type": "audio/mpeg"})
+        return httpx.Response(200, content=audio, headers={"content-type": "audio/mpeg"})
+
+    return httpx.MockTransport(handler)
+
+
+async def _aiter(chunks):
+    for chunk in chunks:
+        yield chunk
+
+
+# ---------- Firestore ----------
+
+SERVER_TIMESTAMP_TYPES = ("Sentinel",)
+
+
+def _resolve(value):
+    # firestore.SERVER_TIMESTAMP 같은 sentinel 은 현재 시각으로
+    if type(value).__name__ in SERVER_TIMESTAMP_TYPES:
+        return time.time()
+    return value
+
+
+class FakeSnapshot:
+    def __init__(self, reference, data, update_time=None):
+        self.reference = reference
+        self.id = reference.id
+        self._data = data
+        self.update_time = update_time
+
+    @property
+    def exists(self) -> bool:
+        return self._data is not None
+
+    def to_dict(self):
+        return dict(self._data) if self._data is not None else None
+
+
+class FakeDocument:
+    def __init__(self, db, path: str):
+        self.db = db
+        self.path = path
+        self.id = path.rsplit("/", 1)[-1]
+
+    def collection(self, name: str):
+        return FakeCollection(self.db, f"{self.path}/{name}")
+
+    def get(self):
+        time.sleep(self.db.latency.sample())
+        with self.db.lock:
+            data = self.db.docs.get(self.path)
+            update_time = self.db.update_times.get(self.path)
+        return FakeSnapshot(self, dict(data) if data is not None else None, update_time)
+
+    def _write(self, data: dict, merge: bool = False, must_exist: bool = False, option=None):
+        data = {k: _resolve(v) for k, v in data.items()}
+        with self.db.lock:
+            if must_exist and self.path not in self.db.docs:
+                raise KeyError(f"문서 없음: {self.path}")
+            if option is not None and self.db.update_times.get(self.path) != option.last_update_time:
+                from google.api_core.exceptions import FailedPrecondition
+                raise FailedPrecondition(f"update_time 불일치: {self.path}")
+            if merge and self.path in self.db.docs:
+                self.db.docs[self.path].update(data)
+            else:
+                self.db.docs[self.path] = data
+            self.db.version += 1
+            self.db.update_times[self.path] = self.db.version
+
+    def set(self, data: dict, merge: bool = False):
+        time.sleep(self.db.latency.sample())
+        self._write(data, merge)
+
+    def update(self, data: dict, option=None):
+        time.sleep(self.db.latency.sample())
+        self._write(data, merge=True, must_exist=True, option=option)
+
+    def delete(self):
+        with self.db.lock:
+            self.db.docs.pop(self.path, None)
+
+
+class FakeQuery:
+    def __init__(self, collection, filters=(), order=None, limit=None, after=None):
+        self.collection = collection
+        self.filters = list(filters)
+        self.order = order
+        self._limit = limit
+        self._after = after
+
+    def _copy(self, **changes):
+        fields = {"filters": self.filters, "order": self.order, "limit": self._limit, "after": self._after}
+        fields.update(changes)
+        return FakeQuery(self.collection, **fields)
+
+    def where(self, field: str, op: str, value):
+        return self._copy(filters=self.filters + [(field, op, value)])
+
+    def order_by(self, field: str, direction: str = "ASCENDING"):
+        return self._copy(order=(field, direction))
+
+    def limit(self, n: int):
+        return self._copy(limit=n)
+
+    def start_after(self, snapshot):
+        return self._copy(after=snapshot.reference.path)
+
+    def _match(self, data: dict) -> bool:
+        for field, op, value in self.filters:
+            current = data.get(field)
+            if op == "==" and current != value:
+                return False
+            if op == "in" and current not in value:
+                return False
+        return True
+
+    def stream(self):
+        db = self.collection.db
+        time.sleep(db.latency.sample())
+        prefix = self.collection.path + "/"
+        with db.lock:
+            rows = [(path, dict(data), db.update_times.get(path)) for path, data in db.docs.items()
+                    if path.startswith(prefix) and "/" not in path[len(prefix):] and self._match(data)]
+        if self.order:
+            field, direction = self.order
+            rows.sort(key=lambda r: r[1].get(field) or 0, reverse=direction == "DESCENDING")
+        if self._after is not None:
+            paths = [path for path, _, _ in rows]
+            rows = rows[paths.index(self._after) + 1:] if self._after in paths else rows
+        if self._limit is not None:
+            rows = rows[:self._limit]
+        return iter([FakeSnapshot(FakeDocument(db, path), data, t) for path, data, t in rows])
+
+    def count(self):
+        total = sum(1 for _ in self.stream())
+        return SimpleNamespace(get=lambda: [[SimpleNamespace(value=total)]])
+
+
+class FakeCollection(FakeQuery):
+    def __init__(self, db, path: str):
+        self.db = db
+        self.path = path
+        super().__init__(self)
+
+    def document(self, doc_id: str = None):
+        return FakeDocument(self.db, f"{self.path}/{doc_id or uuid4().hex[:20]}")
+
+    def add(self, data: dict):
+        ref = self.document()
+        ref.set(data)
+        return time.time(), ref
+
+    def list_documents(self):
+        # 하위 컬렉션만 있는 (문서 자체는 없는) 경로도 포함
+        prefix = self.path + "/"
+        with self.db.lock:
+            ids = {path[len(prefix):].split("/", 1)[0] for path in self.db.docs if path.startswith(prefix)}
+        return [self.document(doc_id) for doc_id in sorted(ids)]
+
+
+class FakeBatch:
+    def __init__(self, db):
+        self.db = db
+        self.ops = []
+
+    def set(self, ref, data: dict, merge: bool = False):
+        self.ops.append((ref, data, merge, False))
+
+    def update(self, ref, data: dict):
+        self.ops.append((ref, data, True, True))
+
+    def commit(self):
+        # 왕복 지연은 커밋당 한 번
+        time.sleep(self.db.latency.sample())
+        for ref, data, merge, must_exist in self.ops:
+            ref._write(data, merge, must_exist)
+        self.ops = []
+
+
+class FakeFirestore:
+    def __init__(self, latency: Latency = None):
+        self.latency = latency or Latency()
+        self.docs = {}
+        self.update_times = {}    # 경로 → 쓰기 순번 (update_time 전제조건 흉내)
+        self.version = 0
+        self.lock = threading.Lock()
+
+    def collection(self, name: str):
+        return FakeCollection(self, name)
+
+    def batch(self):
+        return FakeBatch(self)
+
+    def write_option(self, last_update_time=None):
+        return SimpleNamespace(last_update_time=last_update_time)
+
+
+# ---------- 설치 ----------
+
+def install(audio: bytes, llm_latency: float = 0.8, tts_latency: float = 0.5, clone_latency: float = 2.0,
+            firestore_latency: float = 0.02, storage_root: str = None):
+    """ core.resources 의 공유 클라이언트를 대역으로 바꿔 끼운다. 대역 객체들을 반환 """
+    from core.resources import resources, ELEVENLABS_BASE_URL
+    from core.storage import LocalStorage
+
+    fakes = SimpleNamespace(
+        openai=FakeOpenAI(Latency(llm_latency), Latency(min(llm_latency, 0.1))),
+        openai_async=FakeAsyncOpenAI(Latency(llm_latency)),
+        elevenlabs=FakeElevenLabsSDK(Latency(clone_latency)),
+        db=FakeFirestore(Latency(firestore_latency)),
+        storage=LocalStorage(root=storage_root or tempfile.mkdtemp(prefix="bench_storage_"), base_url="/bench"),
+    )
+    resources._objects.update({
+        "openai": fakes.openai,
+        "openai_async": fakes.openai_async,
+        "elevenlabs": fakes.elevenlabs,
+        "db": fakes.db,
+        "bucket": SimpleNamespace(name="bench-bucket"),
+        "storage": fakes.storage,
+        "elevenlabs_http": httpx.AsyncClient(
+            base_url=ELEVENLABS_BASE_URL, transport=elevenlabs_transport(audio, Latency(tts_latency)),
+        ),
+    })
+    return fakes
+
@@ -0,0 +1,318 @@
+# bench/loadgen.py
+# ✅ 부하 생성기: /generate-only, /generate-and-read, /register-voice 를 동시성 N 으로 호출
+# - 기본은 프로세스 내 실행: bench/fakes 로 OpenAI / ElevenLabs / Firebase 를 대역으로 바꾸고 ASGI 로 직접 호출
+# - --url 을 주면 실행 중인 서버로 실제 HTTP 요청 (대역 없음, 단계별 시간은 서버의 /metrics 참고)
+# - 시나리오별 처리량, 지연 p50/p95/p99, CPU 시간, RSS 와 단계별(stage_duration_seconds) 지연을 출력
+# - --baseline 과 비교해서 p95 / 처리량이 tolerance 이상 나빠지면 종료 코드 1 (배포 전 회귀 확인용)
+#
+# 예) python -m bench.loadgen --scenario all --concurrency 8 --requests 32 --output bench_result.json
+#     python -m bench.loadgen --scenario generate-only --llm-latency 1.5 --baseline bench_baseline.json
+import argparse
+import asyncio
+import glob
+import json
+import os
+import sys
+import tempfile
+import time
+
+SCENARIOS = ("generate-only", "generate-and-read", "register-voice")
+DEFAULT_SAMPLES = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "local_backup", "*.mp3")
+
+
+def _percentile(values: list, q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+
+def load_samples(pattern: str) -> list:
+    paths = sorted(glob.glob(pattern))
+    if not paths:
+        raise SystemExit(f"샘플 오디오가 없습니다: {pattern}")
+    samples = []
+    for path in paths:
+        with open(path, "rb") as f:
+            samples.append((os.path.basename(path), f.read()))
+    return samples
+
+
+def build_request(scenario: str, i: int, samples: list, args) -> dict:
+    """ i 번째 요청의 (path, data, files) """
+    file_name, audio = samples[i % len(samples)]
+    guardian_uid = f"bench_{i % args.guardians}" if args.guardians else f"bench_{i}"
+    if scenario == "generate-only":
+        return {
+            "path": "/generate-only",
+            "data": {
+                "guardian_uid": guardian_uid,
+                "topic": "여행",
+                "when": "봄날",
+                "where": "바닷가에서",
+                "how": "가족과",
+                "what": f"모래성을 쌓았다 #{i}",     # 요청마다 달라서 LLM 캐시에 걸리지 않음
+                "memory_moment": "파도가 모래성을 덮쳤을 때 다 같이 웃었다",
+                "relationship": "딸",
+            },
+        }
+    if scenario == "generate-and-read":
+        return {
+            "path": "/generate-and-read",
+            "data": {
+                "guardian_uid": guardian_uid,
+                "name": "벤치마크 보호자",
+                "patient_name": "김영희",
+                "photo_description": f"봄날 바닷가에서 모래성을 쌓았다 #{i}",
+                "relationship": "딸",
+                "tone": "다정하게",
+            },
+            "files": {"file": (file_name, audio, "audio/mpeg")},
+        }
+    return {
+        "path": "/register-voice",
+        "data": {"guardian_uid": guardian_uid, "name": "벤치마크 보호자"},
+        "files": {"file": (file_name, audio, "audio/mpeg")},
+    }
+
+
+class ResourceSampler:
+    """ 이 프로세스 + 자식(CPU 풀 워커)의 CPU 시간 / RSS 를 주기적으로 측정 (psutil 없으면 resource 모듈) """
+
+    def __init__(self, interval: float = 0.1):
+        self.interval = interval
+        self.peak_rss = 0
+        self._task = None
+        try:
+            import psutil
+            self._proc = psutil.Process()
+        except ImportError:
+            self._proc = None
+
+    def _processes(self):
+        procs = [self._proc]
+        try:
+            procs += self._proc.children(recursive=True)
+        except Exception:
+            pass
+        return procs
+
+    def cpu_seconds(self) -> float:
+        if self._proc is not None:
+            total = 0.0
+            for p in self._processes():
+                try:
+                    t = p.cpu_times()
+                    total += t.user + t.system
+                except Exception:
+                    pass
+            return total
+        try:
+            import resource
+            usage = resource.getrusage(resource.RUSAGE_SELF)
+            return usage.ru_utime + usage.ru_stime
+        except ImportError:
+            return time.process_time()
+
+    def rss_bytes(self) -> int:
+        if self._proc is not None:
+            total = 0
+            for p in self._processes():
+                try:
+                    total += p.memory_info().rss
+                except Exception:
+                    pass
+            return total
+        try:
+            import resource
+            # Linux 는 KB 단위 최대값 (현재값을 알 수 없으므로 최대값으로 대신함)
+            return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+        except ImportError:
+            return 0
+
+    async def _loop(self):
+        while True:
+            self.peak_rss = max(self.peak_rss, self.rss_bytes())
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        self.peak_rss = self.rss_bytes()
+        self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self.peak_rss = max(self.peak_rss, self.rss_bytes())
+
+
+async def run_scenario(client, scenario: str, samples: list, args) -> dict:
+    latencies = []
+    statuses = {}
+    semaphore = asyncio.Semaphore(args.concurrency)
+    sampler = ResourceSampler()
+
+    async def one(i: int):
+        req = build_request(scenario, i, samples, args)
+        async with semaphore:
+            start = time.perf_counter()
+            try:
+                response = await client.post(req["path"], data=req["data"], files=req.get("files"))
+                status = response.status_code
+            except Exception as e:
+                status = type(e).__name__
+            elapsed = time.perf_counter() - start
+        latencies.append(elapsed)
+        statuses[str(status)] = statuses.get(str(status), 0) + 1
+
+    cpu_start = sampler.cpu_seconds()
+    sampler.start()
+    wall_start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(args.requests)))
+    wall = time.perf_counter() - wall_start
+    await sampler.stop()
+    cpu = sampler.cpu_seconds() - cpu_start
+
+    ok = statuses.get("200", 0)
+    return {
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "ok": ok,
+        "errors": args.requests - ok,
+        "status_counts": statuses,
+        "wall_seconds": round(wall, 3),
+        "throughput_rps": round(ok / wall, 3) if wall else 0.0,
+        "latency": {
+            "p50": round(_percentile(latencies, 0.50), 4),
+            "p95": round(_percentile(latencies, 0.95), 4),
+            "p99": round(_percentile(latencies, 0.99), 4),
+            "max": round(max(latencies), 4) if latencies else 0.0,
+        },
+        "cpu_seconds": round(cpu, 3),
+        "cpu_percent": round(100.0 * cpu / wall, 1) if wall else 0.0,
+        "rss_peak_mb": round(sampler.peak_rss / (1024 * 1024), 1),
+    }
+
+
+async def run_in_process(args, scenarios: list, samples: list) -> dict:
+    # 설정은 모듈 import 시점에 읽히므로 main 을 import 하기 전에 환경변수부터
+    workdir = tempfile.mkdtemp(prefix="bench_")
+    os.environ.setdefault("JOB_SQLITE_PATH", os.path.join(workdir, "jobs.sqlite3"))
+    os.environ.setdefault("TTS_CACHE_DIR", os.path.join(workdir, "tts_cache"))
+    os.environ.setdefault("PREFETCH_INTERVAL_SECONDS", "86400")
+    os.environ.setdefault("FFMPEG_PATH", "ffmpeg")
+
+    import httpx
+    from bench import fakes
+
+    fakes.install(
+        samples[0][1],
+        llm_latency=args.llm_latency,
+        tts_latency=args.tts_latency,
+        clone_latency=args.clone_latency,
+        firestore_latency=args.firestore_latency,
+        storage_root=os.path.join(workdir, "storage"),
+    )
+    import main
+    from core import metrics
+
+    results = {}
+    async with main.app.router.lifespan_context(main.app):
+        # 모델 로드 시간은 측정에서 제외
+        await main.app.state.warmup_task
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=args.timeout) as client:
+            for scenario in scenarios:
+                metrics.reset()
+                print(f"▶️ {scenario} (요청 {args.requests}개, 동시성 {args.concurrency})")
+                results[scenario] = await run_scenario(client, scenario, samples, args)
+                results[scenario]["stages"] = metrics.summary()
+    return results
+
+
+async def run_remote(args, scenarios: list, samples: list) -> dict:
+    import httpx
+
+    results = {}
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout) as client:
+        for scenario in scenarios:
+            print(f"▶️ {scenario} → {args.url} (요청 {args.requests}개, 동시성 {args.concurrency})")
+            results[scenario] = await run_scenario(client, scenario, samples, args)
+    return results
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list:
+    """ baseline 대비 p95 가 늘거나 처리량이 줄어든 시나리오 목록 """
+    regressions = []
+    for scenario, current in results.items():
+        base = baseline.get(scenario)
+        if not base:
+            continue
+        if current["latency"]["p95"] > base["latency"]["p95"] * (1 + tolerance):
+            regressions.append(f"{scenario}: p95 {base['latency']['p95']}s → {current['latency']['p95']}s")
+        if current["throughput_rps"] < base["throughput_rps"] * (1 - tolerance):
+            regressions.append(f"{scenario}: 처리량 {base['throughput_rps']} → {current['throughput_rps']} req/s")
+        if current["errors"] > base.get("errors", 0):
+            regressions.append(f"{scenario}: 오류 {base.get('errors', 0)} → {current['errors']}")
+    return regressions
+
+
+def print_report(results: dict):
+    for scenario, r in results.items():
+        lat = r["latency"]
+        print(f"\n📊 {scenario}: {r['ok']}/{r['requests']} 성공, {r['throughput_rps']} req/s, "
+              f"p50 {lat['p50']}s / p95 {lat['p95']}s / p99 {lat['p99']}s, "
+              f"CPU {r['cpu_seconds']}s ({r['cpu_percent']}%), RSS 최대 {r['rss_peak_mb']}MB")
+        if r["errors"]:
+            print("   상태 코드:", r["status_counts"])
+        for stage, s in sorted(r.get("stages", {}).items(), key=lambda kv: -kv[1]["sum"]):
+            print(f"   - {stage:<32} n={s['count']:<5} p50 {s['p50']:.3f}s  p95 {s['p95']:.3f}s  p99 {s['p99']:.3f}s")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="오프라인 부하 테스트 / 벤치마크")
+    parser.add_argument("--scenario", default="all", choices=SCENARIOS + ("all",))
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--guardians", type=int, default=0,
+                        help="보호자 수 (0 이면 요청마다 새 보호자 → 매번 전처리/클로닝)")
+    parser.add_argument("--samples", default=DEFAULT_SAMPLES, help="업로드할 오디오 glob")
+    parser.add_argument("--url", default=None, help="실행 중인 서버 주소 (없으면 대역으로 프로세스 내 실행)")
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--llm-latency", type=float, default=0.8, help="OpenAI 대역 평균 지연(초)")
+    parser.add_argument("--tts-latency", type=float, default=0.5, help="ElevenLabs TTS 대역 평균 지연(초)")
+    parser.add_argument("--clone-latency", type=float, default=2.0, help="ElevenLabs 클로닝 대역 평균 지연(초)")
+    parser.add_argument("--firestore-latency", type=float, default=0.02, help="Firestore 대역 평균 지연(초)")
+    parser.add_argument("--output", default=None, help="결과 JSON 저장 경로")
+    parser.add_argument("--baseline", default=None, help="비교할 이전 결과 JSON")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="회귀로 볼 변화 비율")
+    return parser.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = parse_args(argv)
+    scenarios = list(SCENARIOS) if args.scenario == "all" else [args.scenario]
+    samples = load_samples(args.samples)
+
+    runner = run_remote if args.url else run_in_process
+    results = asyncio.run(runner(args, scenarios, samples))
+    print_report(results)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2)
+        print("\n💾 결과 저장:", args.output)
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+        if regressions:
+            print("\n❌ 성능 회귀:")
+            for line in regressions:
+                print("   -", line)
+            return 1
+        print("\n✅ baseline 대비 회귀 없음")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
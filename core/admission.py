@@ -0,0 +1,216 @@
+# core/admission.py
+# ✅ 자원별 입장 제어 + 보호자별 요청 속도 제한
+# - AdmissionGate: CPU(VoiceFixer) / LLM / TTS 동시 실행 수 제한. 대기 중에는 interactive 가 background(프리페치)보다 먼저,
+#   background 는 전체 슬롯의 일부(ADMISSION_BACKGROUND_SHARE)만 쓸 수 있어서 대화형 요청 몫이 항상 남는다
+#   interactive 가 ADMISSION_MAX_WAIT 초 안에 슬롯을 못 얻거나 대기열이 가득 차면 503 + Retry-After
+# - GuardianLimiter: guardian_uid 별 토큰 버킷, 초과하면 429 + Retry-After
+import asyncio
+import math
+import os
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+
+from fastapi import HTTPException
+
+from core import metrics
+from core.pool import CPU_WORKERS, PoolSaturated
+from core.ratelimit import TokenBucket
+
+INTERACTIVE = "interactive"
+BACKGROUND = "background"
+
+ADMISSION_CPU_CONCURRENCY = int(os.getenv("ADMISSION_CPU_CONCURRENCY", str(max(CPU_WORKERS, 1))))
+ADMISSION_LLM_CONCURRENCY = int(os.getenv("ADMISSION_LLM_CONCURRENCY", "8"))
+ADMISSION_TTS_CONCURRENCY = int(os.getenv("ADMISSION_TTS_CONCURRENCY", "5"))     # ElevenLabs 요금제 동시 요청 수
+ADMISSION_LLM_RATE_PER_SEC = float(os.getenv("ADMISSION_LLM_RATE_PER_SEC", "0"))  # 0 이면 속도 제한 없음
+ADMISSION_TTS_RATE_PER_SEC = float(os.getenv("ADMISSION_TTS_RATE_PER_SEC", "0"))
+ADMISSION_MAX_WAIT = float(os.getenv("ADMISSION_MAX_WAIT", "15"))
+ADMISSION_MAX_QUEUE = int(os.getenv("ADMISSION_MAX_QUEUE", "32"))
+ADMISSION_BACKGROUND_SHARE = float(os.getenv("ADMISSION_BACKGROUND_SHARE", "0.5"))
+
+GUARDIAN_REQUESTS_PER_MIN = float(os.getenv("GUARDIAN_REQUESTS_PER_MIN", "20"))
+GUARDIAN_REQUEST_BURST = int(os.getenv("GUARDIAN_REQUEST_BURST", "5"))
+GUARDIAN_VOICE_UPLOADS_PER_HOUR = float(os.getenv("GUARDIAN_VOICE_UPLOADS_PER_HOUR", "6"))
+GUARDIAN_VOICE_BURST = int(os.getenv("GUARDIAN_VOICE_BURST", "2"))
+GUARDIAN_MAX_TRACKED = 10000
+
+_rejected = metrics.registry.counter("admission_rejected_total", "입장 제어로 거절된 요청 수")
+_in_use = metrics.registry.gauge("admission_in_use", "자원별 사용 중인 슬롯 수")
+_waiting = metrics.registry.gauge("admission_waiting", "자원별 대기 중인 요청 수")
+
+
+class RateLimited(HTTPException):
+    """ 보호자별 요청 한도 초과 → 429 + Retry-After """
+
+    def __init__(self, retry_after: float, detail: str = "요청이 너무 많습니다. 잠시 후 다시 시도해주세요."):
+        super().__init__(
+            status_code=429,
+            detail=detail,
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+
+
+class AdmissionGate:
+    def __init__(self, name: str, capacity: int, rate: float = 0.0, max_wait: float = ADMISSION_MAX_WAIT,
+                 max_queue: int = ADMISSION_MAX_QUEUE, background_share: float = ADMISSION_BACKGROUND_SHARE):
+        self.name = name
+        self.capacity = max(capacity, 1)
+        self.background_limit = max(1, int(self.capacity * background_share))
+        self.max_wait = max_wait
+        self.max_queue = max_queue
+        self.rate_bucket = TokenBucket(rate, burst=self.capacity) if rate > 0 else None
+        self._in_use = {INTERACTIVE: 0, BACKGROUND: 0}
+        self._waiters = {INTERACTIVE: deque(), BACKGROUND: deque()}
+        self.rejected = 0
+
+    @property
+    def in_use(self) -> int:
+        return self._in_use[INTERACTIVE] + self._in_use[BACKGROUND]
+
+    @property
+    def waiting(self) -> int:
+        return len(self._waiters[INTERACTIVE]) + len(self._waiters[BACKGROUND])
+
+    def _can_start(self, priority: str) -> bool:
+        if self.in_use >= self.capacity:
+            return False
+        if priority == BACKGROUND:
+            return self._in_use[BACKGROUND] < self.background_limit and not self._waiters[INTERACTIVE]
+        return True
+
+    def _reject(self, reason: str):
+        self.rejected += 1
+        _rejected.inc(gate=self.name, reason=reason)
+        raise PoolSaturated(self.name, retry_after=max(1, math.ceil(self.max_wait)))
+
+    def _wake(self):
+        for priority in (INTERACTIVE, BACKGROUND):
+            waiters = self._waiters[priority]
+            while waiters and self._can_start(priority):
+                future = waiters.popleft()
+                if future.done():
+                    continue
+                self._in_use[priority] += 1     # 깨우는 쪽에서 슬롯을 미리 잡아 둔다
+                future.set_result(True)
+
+    async def acquire(self, priority: str = INTERACTIVE):
+        if not self._waiters[priority] and self._can_start(priority):
+            self._in_use[priority] += 1
+        else:
+            if priority == INTERACTIVE and len(self._waiters[INTERACTIVE]) >= self.max_queue:
+                self._reject("queue_full")
+            future = asyncio.get_running_loop().create_future()
+            self._waiters[priority].append(future)
+            try:
+                await asyncio.wait_for(future, timeout=self.max_wait if priority == INTERACTIVE else None)
+            except asyncio.TimeoutError:
+                self._remove(priority, future)
+                self._reject("timeout")
+            except asyncio.CancelledError:
+                if future.done() and not future.cancelled():
+                    self.release(priority)
+                else:
+                    self._remove(priority, future)
+                raise
+
+        if self.rate_bucket is not None:
+            try:
+                await self.rate_bucket.acquire()
+            except BaseException:
+                self.release(priority)
+                raise
+
+    def _remove(self, priority: str, future):
+        try:
+            self._waiters[priority].remove(future)
+        except ValueError:
+            pass
+
+    def release(self, priority: str = INTERACTIVE):
+        self._in_use[priority] = max(0, self._in_use[priority] - 1)
+        self._wake()
+
+    @asynccontextmanager
+    async def slot(self, priority: str = INTERACTIVE):
+        await self.acquire(priority)
+        try:
+            yield
+        finally:
+            self.release(priority)
+
+    def stats(self) -> dict:
+        return {
+            "capacity": self.capacity,
+            "background_limit": self.background_limit,
+            "in_use": dict(self._in_use),
+            "waiting": {p: len(w) for p, w in self._waiters.items()},
+            "rejected": self.rejected,
+        }
+
+
+class GuardianLimiter:
+    """ guardian_uid 별 토큰 버킷 (오래 안 쓴 보호자부터 정리) """
+
+    def __init__(self, name: str, rate_per_sec: float, burst: int, max_tracked: int = GUARDIAN_MAX_TRACKED):
+        self.name = name
+        self.rate = rate_per_sec
+        self.burst = burst
+        self.max_tracked = max_tracked
+        self._buckets = OrderedDict()
+        self.rejected = 0
+
+    def check(self, guardian_uid: str, cost: float = 1.0):
+        if not guardian_uid or self.rate <= 0:
+            return
+        bucket = self._buckets.get(guardian_uid)
+        if bucket is None:
+            bucket = self._buckets[guardian_uid] = TokenBucket(self.rate, burst=self.burst)
+            while len(self._buckets) > self.max_tracked:
+                self._buckets.popitem(last=False)
+        else:
+            self._buckets.move_to_end(guardian_uid)
+        wait = bucket.try_acquire(min(cost, bucket.capacity))
+        if wait > 0:
+            self.rejected += 1
+            _rejected.inc(gate=self.name, reason="guardian_rate")
+            raise RateLimited(wait)
+
+    def stats(self) -> dict:
+        return {"tracked_guardians": len(self._buckets), "rejected": self.rejected}
+
+
+cpu_gate = AdmissionGate("audio-cpu", ADMISSION_CPU_CONCURRENCY)
+llm_gate = AdmissionGate("llm", ADMISSION_LLM_CONCURRENCY, rate=ADMISSION_LLM_RATE_PER_SEC)
+tts_gate = AdmissionGate("tts", ADMISSION_TTS_CONCURRENCY, rate=ADMISSION_TTS_RATE_PER_SEC)
+GATES = (cpu_gate, llm_gate, tts_gate)
+
+guardian_requests = GuardianLimiter("guardian-requests", GUARDIAN_REQUESTS_PER_MIN / 60.0, GUARDIAN_REQUEST_BURST)
+guardian_voice = GuardianLimiter("guardian-voice", GUARDIAN_VOICE_UPLOADS_PER_HOUR / 3600.0, GUARDIAN_VOICE_BURST)
+
+
+def check_guardian(guardian_uid: str, cost: float = 1.0):
+    """ 엔드포인트 진입 시 호출 """
+    guardian_requests.check(guardian_uid, cost)
+
+
+def check_voice_upload(guardian_uid: str):
+    """ 새 음성 전처리/클로닝 직전에 호출 (같은 음성 재사용은 제외). 요청 한도보다 낮은 별도 한도 """
+    guardian_voice.check(guardian_uid)
+
+
+def stats() -> dict:
+    return {
+        **{gate.name: gate.stats() for gate in GATES},
+        guardian_requests.name: guardian_requests.stats(),
+        guardian_voice.name: guardian_voice.stats(),
+    }
+
+
+def _collect_metrics():
+    for gate in GATES:
+        for priority in (INTERACTIVE, BACKGROUND):
+            _in_use.set(gate._in_use[priority], gate=gate.name, priority=priority)
+            _waiting.set(len(gate._waiters[priority]), gate=gate.name, priority=priority)
+
+
+metrics.register_collector(_collect_metrics)
@@ -0,0 +1,310 @@
+# core/metrics.py
+# ✅ 단계별 지연 시간 / 카운터 / 게이지 수집 → /metrics (Prometheus 텍스트 포맷)
+# - with span("llm.generate"): ...  → stage_duration_seconds{stage="llm.generate"} 히스토그램
+# - 히스토그램은 Prometheus 버킷 + 최근 샘플(reservoir)로 p50 / p95 / p99 를 같이 내보낸다
+# - OTEL_EXPORTER_OTLP_ENDPOINT 가 있고 opentelemetry 가 설치돼 있으면 같은 span 을 OTLP 로도 전송
+# 프로세스 풀(spawn) 안에서 기록한 값은 메인 프로세스에 보이지 않으므로, CPU 작업은 호출하는 쪽에서 감싼다.
+import asyncio
+import bisect
+import functools
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+METRICS_RESERVOIR = int(os.getenv("METRICS_RESERVOIR", "1024"))
+OTEL_ENDPOINT = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT", "")
+OTEL_SERVICE_NAME = os.getenv("OTEL_SERVICE_NAME", "carelink-ai-service")
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+def _key(labels: dict) -> tuple:
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _fmt(key: tuple, extra: dict = None) -> str:
+    items = list(key) + list((extra or {}).items())
+    if not items:
+        return ""
+    body = ",".join(f'{k}="{str(v).replace(chr(92), chr(92) * 2).replace(chr(34), chr(92) + chr(34))}"'
+                    for k, v in items)
+    return "{" + body + "}"
+
+
+def _quantile(sorted_values: list, q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return sorted_values[index]
+
+
+class Counter:
+    kind = "counter"
+
+    def __init__(self, name: str, help: str):
+        self.name = name
+        self.help = help
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(_key(labels), 0.0)
+
+    def render(self) -> list:
+        with self._lock:
+            return [f"{self.name}{_fmt(k)} {v}" for k, v in self._values.items()]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[_key(labels)] = float(value)
+
+
+class Histogram:
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, buckets=DEFAULT_BUCKETS, reservoir: int = METRICS_RESERVOIR):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self.reservoir = reservoir
+        self._series = {}    # key -> [버킷별 개수, 합, 개수, 최근 샘플]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, **labels):
+        key = _key(labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0, deque(maxlen=self.reservoir)]
+            index = bisect.bisect_left(self.buckets, value)
+            if index < len(self.buckets):
+                series[0][index] += 1
+            series[1] += value
+            series[2] += 1
+            series[3].append(value)
+
+    def quantiles(self, **labels) -> dict:
+        series = self._series.get(_key(labels))
+        samples = sorted(series[3]) if series else []
+        return {q: _quantile(samples, q) for q in QUANTILES}
+
+    def summary(self) -> dict:
+        """ {라벨 문자열: {count, sum, p50, p95, p99}} (벤치마크 / JSON 출력용) """
+        out = {}
+        with self._lock:
+            items = [(k, s[1], s[2], sorted(s[3])) for k, s in self._series.items()]
+        for key, total, count, samples in items:
+            label = ",".join(v for _, v in key) or self.name
+            out[label] = {"count": count, "sum": round(total, 6),
+                          **{f"p{int(q * 100)}": round(_quantile(samples, q), 6) for q in QUANTILES}}
+        return out
+
+    def render(self) -> list:
+        lines = []
+        with self._lock:
+            items = [(k, list(s[0]), s[1], s[2], sorted(s[3])) for k, s in self._series.items()]
+        for key, counts, total, count, samples in items:
+            cumulative = 0
+            for bound, n in zip(self.buckets, counts):
+                cumulative += n
+                lines.append(f"{self.name}_bucket{_fmt(key, {'le': bound})} {cumulative}")
+            lines.append(f"{self.name}_bucket{_fmt(key, {'le': '+Inf'})} {count}")
+            lines.append(f"{self.name}_sum{_fmt(key)} {total}")
+            lines.append(f"{self.name}_count{_fmt(key)} {count}")
+        return lines
+
+    def render_quantiles(self) -> list:
+        """ Prometheus 히스토그램에는 quantile 이 없으므로 최근 샘플 기준 p50/p95/p99 를 별도 게이지로 노출 """
+        name = f"{self.name}_quantile"
+        lines = [f"# TYPE {name} gauge"]
+        with self._lock:
+            items = [(k, sorted(s[3])) for k, s in self._series.items()]
+        for key, samples in items:
+            for q in QUANTILES:
+                lines.append(f"{name}{_fmt(key, {'quantile': q})} {_quantile(samples, q)}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _get(self, cls, name: str, help: str, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = self._metrics[name] = cls(name, help, **kwargs)
+            return metric
+
+    def counter(self, name: str, help: str = "") -> Counter:
+        return self._get(Counter, name, help)
+
+    def gauge(self, name: str, help: str = "") -> Gauge:
+        return self._get(Gauge, name, help)
+
+    def histogram(self, name: str, help: str = "", **kwargs) -> Histogram:
+        return self._get(Histogram, name, help, **kwargs)
+
+    def register_collector(self, fn):
+        """ render 직전에 호출되는 함수 (풀 대기열 / 캐시 통계 같은 값을 게이지로 옮길 때) """
+        self._collectors.append(fn)
+
+    def collect(self):
+        for fn in list(self._collectors):
+            try:
+                fn()
+            except Exception as e:
+                print("⚠️ 메트릭 수집 실패:", e)
+
+    def reset(self):
+        """ 값만 비운다 (벤치마크 시나리오 사이) """
+        for metric in list(self._metrics.values()):
+            with metric._lock:
+                if isinstance(metric, Histogram):
+                    metric._series.clear()
+                else:
+                    metric._values.clear()
+
+    def render(self) -> str:
+        self.collect()
+        lines = []
+        for metric in list(self._metrics.values()):
+            if metric.help:
+                lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+            if isinstance(metric, Histogram):
+                lines.extend(metric.render_quantiles())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+stage_seconds = registry.histogram("stage_duration_seconds", "단계별 처리 시간(초)")
+stage_errors = registry.counter("stage_errors_total", "단계별 실패 횟수")
+llm_tokens = registry.counter("llm_tokens_total", "OpenAI 사용 토큰 수")
+tts_characters = registry.counter("tts_characters_total", "ElevenLabs 로 보낸 글자 수")
+cache_events = registry.counter("cache_events_total", "캐시 적중/미스")
+
+
+# ---------- OpenTelemetry (선택) ----------
+
+_tracer = None
+
+
+def _otel_tracer():
+    global _tracer
+    if _tracer is None:
+        _tracer = False
+        if OTEL_ENDPOINT:
+            try:
+                from opentelemetry import trace
+                from opentelemetry.exporter.otlp.proto.http.trace_exporter import OTLPSpanExporter
+                from opentelemetry.sdk.resources import Resource
+                from opentelemetry.sdk.trace import TracerProvider
+                from opentelemetry.sdk.trace.export import BatchSpanProcessor
+
+                provider = TracerProvider(resource=Resource.create({"service.name": OTEL_SERVICE_NAME}))
+                provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter()))
+                trace.set_tracer_provider(provider)
+                _tracer = trace.get_tracer(OTEL_SERVICE_NAME)
+                print("✅ OpenTelemetry 내보내기 활성화:", OTEL_ENDPOINT)
+            except ImportError:
+                print("⚠️ OTEL_EXPORTER_OTLP_ENDPOINT 가 설정됐지만 opentelemetry 패키지가 없습니다.")
+    return _tracer or None
+
+
+# ---------- 기록 헬퍼 ----------
+
+@contextmanager
+def span(stage: str, **attributes):
+    """ 단계 실행 시간 기록. 예외가 나면 stage_errors_total 도 올리고 그대로 다시 던진다 """
+    tracer = _otel_tracer()
+    otel_cm = None
+    if tracer:
+        otel_cm = tracer.start_as_current_span(stage, attributes={k: v for k, v in attributes.items() if v is not None})
+    otel_span = otel_cm.__enter__() if otel_cm else None
+    start = time.perf_counter()
+    try:
+        yield
+    except BaseException as e:
+        if not isinstance(e, (GeneratorExit, asyncio.CancelledError)):
+            stage_errors.inc(stage=stage, error=type(e).__name__)
+        if otel_span is not None:
+            otel_span.record_exception(e)
+        raise
+    finally:
+        stage_seconds.observe(time.perf_counter() - start, stage=stage)
+        if otel_cm is not None:
+            otel_cm.__exit__(None, None, None)
+
+
+def timed(stage: str):
+    """ 함수 전체를 span 으로 감싸는 데코레이터 (sync / async 모두) """
+    def decorator(fn):
+        if asyncio.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def async_wrapper(*args, **kwargs):
+                with span(stage):
+                    return await fn(*args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def record_llm_usage(usage, model: str, task: str):
+    """ OpenAI 응답의 usage(prompt/completion 토큰) 기록 """
+    if usage is None:
+        return
+    llm_tokens.inc(getattr(usage, "prompt_tokens", 0) or 0, model=model, task=task, kind="prompt")
+    llm_tokens.inc(getattr(usage, "completion_tokens", 0) or 0, model=model, task=task, kind="completion")
+    # 프롬프트 prefix 캐시에 걸린 입력 토큰 (지원하는 모델만 값이 있음)
+    details = getattr(usage, "prompt_tokens_details", None)
+    cached = getattr(details, "cached_tokens", 0) if details is not None else 0
+    if cached:
+        llm_tokens.inc(cached, model=model, task=task, kind="prompt_cached")
+
+
+def record_tts_characters(text: str, mode: str = "full"):
+    tts_characters.inc(len(text), mode=mode)
+
+
+def record_cache(cache: str, event: str):
+    """ event: hit / miss (캐시마다 단계 구분이 있으면 hit_local 처럼 써도 됨) """
+    cache_events.inc(cache=cache, event=event)
+
+
+def register_collector(fn):
+    registry.register_collector(fn)
+
+
+def render() -> str:
+    return registry.render()
+
+
+def summary() -> dict:
+    return stage_seconds.summary()
+
+
+def reset():
+    registry.reset()
@@ -0,0 +1,139 @@
+# core/pool.py
+# ✅ 이벤트 루프를 막지 않도록 블로킹 작업을 워커 풀로 보내는 모듈
+# - cpu_pool: VoiceFixer / VAD 같은 CPU 작업 (프로세스 풀)
+# - io_pool : ffmpeg, Firebase 업로드, requests 같은 블로킹 I/O (스레드 풀)
+import asyncio
+import functools
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from fastapi import HTTPException
+
+from audio import model_registry
+from core import metrics
+
+CPU_WORKERS = int(os.getenv("AUDIO_CPU_WORKERS", "2"))      # 0 이면 프로세스 대신 스레드 1개 사용
+CPU_MAX_PENDING = int(os.getenv("AUDIO_CPU_MAX_PENDING", "4"))
+IO_WORKERS = int(os.getenv("IO_WORKERS", "16"))
+IO_MAX_PENDING = int(os.getenv("IO_MAX_PENDING", "64"))
+RETRY_AFTER_SECONDS = int(os.getenv("POOL_RETRY_AFTER", "10"))
+# 시작할 때 CPU 풀을 띄우고 VoiceFixer 를 미리 로드할지. 텍스트 전용 워커는 0 → 바로 ready (모델은 첫 음성 요청 때 로드)
+# AUDIO_CPU_WORKERS=0 이면 풀이 메인 프로세스 스레드라 기본값도 0 (메인 프로세스에 torch 를 미리 올리지 않음)
+AUDIO_WARMUP = os.getenv("AUDIO_WARMUP", "1" if CPU_WORKERS > 0 else "0") == "1"
+
+
+class PoolSaturated(HTTPException):
+    """ 대기열이 가득 찼을 때 503 + Retry-After 로 응답 """
+
+    def __init__(self, pool_name: str, retry_after: int = RETRY_AFTER_SECONDS):
+        super().__init__(
+            status_code=503,
+            detail=f"{pool_name} 작업 대기열이 가득 찼습니다. 잠시 후 다시 시도해주세요.",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
+class BoundedPool:
+    """ 실행 중 + 대기 중 작업 수를 max_pending 으로 제한하는 executor 래퍼 """
+
+    def __init__(self, name: str, executor_factory, max_pending: int):
+        self.name = name
+        self.max_pending = max_pending
+        self._executor_factory = executor_factory
+        self._executor = None
+        self._pending = 0
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            self._executor = self._executor_factory()
+        return self._executor
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    async def run(self, fn, *args, **kwargs):
+        # 이벤트 루프 스레드에서만 호출되므로 카운터에 별도 락은 필요 없음
+        if self._pending >= self.max_pending:
+            raise PoolSaturated(self.name)
+        self._pending += 1
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.executor, functools.partial(fn, *args, **kwargs))
+        finally:
+            self._pending -= 1
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+def _make_cpu_executor():
+    if CPU_WORKERS <= 0:
+        return ThreadPoolExecutor(max_workers=1, thread_name_prefix="audio-cpu")
+    # ✅ fork 대신 spawn: uvicorn / grpc 스레드 상태를 복제하지 않도록
+    return ProcessPoolExecutor(
+        max_workers=CPU_WORKERS,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=model_registry.warmup,
+    )
+
+
+def _make_io_executor():
+    return ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="blocking-io")
+
+
+cpu_pool = BoundedPool("audio-cpu", _make_cpu_executor, CPU_MAX_PENDING)
+io_pool = BoundedPool("blocking-io", _make_io_executor, IO_MAX_PENDING)
+
+_cpu_ready = False
+
+
+async def warm_cpu_pool():
+    """ 워커 프로세스를 미리 띄우고 모델 로드가 끝났는지 확인 (AUDIO_WARMUP=0 이면 건너뜀) """
+    global _cpu_ready
+    if not AUDIO_WARMUP:
+        print("✅ 음성 모델 워밍업 건너뜀 (AUDIO_WARMUP=0)")
+        return True
+    loop = asyncio.get_running_loop()
+    workers = max(CPU_WORKERS, 1)
+    statuses = await asyncio.gather(*[
+        loop.run_in_executor(cpu_pool.executor, model_registry.warmup_status)
+        for _ in range(workers)
+    ])
+    _cpu_ready = all(s["ready"] for s in statuses)
+    print(f"✅ CPU 풀 워밍업 {'완료' if _cpu_ready else '실패'} (workers={workers})")
+    return _cpu_ready
+
+
+def cpu_ready() -> bool:
+    """ readiness 기준: 워밍업을 하는 워커만 모델 로드 완료를 기다린다 """
+    return _cpu_ready or not AUDIO_WARMUP
+
+
+def stats() -> dict:
+    return {
+        cpu_pool.name: {"pending": cpu_pool.pending, "max_pending": cpu_pool.max_pending},
+        io_pool.name: {"pending": io_pool.pending, "max_pending": io_pool.max_pending},
+    }
+
+
+_pool_pending = metrics.registry.gauge("pool_pending_tasks", "워커 풀 실행+대기 중 작업 수")
+_pool_capacity = metrics.registry.gauge("pool_max_pending", "워커 풀 최대 허용 작업 수")
+
+
+def _collect_metrics():
+    for p in (cpu_pool, io_pool):
+        _pool_pending.set(p.pending, pool=p.name)
+        _pool_capacity.set(p.max_pending, pool=p.name)
+
+
+metrics.register_collector(_collect_metrics)
+
+
+def shutdown():
+    cpu_pool.shutdown()
+    io_pool.shutdown()
@@ -0,0 +1,35 @@
+# core/ratelimit.py
+# ✅ asyncio 용 토큰 버킷 (초당 rate 개, 최대 burst 개까지 누적)
+import asyncio
+import time
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = max(burst, 1)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self, tokens: float = 1.0) -> float:
+        """ 바로 가져갈 수 있으면 0, 아니면 기다려야 하는 초 (토큰은 소비하지 않음) """
+        self._refill()
+        if self._tokens >= tokens:
+            self._tokens -= tokens
+            return 0.0
+        return (tokens - self._tokens) / self.rate if self.rate > 0 else float("inf")
+
+    async def acquire(self, tokens: float = 1.0):
+        """ 토큰이 생길 때까지 대기 """
+        async with self._lock:
+            while True:
+                wait = self.try_acquire(tokens)
+                if wait == 0.0:
+                    return
+                await asyncio.sleep(wait)
@@ -0,0 +1,222 @@
+# core/resources.py
+# ✅ 공유 클라이언트 컨테이너
+# - Firebase(db/bucket), OpenAI(sync/async), ElevenLabs(SDK/httpx), requests 세션을 프로세스당 하나씩
+# - 처음 쓰일 때 생성(lazy) → 텍스트 전용 워커는 무거운 의존성을 import 하지 않는다
+# - FastAPI lifespan 에서 종료 시 커넥션 정리
+import os
+import threading
+from contextlib import asynccontextmanager
+
+from dotenv import load_dotenv
+
+load_dotenv()
+
+HTTP_TIMEOUT_SECONDS = float(os.getenv("HTTP_TIMEOUT", "60"))
+HTTP_CONNECT_TIMEOUT_SECONDS = float(os.getenv("HTTP_CONNECT_TIMEOUT", "5"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "50"))
+HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60"))
+
+ELEVENLABS_BASE_URL = "https://api.elevenlabs.io/v1"
+FIREBASE_STORAGE_BUCKET = os.getenv("FIREBASE_STORAGE_BUCKET", "carelink-a228a.firebasestorage.app")
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+        return True
+    except ImportError:
+        return False
+
+
+def _httpx_limits():
+    import httpx
+    return httpx.Limits(
+        max_connections=HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=HTTP_MAX_KEEPALIVE,
+        keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+    )
+
+
+def _httpx_timeout(read: float = HTTP_TIMEOUT_SECONDS):
+    import httpx
+    return httpx.Timeout(read, connect=HTTP_CONNECT_TIMEOUT_SECONDS)
+
+
+class LazyProxy:
+    """ 처음 속성에 접근할 때 factory() 로 실제 객체를 만드는 프록시 """
+
+    def __init__(self, factory):
+        object.__setattr__(self, "_factory", factory)
+
+    def __getattr__(self, name):
+        return getattr(self._factory(), name)
+
+    def __setattr__(self, name, value):
+        setattr(self._factory(), name, value)
+
+
+class Resources:
+    def __init__(self):
+        self._lock = threading.RLock()  # factory 안에서 다른 리소스를 꺼낼 수 있도록 재진입 허용
+        self._objects = {}
+
+    def _get(self, name: str, factory):
+        obj = self._objects.get(name)
+        if obj is None:
+            with self._lock:
+                obj = self._objects.get(name)
+                if obj is None:
+                    obj = factory()
+                    self._objects[name] = obj
+        return obj
+
+    def is_initialized(self, name: str) -> bool:
+        return name in self._objects
+
+    # ---------- Firebase ----------
+
+    def _init_firebase(self):
+        import firebase_admin
+        from firebase_admin import credentials
+
+        if not firebase_admin._apps:
+            json_path = os.getenv("FIREBASE_CREDENTIALS") or os.path.join(
+                os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "firebase", "serviceAccountKey.json"
+            )
+            cred = credentials.Certificate(json_path)
+            firebase_admin.initialize_app(cred, {"storageBucket": FIREBASE_STORAGE_BUCKET})
+        return firebase_admin.get_app()
+
+    @property
+    def firebase_app(self):
+        return self._get("firebase_app", self._init_firebase)
+
+    @property
+    def db(self):
+        def factory():
+            from firebase_admin import firestore
+            return firestore.client(self.firebase_app)
+        return self._get("db", factory)
+
+    @property
+    def bucket(self):
+        def factory():
+            from firebase_admin import storage
+            return storage.bucket(app=self.firebase_app)
+        return self._get("bucket", factory)
+
+    @property
+    def storage(self):
+        """ 오디오 산출물 저장소 (STORAGE_BACKEND=local 이면 Firebase 없이 local_backup/) """
+        def factory():
+            from core.storage import make_storage
+            return make_storage(LazyProxy(lambda: self.bucket))
+        return self._get("storage", factory)
+
+    # ---------- OpenAI ----------
+
+    @property
+    def openai(self):
+        def factory():
+            import httpx
+            import openai
+            return openai.OpenAI(
+                api_key=os.getenv("OPENAI_API_KEY"),
+                http_client=httpx.Client(limits=_httpx_limits(), timeout=_httpx_timeout()),
+                max_retries=2,
+            )
+        return self._get("openai", factory)
+
+    @property
+    def openai_async(self):
+        def factory():
+            import httpx
+            import openai
+            return openai.AsyncOpenAI(
+                api_key=os.getenv("OPENAI_API_KEY"),
+                http_client=httpx.AsyncClient(limits=_httpx_limits(), timeout=_httpx_timeout(), http2=_http2_available()),
+                max_retries=2,
+            )
+        return self._get("openai_async", factory)
+
+    # ---------- ElevenLabs ----------
+
+    @property
+    def elevenlabs(self):
+        def factory():
+            from elevenlabs.client import ElevenLabs
+            return ElevenLabs(api_key=os.getenv("ELEVENLABS_API_KEY"))
+        return self._get("elevenlabs", factory)
+
+    @property
+    def elevenlabs_http(self):
+        """ ElevenLabs REST 용 비동기 httpx 클라이언트 (닫혔으면 다시 생성) """
+        client = self._objects.get("elevenlabs_http")
+        if client is not None and client.is_closed:
+            self._objects.pop("elevenlabs_http", None)
+
+        def factory():
+            import httpx
+            return httpx.AsyncClient(
+                base_url=ELEVENLABS_BASE_URL,
+                headers={"xi-api-key": os.getenv("ELEVENLABS_API_KEY") or ""},
+                http2=_http2_available(),
+                timeout=_httpx_timeout(float(os.getenv("ELEVENLABS_TIMEOUT", "30"))),
+                limits=_httpx_limits(),
+            )
+        return self._get("elevenlabs_http", factory)
+
+    # ---------- requests (동기 호출용) ----------
+
+    @property
+    def http_session(self):
+        def factory():
+            import requests
+            from requests.adapters import HTTPAdapter
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=HTTP_MAX_KEEPALIVE, pool_maxsize=HTTP_MAX_CONNECTIONS)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            return session
+        return self._get("http_session", factory)
+
+    # ---------- 정리 ----------
+
+    async def aclose(self):
+        with self._lock:
+            objects, self._objects = self._objects, {}
+        for name in ("elevenlabs_http",):
+            client = objects.get(name)
+            if client is not None:
+                await client.aclose()
+        openai_async = objects.get("openai_async")
+        if openai_async is not None:
+            await openai_async.close()
+        for name in ("openai",):
+            client = objects.get(name)
+            if client is not None:
+                client.close()
+        session = objects.get("http_session")
+        if session is not None:
+            session.close()
+        # firebase_app / db / bucket / storage 는 프로세스 수명 동안 유지
+        for name in ("firebase_app", "db", "bucket", "storage"):
+            if name in objects:
+                self._objects[name] = objects[name]
+
+    @asynccontextmanager
+    async def lifespan(self, app=None):
+        """ FastAPI lifespan 용: 종료 시 커넥션 풀 정리 """
+        try:
+            yield self
+        finally:
+            await self.aclose()
+
+
+resources = Resources()
+
+# 모듈 import 시점에 초기화하지 않도록 프록시로 노출
+db = LazyProxy(lambda: resources.db)
+bucket = LazyProxy(lambda: resources.bucket)
+storage = LazyProxy(lambda: resources.storage)
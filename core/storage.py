@@ -0,0 +1,188 @@
+# core/storage.py
+# ✅ 오디오 산출물 저장소
+# - GCSStorage  : 메모리 바이트/파일 객체를 그대로 upload_from_file 로 스트리밍 (임시 파일 없음)
+#                 큰 원본 녹음은 resumable 업로드, Cache-Control / content-type 메타데이터 설정
+#                 URL 은 public / signed / token(Firebase 다운로드 토큰) 중 선택
+# - LocalStorage: local_backup/ 아래에 같은 경로로 저장 (GCS 없이 테스트용)
+# 모든 동기 메서드는 블로킹이므로 async 래퍼(io_pool)를 통해 호출한다.
+import io
+import os
+import threading
+from datetime import timedelta
+from urllib.parse import quote
+from uuid import uuid4
+
+from core import pool
+
+STORAGE_BACKEND = os.getenv("STORAGE_BACKEND", "gcs")            # gcs | local
+STORAGE_URL_MODE = os.getenv("STORAGE_URL_MODE", "public")       # public | signed | token
+STORAGE_SIGNED_URL_TTL = int(os.getenv("STORAGE_SIGNED_URL_TTL", str(7 * 24 * 3600)))
+STORAGE_RESUMABLE_THRESHOLD = int(os.getenv("STORAGE_RESUMABLE_THRESHOLD", str(5 * 1024 * 1024)))
+STORAGE_CHUNK_SIZE = 1024 * 1024 * 2    # 256KB 의 배수여야 함
+STORAGE_LOCAL_ROOT = os.getenv("STORAGE_LOCAL_ROOT", "local_backup")
+STORAGE_LOCAL_BASE_URL = os.getenv("STORAGE_LOCAL_BASE_URL", "/local_backup")
+
+CACHE_IMMUTABLE = "public, max-age=31536000, immutable"   # 내용 주소 기반(tts_cache/) 파일
+CACHE_PUBLIC = "public, max-age=86400"
+CACHE_PRIVATE = "private, no-store"                       # 보호자 원본/정제 음성, 작업 중간 파일
+
+MP3 = "audio/mpeg"
+BINARY = "application/octet-stream"
+
+
+def _as_file(data):
+    """ bytes 또는 파일 객체 → (파일 객체, 크기) """
+    if isinstance(data, (bytes, bytearray, memoryview)):
+        return io.BytesIO(data), len(data)
+    if hasattr(data, "seek") and hasattr(data, "tell"):
+        start = data.tell()
+        data.seek(0, os.SEEK_END)
+        size = data.tell() - start
+        data.seek(start)
+        return data, size
+    return data, None
+
+
+class GCSStorage:
+    def __init__(self, bucket, url_mode: str = STORAGE_URL_MODE, signed_url_ttl: int = STORAGE_SIGNED_URL_TTL,
+                 resumable_threshold: int = STORAGE_RESUMABLE_THRESHOLD):
+        self.bucket = bucket
+        self.url_mode = url_mode
+        self.signed_url_ttl = signed_url_ttl
+        self.resumable_threshold = resumable_threshold
+        self._tokens = {}     # path → 다운로드 토큰 (token 모드에서 재조회 방지)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def new_token() -> str:
+        return str(uuid4())
+
+    def upload(self, path: str, data, content_type: str = MP3, cache_control: str = CACHE_PUBLIC,
+               token: str = None) -> str:
+        """ bytes / 파일 객체를 그대로 Storage 로 스트리밍하고 URL 반환 """
+        blob = self.bucket.blob(path)
+        blob.cache_control = cache_control
+        if self.url_mode == "token":
+            token = token or self.new_token()
+            blob.metadata = {"firebaseStorageDownloadTokens": token}
+
+        stream, size = _as_file(data)
+        if size is None or size >= self.resumable_threshold:
+            blob.chunk_size = STORAGE_CHUNK_SIZE      # chunk_size 를 주면 resumable 세션으로 나눠 올림
+        blob.upload_from_file(stream, size=size, content_type=content_type)
+
+        if token:
+            with self._lock:
+                self._tokens[path] = token
+        return self.url(path, token=token)
+
+    def exists(self, path: str) -> bool:
+        return self.bucket.blob(path).exists()
+
+    def download(self, path: str):
+        blob = self.bucket.blob(path)
+        return blob.download_as_bytes() if blob.exists() else None
+
+    def delete_prefix(self, prefix: str):
+        for blob in self.bucket.list_blobs(prefix=prefix):
+            blob.delete()
+
+    def _token_for(self, path: str) -> str:
+        with self._lock:
+            token = self._tokens.get(path)
+        if token:
+            return token
+        # 다른 프로세스가 올린 파일: 메타데이터에서 토큰을 읽고, 없으면 새로 붙인다
+        blob = self.bucket.get_blob(path)
+        token = ((blob.metadata or {}).get("firebaseStorageDownloadTokens") or "").split(",")[0] if blob else ""
+        if blob is not None and not token:
+            token = self.new_token()
+            blob.metadata = {**(blob.metadata or {}), "firebaseStorageDownloadTokens": token}
+            blob.patch()
+        with self._lock:
+            self._tokens[path] = token
+        return token
+
+    def url(self, path: str, token: str = None) -> str:
+        """ 업로드 전에도 URL 을 만들 수 있다 (token 모드는 업로드 때 같은 token 을 넘길 것) """
+        if self.url_mode == "signed":
+            return self.bucket.blob(path).generate_signed_url(
+                version="v4", expiration=timedelta(seconds=self.signed_url_ttl), method="GET",
+            )
+        if self.url_mode == "token":
+            token = token or self._token_for(path)
+            return (f"https://firebasestorage.googleapis.com/v0/b/{self.bucket.name}/o/"
+                    f"{quote(path, safe='')}?alt=media&token={token}")
+        return f"https://storage.googleapis.com/{self.bucket.name}/{path}"
+
+    # ---------- async (io_pool) ----------
+
+    async def upload_async(self, path: str, data, content_type: str = MP3, cache_control: str = CACHE_PUBLIC,
+                           token: str = None) -> str:
+        return await pool.io_pool.run(self.upload, path, data, content_type, cache_control, token)
+
+    async def exists_async(self, path: str) -> bool:
+        return await pool.io_pool.run(self.exists, path)
+
+    async def url_async(self, path: str, token: str = None) -> str:
+        # public / token(토큰 있음)은 문자열 조합뿐, signed 는 서명 계산이라 io_pool 로
+        if self.url_mode == "public" or (self.url_mode == "token" and token):
+            return self.url(path, token=token)
+        return await pool.io_pool.run(self.url, path, token)
+
+
+class LocalStorage(GCSStorage):
+    """ local_backup/{path} 에 저장. URL 은 STORAGE_LOCAL_BASE_URL/{path} (main 에서 정적 파일로 마운트) """
+
+    def __init__(self, root: str = STORAGE_LOCAL_ROOT, base_url: str = STORAGE_LOCAL_BASE_URL):
+        super().__init__(bucket=None, url_mode="public")
+        self.root = root
+        self.base_url = base_url.rstrip("/")
+
+    def _path(self, path: str) -> str:
+        full = os.path.abspath(os.path.join(self.root, path))
+        if not full.startswith(os.path.abspath(self.root) + os.sep):
+            raise ValueError(f"잘못된 저장 경로: {path}")
+        return full
+
+    def upload(self, path: str, data, content_type: str = MP3, cache_control: str = CACHE_PUBLIC,
+               token: str = None) -> str:
+        full = self._path(path)
+        os.makedirs(os.path.dirname(full), exist_ok=True)
+        stream, _ = _as_file(data)
+        tmp = f"{full}.{uuid4().hex}.tmp"
+        with open(tmp, "wb") as f:
+            while True:
+                chunk = stream.read(STORAGE_CHUNK_SIZE)
+                if not chunk:
+                    break
+                f.write(chunk)
+        os.replace(tmp, full)
+        return self.url(path)
+
+    def exists(self, path: str) -> bool:
+        return os.path.exists(self._path(path))
+
+    def download(self, path: str):
+        full = self._path(path)
+        if not os.path.exists(full):
+            return None
+        with open(full, "rb") as f:
+            return f.read()
+
+    def delete_prefix(self, prefix: str):
+        directory = self._path(prefix.rstrip("/"))
+        if os.path.isdir(directory):
+            for dirpath, _, filenames in os.walk(directory, topdown=False):
+                for name in filenames:
+                    os.remove(os.path.join(dirpath, name))
+                os.rmdir(dirpath)
+
+    def url(self, path: str, token: str = None) -> str:
+        return f"{self.base_url}/{quote(path)}"
+
+
+def make_storage(bucket=None, backend: str = STORAGE_BACKEND):
+    if backend == "local":
+        return LocalStorage()
+    return GCSStorage(bucket)
@@ -5,3 +5,10 @@ class ToneEnum(str, Enum):
     kind = "다정하게"
     calm = "차분하게"
     bright = "밝게"
+
+class TopicEnum(str, Enum):
+    가족 = "가족"
+    여행 = "여행"
+    학창시절 = "학창시절"
+    동네 = "동네"
+    행복했던기억 = "환자가 행복했던 기억"
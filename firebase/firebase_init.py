@@ -1,20 +1,8 @@
 # firebase/firebase_init.py
-import os
-import firebase_admin
-from firebase_admin import credentials, storage, firestore
+# ✅ Firebase 앱 / Storage bucket / Firestore 클라이언트
+#    import 시점에 초기화하지 않고, 처음 사용할 때 core.resources 에서 한 번만 초기화
+from core.resources import resources, db, bucket
+from firebase.repository import make_repository
 
-if not firebase_admin._apps:
-    base_dir = os.path.dirname(os.path.abspath(__file__))
-    json_path = os.path.join(base_dir, "serviceAccountKey.json")
-    cred = credentials.Certificate(json_path)
-
-    # ✅ 먼저 초기화
-    firebase_admin.initialize_app(cred, {
-        "storageBucket": "carelink-a228a.firebasestorage.app"
-    })
-
-# ✅ 초기화 이후에 bucket 선언
-bucket = storage.bucket()
-
-# ✅ Firestore 클라이언트 선언
-db = firestore.client()
+# ✅ 보호자/프로필 캐시 + 묶음 쓰기 (firebase/repository.py)
+repository = make_repository(db)
@@ -0,0 +1,349 @@
+# firebase/repository.py
+# ✅ Firestore 접근 계층 (엔드포인트 / 음성 레지스트리 / 프리페치 공용)
+# - 보호자(guardians/{uid}) · 프로필(users/{uid}/profile/info) 문서는 TTL 캐시
+#   처음 읽을 때 on_snapshot 리스너를 붙여서, 다른 곳에서 문서가 바뀌면 캐시를 바로 갱신/무효화
+# - 쓰기는 WriteBatcher 가 REPOSITORY_FLUSH_MS 동안 모아서 batch.commit 한 번으로
+#   (동시에 들어온 여러 요청의 reminder 추가 / voiceId 갱신이 한 커밋, 커밋당 최대 500개)
+#   커밋이 실패하면 연산을 하나씩 다시 커밋해서, 잘못된 연산을 넣은 호출자만 실패를 받는다
+# - users/{uid}/reminders 페이지 조회: created_at 내림차순, 커서는 마지막 문서 id
+# - InMemoryRepository: 같은 인터페이스의 메모리 구현 (REPOSITORY_BACKEND=memory, 오프라인 테스트용)
+# get_* / list_* 는 블로킹(io_pool 에서 호출), add_* / set_* 는 async.
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+from uuid import uuid4
+
+from core import metrics, pool
+
+REPOSITORY_BACKEND = os.getenv("REPOSITORY_BACKEND", "firestore")
+REPOSITORY_CACHE_TTL = float(os.getenv("REPOSITORY_CACHE_TTL", "300"))
+REPOSITORY_LISTEN = os.getenv("REPOSITORY_LISTEN", "1") == "1"
+REPOSITORY_MAX_LISTENERS = int(os.getenv("REPOSITORY_MAX_LISTENERS", "500"))
+REPOSITORY_FLUSH_MS = float(os.getenv("REPOSITORY_FLUSH_MS", "10"))
+FIRESTORE_BATCH_LIMIT = 500
+HISTORY_PAGE_SIZE = 20
+HISTORY_MAX_PAGE_SIZE = 100
+DESCENDING = "DESCENDING"           # firestore.Query.DESCENDING 과 같은 값
+
+DEFAULT_RELATIONSHIP = "보호자"      # 프로필은 있는데 relationship 이 비어 있을 때
+NO_PROFILE_RELATIONSHIP = "어르신"   # 프로필 문서가 없을 때
+
+_writes = metrics.registry.counter("firestore_writes_total", "Firestore 쓰기 연산 수")
+_commits = metrics.registry.counter("firestore_commits_total", "Firestore batch 커밋 수")
+
+_MISSING = object()
+
+
+def relationship_from_profile(profile) -> str:
+    if profile is None:
+        return NO_PROFILE_RELATIONSHIP
+    return profile.get("relationship", DEFAULT_RELATIONSHIP)
+
+
+def _page_size(page_size: int) -> int:
+    return max(1, min(int(page_size or HISTORY_PAGE_SIZE), HISTORY_MAX_PAGE_SIZE))
+
+
+class DocumentCache:
+    """ 문서 경로 → (만료 시각, 데이터). 없는 문서도 None 으로 캐시 (프로필 없는 사용자) """
+
+    def __init__(self, ttl: float = REPOSITORY_CACHE_TTL):
+        self.ttl = ttl
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, path: str):
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None or entry[0] < time.monotonic():
+                self.misses += 1
+                return _MISSING
+            self.hits += 1
+            return entry[1]
+
+    def put(self, path: str, data):
+        with self._lock:
+            self._entries[path] = (time.monotonic() + self.ttl, data)
+
+    def invalidate(self, path: str):
+        with self._lock:
+            self._entries.pop(path, None)
+
+    def stats(self) -> dict:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
+
+
+class WriteBatcher:
+    """ set 을 잠깐 모았다가 batch.commit 한 번으로 (호출한 쪽은 자기 쓰기가 커밋될 때까지 대기)
+        묶음 커밋이 실패하면 연산마다 따로 다시 커밋해서 호출자마다 자기 결과(성공 / 예외)를 받는다 """
+
+    def __init__(self, db, flush_interval: float = REPOSITORY_FLUSH_MS / 1000.0, max_ops: int = FIRESTORE_BATCH_LIMIT):
+        self.db = db
+        self.flush_interval = flush_interval
+        self.max_ops = max_ops
+        self._pending = []
+        self._timer = None
+        self._tasks = set()
+
+    def _spawn(self, coro):
+        task = asyncio.create_task(coro)
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+        return task
+
+    async def set(self, ref, data: dict, merge: bool = False) -> str:
+        future = asyncio.get_running_loop().create_future()
+        self._pending.append((ref, data, merge, future))
+        if len(self._pending) >= self.max_ops:
+            self._spawn(self.flush())
+        elif self._timer is None:
+            self._timer = self._spawn(self._flush_later())
+        return await future
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_interval)
+        self._timer = None
+        await self.flush()
+
+    async def _commit(self, ops: list):
+        batch = self.db.batch()
+        for ref, data, merge, _ in ops:
+            batch.set(ref, data, merge=merge)
+        with metrics.span("firestore.commit", ops=len(ops)):
+            await pool.io_pool.run(batch.commit)
+        _commits.inc()
+        _writes.inc(len(ops))
+
+    async def _commit_one(self, op):
+        ref, _, _, future = op
+        try:
+            await self._commit([op])
+        except Exception as e:
+            if not future.done():
+                future.set_exception(e)
+            return
+        if not future.done():
+            future.set_result(ref.id)
+
+    async def flush(self):
+        while self._pending:
+            ops, self._pending = self._pending[:self.max_ops], self._pending[self.max_ops:]
+            try:
+                await self._commit(ops)
+            except Exception as e:
+                if len(ops) > 1:
+                    # 다른 호출자의 연산 하나 때문에 묶음 전체가 실패했을 수 있으니 하나씩 다시 커밋
+                    print(f"⚠️ Firestore 묶음 커밋 실패 ({len(ops)}개) → 개별 커밋으로 재시도:", type(e).__name__, e)
+                    await asyncio.gather(*(self._commit_one(op) for op in ops))
+                    continue
+                future = ops[0][3]
+                if not future.done():
+                    future.set_exception(e)
+                continue
+            for ref, _, _, future in ops:
+                if not future.done():
+                    future.set_result(ref.id)
+
+    async def close(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        await self.flush()
+
+
+class FirestoreRepository:
+    def __init__(self, db, ttl: float = REPOSITORY_CACHE_TTL, listen: bool = REPOSITORY_LISTEN,
+                 max_listeners: int = REPOSITORY_MAX_LISTENERS):
+        self.db = db
+        self.cache = DocumentCache(ttl)
+        self.writer = WriteBatcher(db)
+        self.listen = listen
+        self.max_listeners = max_listeners
+        self._watches = OrderedDict()    # 경로 → on_snapshot watch (오래된 것부터 해제)
+        self._watch_lock = threading.Lock()
+
+    # ---------- 참조 ----------
+
+    def _guardian_ref(self, uid: str):
+        return self.db.collection("guardians").document(uid)
+
+    def _profile_ref(self, uid: str):
+        return self.db.collection("users").document(uid).collection("profile").document("info")
+
+    def _reminders(self, uid: str):
+        return self.db.collection("users").document(uid).collection("reminders")
+
+    # ---------- 캐시된 문서 읽기 ----------
+
+    def _watch(self, path: str, ref):
+        """ 문서가 바뀌면 (다른 인스턴스 / 콘솔 수정 포함) 캐시를 새 값으로 교체 """
+        if not self.listen or not hasattr(ref, "on_snapshot"):
+            return
+        with self._watch_lock:
+            if path in self._watches:
+                self._watches.move_to_end(path)
+                return
+
+            def on_change(snapshots, changes, read_time):
+                for snapshot in snapshots:
+                    self.cache.put(path, snapshot.to_dict() if snapshot.exists else None)
+
+            try:
+                self._watches[path] = ref.on_snapshot(on_change)
+            except Exception as e:
+                print("⚠️ Firestore 리스너 등록 실패 (TTL 캐시만 사용):", path, e)
+                return
+            while len(self._watches) > self.max_listeners:
+                _, watch = self._watches.popitem(last=False)
+                watch.unsubscribe()
+
+    def _get_cached(self, path: str, ref):
+        data = self.cache.get(path)
+        if data is not _MISSING:
+            metrics.record_cache("firestore", "hit")
+            return data
+        metrics.record_cache("firestore", "miss")
+        with metrics.span("firestore.read", kind=path.split("/", 1)[0]):
+            snapshot = ref.get()
+        data = snapshot.to_dict() if snapshot.exists else None
+        self.cache.put(path, data)
+        self._watch(path, ref)
+        return data
+
+    def get_guardian(self, uid: str):
+        return self._get_cached(f"guardians/{uid}", self._guardian_ref(uid))
+
+    def get_profile(self, uid: str):
+        return self._get_cached(f"users/{uid}/profile/info", self._profile_ref(uid))
+
+    def relationship(self, uid: str) -> str:
+        return relationship_from_profile(self.get_profile(uid))
+
+    def invalidate_guardian(self, uid: str):
+        self.cache.invalidate(f"guardians/{uid}")
+
+    # ---------- 쓰기 (WriteBatcher) ----------
+
+    async def set_guardian(self, uid: str, fields: dict):
+        """ guardians/{uid} 병합 저장 (voiceId / voiceFingerprint) """
+        await self.writer.set(self._guardian_ref(uid), fields, merge=True)
+        self.invalidate_guardian(uid)
+
+    async def add_reminder(self, uid: str, data: dict, doc_id: str = None) -> str:
+        """ doc_id 를 주면 그 id 로 저장 (같은 작업을 다시 실행해도 문서가 하나) """
+        return await self.writer.set(self._reminders(uid).document(doc_id), data)
+
+    async def add_reminders(self, uid: str, docs: list) -> list:
+        reminders = self._reminders(uid)
+        return list(await asyncio.gather(*[self.writer.set(reminders.document(), d) for d in docs]))
+
+    # ---------- 기록 조회 ----------
+
+    def list_reminders(self, uid: str, page_size: int = HISTORY_PAGE_SIZE, cursor: str = None, **filters):
+        """ 최근 것부터 page_size 개 → (문서 목록, 다음 커서 | None). filters 는 필드 == 값 조건 """
+        size = _page_size(page_size)
+        query = self._reminders(uid)
+        for field, value in filters.items():
+            query = query.where(field, "==", value)
+        query = query.order_by("created_at", direction=DESCENDING)
+        if cursor:
+            last = self._reminders(uid).document(cursor).get()
+            if last.exists:
+                query = query.start_after(last)
+        with metrics.span("firestore.read", kind="reminders"):
+            docs = list(query.limit(size + 1).stream())
+        items = [{**(doc.to_dict() or {}), "reminder_doc_id": doc.id} for doc in docs[:size]]
+        next_cursor = docs[size - 1].id if len(docs) > size else None
+        return items, next_cursor
+
+    # ---------- 기타 ----------
+
+    def stats(self) -> dict:
+        return {"backend": "firestore", "cache": self.cache.stats(), "listeners": len(self._watches)}
+
+    async def close(self):
+        await self.writer.close()
+        with self._watch_lock:
+            watches, self._watches = list(self._watches.values()), OrderedDict()
+        for watch in watches:
+            try:
+                watch.unsubscribe()
+            except Exception:
+                pass
+
+
+class InMemoryRepository:
+    """ FirestoreRepository 와 같은 메서드, 데이터는 프로세스 메모리 (오프라인 테스트 / 벤치마크용) """
+
+    def __init__(self):
+        self.guardians = {}
+        self.profiles = {}
+        self.reminders = {}      # uid → OrderedDict(doc_id → data), 추가된 순서 = created_at 순서
+        self._lock = threading.Lock()
+        self.writes = 0
+
+    @staticmethod
+    def _resolve(data: dict) -> dict:
+        # firestore.SERVER_TIMESTAMP 같은 sentinel 은 현재 시각으로
+        return {k: time.time() if type(v).__name__ == "Sentinel" else v for k, v in data.items()}
+
+    def get_guardian(self, uid: str):
+        with self._lock:
+            data = self.guardians.get(uid)
+        return dict(data) if data is not None else None
+
+    def get_profile(self, uid: str):
+        with self._lock:
+            data = self.profiles.get(uid)
+        return dict(data) if data is not None else None
+
+    def relationship(self, uid: str) -> str:
+        return relationship_from_profile(self.get_profile(uid))
+
+    def invalidate_guardian(self, uid: str):
+        pass
+
+    async def set_guardian(self, uid: str, fields: dict):
+        with self._lock:
+            self.guardians.setdefault(uid, {}).update(self._resolve(fields))
+            self.writes += 1
+
+    async def add_reminder(self, uid: str, data: dict, doc_id: str = None) -> str:
+        doc_id = doc_id or uuid4().hex[:20]
+        with self._lock:
+            self.reminders.setdefault(uid, OrderedDict())[doc_id] = self._resolve(data)
+            self.writes += 1
+        return doc_id
+
+    async def add_reminders(self, uid: str, docs: list) -> list:
+        return [await self.add_reminder(uid, d) for d in docs]
+
+    def list_reminders(self, uid: str, page_size: int = HISTORY_PAGE_SIZE, cursor: str = None, **filters):
+        size = _page_size(page_size)
+        with self._lock:
+            rows = [(doc_id, dict(data)) for doc_id, data in reversed(self.reminders.get(uid, {}).items())
+                    if all(data.get(k) == v for k, v in filters.items())]
+        if cursor:
+            ids = [doc_id for doc_id, _ in rows]
+            rows = rows[ids.index(cursor) + 1:] if cursor in ids else rows
+        items = [{**data, "reminder_doc_id": doc_id} for doc_id, data in rows[:size]]
+        next_cursor = rows[size - 1][0] if len(rows) > size else None
+        return items, next_cursor
+
+    def stats(self) -> dict:
+        return {"backend": "memory", "guardians": len(self.guardians), "writes": self.writes,
+                "reminders": sum(len(v) for v in self.reminders.values())}
+
+    async def close(self):
+        pass
+
+
+def make_repository(db=None, backend: str = REPOSITORY_BACKEND):
+    if backend == "memory":
+        print("✅ 데이터 저장소: 메모리 (REPOSITORY_BACKEND=memory)")
+        return InMemoryRepository()
+    return FirestoreRepository(db)
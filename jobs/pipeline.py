@@ -0,0 +1,232 @@
+# jobs/pipeline.py
+# ✅ 단계별 작업 파이프라인 (preprocess → clone → generate → synthesize → publish)
+# - 제출 즉시 job_id 반환, 백그라운드 워커가 단계를 순서대로 실행
+# - 각 단계 결과는 job.context / blob 으로 저장 → 재시도 시 끝난 단계는 건너뜀
+# - 여러 워커가 같은 저장소를 보므로 임대(claim)를 잡은 워커만 실행, 임대가 만료된 작업은 다른 워커가 이어받음
+import asyncio
+import os
+import socket
+import time
+import traceback
+from uuid import uuid4
+
+from fastapi import HTTPException
+
+from core import metrics, pool
+from jobs.store import STATUS_QUEUED, STATUS_RUNNING, STATUS_DONE, STATUS_FAILED
+
+STAGES = ["preprocess", "clone", "generate", "synthesize", "publish"]
+
+JOB_WORKERS = int(os.getenv("JOB_WORKERS", "2"))
+JOB_STAGE_MAX_ATTEMPTS = int(os.getenv("JOB_STAGE_MAX_ATTEMPTS", "3"))
+JOB_RETRY_BASE_SECONDS = float(os.getenv("JOB_RETRY_BASE_SECONDS", "2"))
+JOB_RETRY_MAX_SECONDS = float(os.getenv("JOB_RETRY_MAX_SECONDS", "60"))
+# 단계를 시작할 때마다 연장. 워커가 죽으면 이 시간 뒤에 다른 워커가 이어받는다
+JOB_LEASE_SECONDS = float(os.getenv("JOB_LEASE_SECONDS", "600"))
+# 임대가 빈(만료된) 미완료 작업을 찾아 큐에 넣는 주기
+JOB_RECOVER_INTERVAL_SECONDS = float(os.getenv("JOB_RECOVER_INTERVAL_SECONDS", "60"))
+
+
+class StageContext:
+    """ 단계 핸들러에 넘기는 작업 정보 (context 는 JSON 으로 저장 가능한 값만) """
+
+    def __init__(self, pipeline, job: dict):
+        self.pipeline = pipeline
+        self.job_id = job["job_id"]
+        self.data = job["context"]
+
+    async def put_blob(self, name: str, data: bytes):
+        await pool.io_pool.run(self.pipeline.store.put_blob, self.job_id, name, data)
+
+    async def get_blob(self, name: str):
+        return await pool.io_pool.run(self.pipeline.store.get_blob, self.job_id, name)
+
+
+class JobPipeline:
+    def __init__(self, store, handlers: dict, kind: str = "generate-and-read",
+                 workers: int = JOB_WORKERS, max_attempts: int = JOB_STAGE_MAX_ATTEMPTS):
+        """ handlers: {stage: async fn(StageContext) -> dict(context 에 병합할 값)}
+            store 는 None 으로 두고 start(store) 에서 넘겨도 된다 (lifespan 에서 생성) """
+        missing = [s for s in STAGES if s not in handlers]
+        if missing:
+            raise ValueError(f"단계 핸들러 누락: {missing}")
+        self.store = store
+        self.handlers = handlers
+        self.kind = kind
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:6]}"
+        self._queue = asyncio.Queue()
+        self._tasks = []
+        self._active = set()   # 이 프로세스에서 실행 중인 job_id (큐에 중복으로 들어가도 한 번만)
+
+    async def start(self, store=None):
+        if store is not None:
+            self.store = store
+        for i in range(self.workers):
+            self._tasks.append(asyncio.create_task(self._worker(i)))
+        # 재시작 전에 끝나지 않은 작업 / 죽은 워커가 잡고 있던 작업을 주기적으로 다시 큐에 넣기
+        self._tasks.append(asyncio.create_task(self._recover_loop()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, payload: dict, blobs: dict = None) -> dict:
+        job = await pool.io_pool.run(self.store.create, self.kind, payload)
+        await asyncio.gather(*(
+            pool.io_pool.run(self.store.put_blob, job["job_id"], name, data)
+            for name, data in (blobs or {}).items()
+        ))
+        self._queue.put_nowait(job["job_id"])
+        return job
+
+    async def retry(self, job_id: str):
+        """ 실패한 작업을 실패한 단계부터 다시 실행 """
+        job = await pool.io_pool.run(self.store.get, job_id)
+        if job is None:
+            return None
+        if job["status"] != STATUS_FAILED:
+            return job
+        job = await pool.io_pool.run(self.store.update, job_id, status=STATUS_QUEUED, error=None,
+                                     error_status=None, retry_after=None, attempts={})
+        self._queue.put_nowait(job_id)
+        return job
+
+    async def recover(self) -> int:
+        """ 임대가 비었거나 만료된 미완료 작업을 큐에 넣는다 (실제로 누가 실행할지는 claim 이 정함) """
+        now = time.time()
+        count = 0
+        for job in await pool.io_pool.run(self.store.list_unfinished):
+            if job.get("kind") != self.kind or job["job_id"] in self._active:
+                continue
+            if job.get("lease_owner") and job.get("lease_expires", 0) > now:
+                continue
+            self._queue.put_nowait(job["job_id"])
+            count += 1
+        return count
+
+    async def _recover_loop(self):
+        while True:
+            try:
+                await self.recover()
+            except Exception:
+                traceback.print_exc()
+            await asyncio.sleep(JOB_RECOVER_INTERVAL_SECONDS)
+
+    async def _worker(self, index: int):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                await self._run(job_id)
+            except Exception:
+                traceback.print_exc()
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job_id: str):
+        if job_id in self._active:
+            return
+        self._active.add(job_id)
+        try:
+            job = await pool.io_pool.run(self.store.claim, job_id, self.owner, JOB_LEASE_SECONDS)
+            if job is None:
+                return   # 이미 끝났거나 다른 워커가 실행 중
+            try:
+                await self._run_stages(job)
+            finally:
+                await pool.io_pool.run(self.store.release, job_id, self.owner)
+        finally:
+            self._active.discard(job_id)
+
+    async def _run_stages(self, job: dict):
+        job_id = job["job_id"]
+        for stage in STAGES:
+            if stage in job["completed_stages"]:
+                continue
+            # 단계마다 임대 연장 (그 사이 만료돼 다른 워커가 가져갔으면 여기서 손을 뗀다)
+            if await pool.io_pool.run(self.store.claim, job_id, self.owner, JOB_LEASE_SECONDS) is None:
+                print(f"⚠️ 작업 임대를 잃어 중단 (job_id: {job_id}, stage: {stage})")
+                return
+            job = await pool.io_pool.run(self.store.update, job_id, status=STATUS_RUNNING, stage=stage)
+            ctx = StageContext(self, job)
+            attempts = dict(job.get("attempts") or {})
+
+            while True:
+                attempts[stage] = attempts.get(stage, 0) + 1
+                try:
+                    with metrics.span(f"job.{stage}"):
+                        output = await self.handlers[stage](ctx) or {}
+                    break
+                except Exception as e:
+                    traceback.print_exc()
+                    if attempts[stage] >= self.max_attempts or not _is_retryable(e):
+                        await pool.io_pool.run(
+                            self.store.update, job_id,
+                            status=STATUS_FAILED, attempts=attempts, **_failure_fields(stage, e),
+                        )
+                        print(f"❌ 작업 실패 (job_id: {job_id}, stage: {stage}):", e)
+                        return
+                    await asyncio.sleep(_retry_delay(e, attempts[stage]))
+
+            context = dict(job["context"])
+            context.update(output)
+            job = await pool.io_pool.run(
+                self.store.update, job_id,
+                context=context, attempts=attempts,
+                completed_stages=job["completed_stages"] + [stage],
+            )
+            print(f"✅ 작업 단계 완료 (job_id: {job_id}, stage: {stage})")
+
+        await pool.io_pool.run(self.store.update, job_id, status=STATUS_DONE, stage=None)
+        await pool.io_pool.run(self.store.delete_blobs, job_id)
+
+
+def _is_retryable(error: Exception) -> bool:
+    # 입력 자체가 잘못된 경우(디코딩 실패, 파싱 실패 등 ValueError)는 재시도해도 소용없음
+    # 4xx(보호자별 한도 429 등)는 호출한 쪽이 Retry-After 를 보고 판단하도록 바로 실패 처리
+    # 5xx 는 일시적 (입장 제어 / 풀 포화 503 포함) → Retry-After 를 지켜 재시도
+    if isinstance(error, HTTPException):
+        return error.status_code >= 500
+    return not isinstance(error, ValueError)
+
+
+def _retry_delay(error: Exception, attempt: int) -> float:
+    """ 지수 백오프, 서버가 Retry-After 를 줬으면 그보다 일찍 다시 시도하지 않음 """
+    delay = min(JOB_RETRY_BASE_SECONDS * (2 ** (attempt - 1)), JOB_RETRY_MAX_SECONDS)
+    headers = getattr(error, "headers", None) or {}
+    if "Retry-After" in headers:
+        try:
+            delay = max(delay, float(headers["Retry-After"]))
+        except ValueError:
+            pass
+    return delay
+
+
+def _failure_fields(stage: str, error: Exception) -> dict:
+    if isinstance(error, HTTPException):
+        headers = error.headers or {}
+        return {
+            "error": f"{stage}: {error.detail}",
+            "error_status": error.status_code,
+            "retry_after": int(headers["Retry-After"]) if "Retry-After" in headers else None,
+        }
+    return {"error": f"{stage}: {error}"}
+
+
+def job_status(job: dict) -> dict:
+    """ GET /jobs/{id} 응답 형식 """
+    completed = job.get("completed_stages", [])
+    return {
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "stage": job.get("stage"),
+        "completed_stages": completed,
+        "progress": round(len(completed) / len(STAGES), 2),
+        "result": job["context"].get("result") if job["status"] == STATUS_DONE else None,
+        "error": job.get("error"),
+        "error_status": job.get("error_status"),     # 429 / 503 등 (HTTP 오류로 실패한 단계)
+        "retry_after": job.get("retry_after"),
+    }
@@ -0,0 +1,265 @@
+# jobs/prefetch.py
+# ✅ 환자별 "다음 회상 문장" 미리 만들어 두기
+# - users/{uid}/reminders 중 prefetched=True, played=False 인 문서 수를 큐 깊이로 본다
+# - 한가한 시간대(PREFETCH_OFFPEAK_HOURS, PREFETCH_TIMEZONE 기준)에 TopicEnum 을 돌아가며 목표 깊이까지 생성 + TTS
+# - 세션 시작 시에는 준비된 문서 하나만 읽어서 바로 내려준다 (update_time 전제조건으로 한 번만 꺼냄)
+# - 프리페치 대상은 켜 둔 사용자(prefetch/{uid}.enabled)만. 주기마다 이 컬렉션 한 번만 조회해서 다시 읽는다
+# - 워커가 여러 개여도 한 사용자는 한 워커만 채운다: 채우기 전에 prefetch/{uid} 에 lease(소유자 + 만료 시각)를 잡음
+import asyncio
+import os
+import random
+import socket
+import time
+import traceback
+from datetime import datetime
+from uuid import uuid4
+from zoneinfo import ZoneInfo
+
+from firebase_admin import firestore
+from google.api_core.exceptions import FailedPrecondition
+
+from core import pool
+from enums import TopicEnum
+
+PREFETCH_TARGET_DEPTH = int(os.getenv("PREFETCH_TARGET_DEPTH", "5"))
+PREFETCH_INTERVAL_SECONDS = float(os.getenv("PREFETCH_INTERVAL_SECONDS", "600"))
+PREFETCH_OFFPEAK_HOURS = os.getenv("PREFETCH_OFFPEAK_HOURS", "1-6")   # PREFETCH_TIMEZONE 시각, "시작-끝"
+PREFETCH_TIMEZONE = os.getenv("PREFETCH_TIMEZONE", "Asia/Seoul")
+PREFETCH_LEASE_SECONDS = float(os.getenv("PREFETCH_LEASE_SECONDS", "900"))   # 한 사용자 채우기 최대 시간
+PREFETCH_SOURCE_LIMIT = 20
+PREFETCH_CLAIM_ATTEMPTS = 3     # 동시에 꺼내다 밀렸을 때 다시 조회하는 횟수
+PREFETCH_CLAIM_CANDIDATES = 5   # 조회 한 번에 후보로 읽는 문서 수
+
+
+def _local_hour(timezone: str = PREFETCH_TIMEZONE) -> int:
+    """ 컨테이너 시간대와 상관없이 지정한 시간대의 현재 시각(시) """
+    return datetime.now(ZoneInfo(timezone)).hour
+
+
+def _in_offpeak(hour: int, window: str = PREFETCH_OFFPEAK_HOURS) -> bool:
+    if not window:
+        return True
+    start, end = (int(x) for x in window.split("-"))
+    if start <= end:
+        return start <= hour < end
+    return hour >= start or hour < end   # 자정을 넘기는 구간 (예: 22-5)
+
+
+class PrefetchScheduler:
+    def __init__(self, db, generate, synthesize, current_voice_id, repository,
+                 target_depth: int = PREFETCH_TARGET_DEPTH, interval: float = PREFETCH_INTERVAL_SECONDS):
+        """
+        generate(uid, description, relation) -> ReminderResult      (async)
+        synthesize(text, voice_id) -> url                           (async)
+        current_voice_id(uid) -> voice_id | None                    (blocking)
+        repository: 프로필 캐시 / 묶음 쓰기 (firebase/repository.py)
+        """
+        self.db = db
+        self.repository = repository
+        self.generate = generate
+        self.synthesize = synthesize
+        self.current_voice_id = current_voice_id
+        self.target_depth = target_depth
+        self.interval = interval
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:6]}"
+        self._users = set()
+        self._topic_cursor = {}
+        self._task = None
+        self.generated = 0
+
+    def _reminders(self, uid: str):
+        return self.db.collection("users").document(uid).collection("reminders")
+
+    def _settings(self, uid: str):
+        return self.db.collection("prefetch").document(uid)
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    # ---------- 대상 / lease (블로킹, io_pool 에서 실행) ----------
+
+    def set_enabled(self, uid: str, enabled: bool = True):
+        """ 사용자별 프리페치 켜기 / 끄기 (prefetch/{uid}) """
+        self._settings(uid).set({"enabled": enabled, "updated_at": firestore.SERVER_TIMESTAMP}, merge=True)
+        if enabled:
+            self._users.add(uid)
+        else:
+            self._users.discard(uid)
+
+    def load_users(self) -> int:
+        """ 프리페치를 켜 둔 사용자 목록을 다시 읽는다 (쿼리 한 번, 다른 워커에서 켠 사용자 / 재시작 후 복원) """
+        self._users = {doc.id for doc in self.db.collection("prefetch").where("enabled", "==", True).stream()}
+        return len(self._users)
+
+    def claim(self, uid: str) -> bool:
+        """ 이 워커가 uid 를 채우도록 lease 를 잡는다. 꺼져 있거나 다른 채우기가 진행 중이면 False
+            읽을 때의 update_time 을 전제조건으로 써서, 동시에 잡으려던 쪽은 FailedPrecondition 으로 빠진다 """
+        ref = self._settings(uid)
+        snapshot = ref.get()
+        data = snapshot.to_dict() if snapshot.exists else None
+        if not data or not data.get("enabled"):
+            return False
+        now = time.time()
+        if data.get("lease_owner") and (data.get("lease_expires") or 0) > now:
+            return False
+        try:
+            ref.update({"lease_owner": self.owner, "lease_expires": now + PREFETCH_LEASE_SECONDS},
+                       option=self.db.write_option(last_update_time=snapshot.update_time))
+        except FailedPrecondition:
+            return False
+        return True
+
+    def release(self, uid: str):
+        ref = self._settings(uid)
+        snapshot = ref.get()
+        if not snapshot.exists or (snapshot.to_dict() or {}).get("lease_owner") != self.owner:
+            return
+        try:
+            ref.update({"lease_owner": None, "lease_expires": 0},
+                       option=self.db.write_option(last_update_time=snapshot.update_time))
+        except FailedPrecondition:
+            pass
+
+    async def _loop(self):
+        try:
+            print(f"✅ 프리페치 대상: {await pool.io_pool.run(self.load_users)}명")
+        except Exception:
+            traceback.print_exc()
+        while True:
+            await asyncio.sleep(self.interval)
+            if not _in_offpeak(_local_hour()):
+                continue
+            try:
+                await pool.io_pool.run(self.load_users)
+            except Exception:
+                traceback.print_exc()
+                continue
+            for uid in list(self._users):
+                try:
+                    await self.fill(uid)
+                except Exception:
+                    traceback.print_exc()
+
+    # ---------- 블로킹 Firestore 헬퍼 (io_pool 에서 실행) ----------
+
+    def queue_depth(self, uid: str) -> int:
+        query = self._reminders(uid).where("prefetched", "==", True).where("played", "==", False)
+        try:
+            return int(query.count().get()[0][0].value)
+        except AttributeError:
+            # count() 집계를 지원하지 않는 SDK 버전
+            return sum(1 for _ in query.stream())
+
+    def _source_descriptions(self, uid: str, topic: TopicEnum) -> list:
+        """ 예전에 보호자가 입력한 같은 주제의 설명들 (생성 엔드포인트가 reminder 문서에 topic / photo_description 저장)
+            프리페치 문서도 원래 설명을 그대로 갖고 있어서 함께 쓰고, 같은 설명은 한 번만 """
+        docs = (self._reminders(uid)
+                .where("topic", "==", topic.value)
+                .limit(PREFETCH_SOURCE_LIMIT)
+                .stream())
+        descriptions = {}
+        for doc in docs:
+            data = doc.to_dict() or {}
+            if data.get("photo_description"):
+                descriptions.setdefault(data["photo_description"], data.get("relationship", ""))
+        return list(descriptions.items())
+
+    def pop_next(self, uid: str):
+        """ 준비된 회상 문장 하나를 읽고 재생 처리
+            읽을 때의 update_time 을 전제조건으로 played=True 를 쓰므로, 동시에 들어온 다른 요청이 먼저 꺼낸 문서는
+            FailedPrecondition 으로 실패하고 다음 후보로 넘어간다 (같은 문장을 두 번 내려주지 않음) """
+        query = (self._reminders(uid)
+                 .where("prefetched", "==", True)
+                 .where("played", "==", False)
+                 .order_by("created_at")
+                 .limit(PREFETCH_CLAIM_CANDIDATES))
+        for _ in range(PREFETCH_CLAIM_ATTEMPTS):
+            docs = list(query.stream())
+            if not docs:
+                return None
+            for doc in docs:
+                try:
+                    doc.reference.update({"played": True, "played_at": firestore.SERVER_TIMESTAMP},
+                                         option=self.db.write_option(last_update_time=doc.update_time))
+                except FailedPrecondition:
+                    continue
+                data = doc.to_dict()
+                data["reminder_doc_id"] = doc.id
+                return data
+        return None
+
+    # ---------- 비동기 ----------
+
+    def _next_topics(self, uid: str):
+        topics = list(TopicEnum)
+        start = self._topic_cursor.get(uid, 0)
+        return [topics[(start + i) % len(topics)] for i in range(len(topics))]
+
+    async def fill(self, uid: str) -> int:
+        """ lease 를 잡은 경우에만, 큐 깊이가 목표에 도달할 때까지 생성. 생성한 개수 반환 """
+        if not await pool.io_pool.run(self.claim, uid):
+            return 0
+        try:
+            return await self._fill(uid)
+        finally:
+            await pool.io_pool.run(self.release, uid)
+
+    async def _fill(self, uid: str) -> int:
+        depth = await pool.io_pool.run(self.queue_depth, uid)
+        missing = self.target_depth - depth
+        if missing <= 0:
+            return 0
+
+        voice_id = await pool.io_pool.run(self.current_voice_id, uid)
+        created = 0
+        attempts = 0
+        topics = self._next_topics(uid)
+        while created < missing and attempts < len(topics) * 2:
+            topic = topics[attempts % len(topics)]
+            attempts += 1
+            sources = await pool.io_pool.run(self._source_descriptions, uid, topic)
+            if not sources:
+                continue
+            description, relationship = random.choice(sources)
+            if not relationship:
+                relationship = await pool.io_pool.run(self.repository.relationship, uid)
+
+            result = await self.generate(uid, description, relationship)
+            doc_data = {
+                "topic": topic.value,
+                "photo_description": description,
+                "relationship": relationship,
+                "reminder_text": result.reminder_text,
+                "quiz_question": result.quiz_question,
+                "quiz_options": result.quiz_options,
+                "quiz_answer": result.answer_text,
+                "quiz_answer_index": result.answer_index,
+                "prefetched": True,
+                "played": False,
+                "created_at": firestore.SERVER_TIMESTAMP,
+            }
+            if voice_id:
+                doc_data["tts_url"], doc_data["quiz_tts_url"] = await asyncio.gather(
+                    self.synthesize(result.reminder_text, voice_id),
+                    self.synthesize(result.quiz_speech_text(), voice_id),
+                )
+                doc_data["voice_id"] = voice_id
+            await self.repository.add_reminder(uid, doc_data)
+            created += 1
+            self._topic_cursor[uid] = (self._topic_cursor.get(uid, 0) + 1) % len(TopicEnum)
+
+        self.generated += created
+        if created:
+            print(f"✅ 프리페치 {created}개 생성 (uid: {uid}, 큐 깊이: {depth + created})")
+        return created
+
+    def stats(self) -> dict:
+        return {"tracked_users": len(self._users), "generated": self.generated, "target_depth": self.target_depth}
+
@@ -0,0 +1,246 @@
+# jobs/store.py
+# ✅ 작업(job) 상태 저장소
+# - SQLiteJobStore: 로컬/오프라인 테스트용 (기본값)
+# - FirestoreJobStore: jobs/{job_id} 문서 + core.storage 의 jobs/{job_id}/ 에 바이너리
+# 모든 메서드는 블로킹이므로 호출하는 쪽에서 io_pool 로 실행한다.
+# 여러 워커(프로세스/인스턴스)가 같은 저장소를 보므로 실행 전에 claim() 으로 임대(lease_owner + lease_expires)를 잡는다.
+# 저장소는 import 시점이 아니라 앱 lifespan 에서 만든다 (main 을 import 만 하는 도구 / 테스트는 파일을 만들지 않음).
+import json
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from uuid import uuid4
+
+from core.storage import BINARY, CACHE_PRIVATE
+
+JOB_STORE = os.getenv("JOB_STORE", "sqlite")
+# 작업 디렉터리가 읽기 전용이어도 되도록 기본값은 임시 디렉터리 (재부팅 후에도 유지하려면 경로 지정 또는 JOB_STORE=firestore)
+JOB_SQLITE_PATH = os.getenv("JOB_SQLITE_PATH", os.path.join(tempfile.gettempdir(), "jobs.sqlite3"))
+
+STATUS_QUEUED = "queued"
+STATUS_RUNNING = "running"
+STATUS_DONE = "done"
+STATUS_FAILED = "failed"
+
+
+def _claimable(job: dict, owner: str, now: float) -> bool:
+    """ 끝나지 않았고, 임대가 비었거나 만료됐거나 내 것이면 가져갈 수 있음 """
+    if job["status"] not in (STATUS_QUEUED, STATUS_RUNNING):
+        return False
+    lease_owner = job.get("lease_owner")
+    return not lease_owner or lease_owner == owner or job.get("lease_expires", 0) <= now
+
+
+def new_job(kind: str, payload: dict) -> dict:
+    now = time.time()
+    return {
+        "job_id": uuid4().hex,
+        "kind": kind,
+        "status": STATUS_QUEUED,
+        "stage": None,
+        "completed_stages": [],
+        "context": dict(payload),
+        "error": None,
+        "attempts": {},
+        "lease_owner": None,
+        "lease_expires": 0,
+        "created_at": now,
+        "updated_at": now,
+    }
+
+
+class SQLiteJobStore:
+    def __init__(self, path: str = JOB_SQLITE_PATH):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " job_id TEXT PRIMARY KEY, status TEXT NOT NULL, data TEXT NOT NULL, updated_at REAL NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS job_blobs ("
+            " job_id TEXT NOT NULL, name TEXT NOT NULL, data BLOB NOT NULL, PRIMARY KEY (job_id, name))"
+        )
+        self._conn.commit()
+
+    def create(self, kind: str, payload: dict) -> dict:
+        job = new_job(kind, payload)
+        with self._lock:
+            self._conn.execute(
+                "INSERT INTO jobs (job_id, status, data, updated_at) VALUES (?, ?, ?, ?)",
+                (job["job_id"], job["status"], json.dumps(job, ensure_ascii=False), job["updated_at"]),
+            )
+            self._conn.commit()
+        return job
+
+    def get(self, job_id: str):
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def update(self, job_id: str, **fields) -> dict:
+        with self._lock:
+            row = self._conn.execute("SELECT data FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+            if row is None:
+                raise KeyError(job_id)
+            job = json.loads(row[0])
+            job.update(fields)
+            job["updated_at"] = time.time()
+            self._conn.execute(
+                "UPDATE jobs SET status = ?, data = ?, updated_at = ? WHERE job_id = ?",
+                (job["status"], json.dumps(job, ensure_ascii=False), job["updated_at"], job_id),
+            )
+            self._conn.commit()
+        return job
+
+    def claim(self, job_id: str, owner: str, lease_seconds: float):
+        """ 임대를 잡거나 연장하면 job, 다른 워커가 실행 중이거나 끝난 작업이면 None
+            BEGIN IMMEDIATE 로 쓰기 잠금을 먼저 잡아 같은 파일을 쓰는 다른 프로세스와도 원자적 """
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT data FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+                now = time.time()
+                if row is None or not _claimable(json.loads(row[0]), owner, now):
+                    self._conn.rollback()
+                    return None
+                job = json.loads(row[0])
+                job.update(lease_owner=owner, lease_expires=now + lease_seconds, updated_at=now)
+                self._conn.execute(
+                    "UPDATE jobs SET data = ?, updated_at = ? WHERE job_id = ?",
+                    (json.dumps(job, ensure_ascii=False), now, job_id),
+                )
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+        return job
+
+    def release(self, job_id: str, owner: str):
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = self._conn.execute("SELECT data FROM jobs WHERE job_id = ?", (job_id,)).fetchone()
+                job = json.loads(row[0]) if row else None
+                if job is None or job.get("lease_owner") != owner:
+                    self._conn.rollback()
+                    return
+                job.update(lease_owner=None, lease_expires=0)
+                self._conn.execute("UPDATE jobs SET data = ? WHERE job_id = ?",
+                                   (json.dumps(job, ensure_ascii=False), job_id))
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+
+    def list_unfinished(self) -> list:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT data FROM jobs WHERE status IN (?, ?) ORDER BY updated_at",
+                (STATUS_QUEUED, STATUS_RUNNING),
+            ).fetchall()
+        return [json.loads(r[0]) for r in rows]
+
+    def put_blob(self, job_id: str, name: str, data: bytes):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO job_blobs (job_id, name, data) VALUES (?, ?, ?)",
+                (job_id, name, sqlite3.Binary(data)),
+            )
+            self._conn.commit()
+
+    def get_blob(self, job_id: str, name: str):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT data FROM job_blobs WHERE job_id = ? AND name = ?", (job_id, name)
+            ).fetchone()
+        return bytes(row[0]) if row else None
+
+    def delete_blobs(self, job_id: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM job_blobs WHERE job_id = ?", (job_id,))
+            self._conn.commit()
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class FirestoreJobStore:
+    def __init__(self, db, storage, collection: str = "jobs"):
+        self.db = db
+        self.storage = storage
+        self.collection = collection
+
+    def _ref(self, job_id: str):
+        return self.db.collection(self.collection).document(job_id)
+
+    def create(self, kind: str, payload: dict) -> dict:
+        job = new_job(kind, payload)
+        self._ref(job["job_id"]).set(job)
+        return job
+
+    def get(self, job_id: str):
+        doc = self._ref(job_id).get()
+        return doc.to_dict() if doc.exists else None
+
+    def update(self, job_id: str, **fields) -> dict:
+        fields["updated_at"] = time.time()
+        self._ref(job_id).update(fields)
+        return self.get(job_id)
+
+    def claim(self, job_id: str, owner: str, lease_seconds: float):
+        """ update_time 전제 조건으로 임대를 잡는다 (그 사이 다른 워커가 잡았으면 None) """
+        from google.api_core.exceptions import FailedPrecondition
+
+        ref = self._ref(job_id)
+        snapshot = ref.get()
+        now = time.time()
+        if not snapshot.exists or not _claimable(snapshot.to_dict(), owner, now):
+            return None
+        try:
+            ref.update({"lease_owner": owner, "lease_expires": now + lease_seconds, "updated_at": now},
+                       option=self.db.write_option(last_update_time=snapshot.update_time))
+        except FailedPrecondition:
+            return None
+        return self.get(job_id)
+
+    def release(self, job_id: str, owner: str):
+        from google.api_core.exceptions import FailedPrecondition
+
+        ref = self._ref(job_id)
+        snapshot = ref.get()
+        if not snapshot.exists or (snapshot.to_dict() or {}).get("lease_owner") != owner:
+            return
+        try:
+            ref.update({"lease_owner": None, "lease_expires": 0},
+                       option=self.db.write_option(last_update_time=snapshot.update_time))
+        except FailedPrecondition:
+            pass  # 그 사이 임대가 만료돼 다른 워커가 가져감
+
+    def list_unfinished(self) -> list:
+        docs = self.db.collection(self.collection).where("status", "in", [STATUS_QUEUED, STATUS_RUNNING]).stream()
+        return [d.to_dict() for d in docs]
+
+    def put_blob(self, job_id: str, name: str, data: bytes):
+        # 원본 녹음처럼 큰 파일은 storage 가 resumable 업로드로 올린다
+        self.storage.upload(f"{self.collection}/{job_id}/{name}", data, BINARY, CACHE_PRIVATE)
+
+    def get_blob(self, job_id: str, name: str):
+        return self.storage.download(f"{self.collection}/{job_id}/{name}")
+
+    def delete_blobs(self, job_id: str):
+        self.storage.delete_prefix(f"{self.collection}/{job_id}/")
+
+    def close(self):
+        pass
+
+
+def make_job_store(db=None, storage=None):
+    if JOB_STORE == "firestore":
+        return FirestoreJobStore(db, storage)
+    return SQLiteJobStore()
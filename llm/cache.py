@@ -0,0 +1,171 @@
+# llm/cache.py
+# ✅ generate_reminder 응답 캐시
+# - 1단계: 정규화된 입력(사진 설명/관계/말투/이름)으로 정확히 일치하는 키 조회
+# - 2단계(선택): 임베딩 코사인 유사도로 거의 같은 설명 조회 (NumPy 로컬 인덱스)
+# - 보호자(user) 단위 네임스페이스, TTL, 네임스페이스별 최대 개수 제한
+# - 네임스페이스 수도 LRU 로 제한 (오래 안 쓴 보호자부터 통째로 정리)
+# - 근사 일치 미스면 lookup() 이 계산한 임베딩을 set(embedding=...) 에 넘겨 한 번만 임베딩
+import hashlib
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+
+LLM_CACHE_TTL_SECONDS = float(os.getenv("LLM_CACHE_TTL", str(60 * 60 * 24)))
+LLM_CACHE_MAX_PER_NAMESPACE = int(os.getenv("LLM_CACHE_MAX_PER_NAMESPACE", "256"))
+LLM_CACHE_MAX_NAMESPACES = int(os.getenv("LLM_CACHE_MAX_NAMESPACES", "1024"))
+LLM_SEMANTIC_CACHE = os.getenv("LLM_SEMANTIC_CACHE", "0") == "1"
+LLM_SEMANTIC_THRESHOLD = float(os.getenv("LLM_SEMANTIC_THRESHOLD", "0.97"))
+
+_whitespace = re.compile(r"\s+")
+
+
+def normalize(text: str) -> str:
+    return _whitespace.sub(" ", (text or "").strip()).lower()
+
+
+def exact_key(**fields) -> str:
+    raw = "\x1f".join(f"{k}={normalize(str(v))}" for k, v in sorted(fields.items()))
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class _Namespace:
+    def __init__(self):
+        self.entries = OrderedDict()   # key -> (expires_at, value)
+        self.vector_keys = []          # 임베딩 행 순서대로의 (key, context)
+        self.vectors = None            # (N, D) 정규화된 임베딩
+
+
+class ResponseCache:
+    """ 정확 일치 + (선택) 임베딩 근사 일치 2단 캐시 """
+
+    def __init__(self, embed_fn=None, ttl: float = LLM_CACHE_TTL_SECONDS,
+                 max_per_namespace: int = LLM_CACHE_MAX_PER_NAMESPACE,
+                 max_namespaces: int = LLM_CACHE_MAX_NAMESPACES,
+                 semantic: bool = LLM_SEMANTIC_CACHE, threshold: float = LLM_SEMANTIC_THRESHOLD):
+        self.embed_fn = embed_fn
+        self.ttl = ttl
+        self.max_per_namespace = max_per_namespace
+        self.max_namespaces = max_namespaces
+        self.semantic = semantic and embed_fn is not None
+        self.threshold = threshold
+        self._namespaces = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits_exact = 0
+        self.hits_semantic = 0
+        self.misses = 0
+
+    def _ns(self, namespace: str, create: bool = True):
+        ns = self._namespaces.get(namespace)
+        if ns is None:
+            if not create:
+                return None
+            ns = self._namespaces[namespace] = _Namespace()
+            while len(self._namespaces) > self.max_namespaces:
+                self._namespaces.popitem(last=False)
+        else:
+            self._namespaces.move_to_end(namespace)
+        return ns
+
+    def _embed(self, text: str):
+        vec = np.asarray(self.embed_fn(normalize(text)), dtype=np.float32)
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    def _drop_vector(self, ns: _Namespace, key: str):
+        idx = [i for i, (k, _) in enumerate(ns.vector_keys) if k == key]
+        if not idx or ns.vectors is None:
+            return
+        keep = np.ones(len(ns.vector_keys), dtype=bool)
+        keep[idx] = False
+        ns.vectors = ns.vectors[keep]
+        ns.vector_keys = [vk for i, vk in enumerate(ns.vector_keys) if keep[i]]
+
+    def _get_live(self, ns: _Namespace, key: str, now: float):
+        item = ns.entries.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if expires_at < now:
+            del ns.entries[key]
+            self._drop_vector(ns, key)
+            return None
+        ns.entries.move_to_end(key)
+        return value
+
+    def get(self, namespace: str, semantic_text: str = None, context: str = "", **fields):
+        """ fields 는 정확 일치 키, semantic_text 는 근사 일치에 쓸 본문(사진 설명) """
+        return self.lookup(namespace, semantic_text, context, **fields)[0]
+
+    def lookup(self, namespace: str, semantic_text: str = None, context: str = "", **fields):
+        """ get() + 근사 일치에 쓴 임베딩 → (값 | None, 임베딩 | None). 미스 후 set(embedding=...) 에 넘긴다 """
+        key = exact_key(**fields)
+        now = time.monotonic()
+        with self._lock:
+            ns = self._ns(namespace, create=False)
+            value = self._get_live(ns, key, now) if ns is not None else None
+            if value is not None:
+                self.hits_exact += 1
+                return value, None
+            has_vectors = ns is not None and ns.vectors is not None and len(ns.vector_keys) > 0
+
+        query = None
+        if self.semantic and semantic_text and has_vectors:
+            query = self._embed(semantic_text)
+            with self._lock:
+                ns = self._ns(namespace, create=False)
+                if ns is not None and ns.vectors is not None and len(ns.vector_keys):
+                    scores = ns.vectors @ query
+                    # 관계/말투 등 나머지 입력이 같은 항목만 후보로
+                    for i in np.argsort(-scores):
+                        if scores[i] < self.threshold:
+                            break
+                        cand_key, cand_context = ns.vector_keys[i]
+                        if cand_context != context:
+                            continue
+                        value = self._get_live(ns, cand_key, now)
+                        if value is not None:
+                            self.hits_semantic += 1
+                            return value, query
+
+        with self._lock:
+            self.misses += 1
+        return None, query
+
+    def set(self, namespace: str, value, semantic_text: str = None, context: str = "", embedding=None, **fields):
+        """ embedding: 같은 semantic_text 로 lookup() 이 돌려준 임베딩 (없으면 여기서 계산) """
+        key = exact_key(**fields)
+        vec = None
+        if self.semantic and semantic_text:
+            vec = embedding if embedding is not None else self._embed(semantic_text)
+        with self._lock:
+            ns = self._ns(namespace)
+            if key in ns.entries:
+                self._drop_vector(ns, key)
+            ns.entries[key] = (time.monotonic() + self.ttl, value)
+            ns.entries.move_to_end(key)
+            if vec is not None:
+                row = vec[np.newaxis, :]
+                ns.vectors = row if ns.vectors is None else np.vstack([ns.vectors, row])
+                ns.vector_keys.append((key, context))
+            while len(ns.entries) > self.max_per_namespace:
+                old_key, _ = ns.entries.popitem(last=False)
+                self._drop_vector(ns, old_key)
+
+    def invalidate(self, namespace: str):
+        with self._lock:
+            self._namespaces.pop(namespace, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "hits_exact": self.hits_exact,
+                "hits_semantic": self.hits_semantic,
+                "misses": self.misses,
+                "namespaces": len(self._namespaces),
+                "entries": sum(len(ns.entries) for ns in self._namespaces.values()),
+                "semantic_enabled": self.semantic,
+            }
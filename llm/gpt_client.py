@@ -1,27 +1,80 @@
 import os
-import openai
+import time
 from dotenv import load_dotenv
+from core.resources import resources, LazyProxy
+from core import metrics, pool
 from enums import ToneEnum
 import json
+from dataclasses import asdict
+from llm import prompts
+from llm.cache import ResponseCache
+from llm.parser import ReminderResult, ReminderParseError, parse_reminder, FIELD_LABELS, StreamingSectionParser
+from llm.router import ModelRouter, Route, HEURISTIC
+from llm.terms import extract_nouns
 
 load_dotenv()
-client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+client = LazyProxy(lambda: resources.openai)   # 커넥션 풀 공유, 처음 호출할 때 생성
+async_client = LazyProxy(lambda: resources.openai_async)
+
+EMBEDDING_MODEL = os.getenv("LLM_CACHE_EMBEDDING_MODEL", "text-embedding-3-small")
+
+# ✅ 단일 호출 모드: 용어 추출 + 회상 문장 + 퀴즈를 JSON 스키마 구조화 출력 한 번으로 생성
+#    (LLM_SINGLE_CALL=0 이면 기존 extract_terms → generate 2회 호출 경로 사용)
+LLM_SINGLE_CALL = os.getenv("LLM_SINGLE_CALL", "1") == "1"
+STRUCTURED_MODEL = os.getenv("LLM_STRUCTURED_MODEL", "gpt-4o")
+
+# ✅ 스트리밍 모드: "회상 문장:" 줄이 끝나는 즉시 TTS 를 시작하고, 퀴즈는 계속 생성 (/generate-and-read)
+#    허용 용어를 먼저 뽑아 넣고, 결과가 허용 단어 규칙을 어기면 어긴 항목만 다시 요청
+LLM_STREAMING = os.getenv("LLM_STREAMING", "1") == "1"
+STREAM_MODEL = os.getenv("LLM_STREAM_MODEL", STRUCTURED_MODEL)
+ttft_seconds = metrics.registry.histogram("llm_time_to_first_token_seconds", "스트리밍 LLM 첫 토큰까지 시간(초)")
+
+# ✅ 작업별 모델 (LLM_ROUTES 로 덮어쓰기, llm/router.py 참고)
+# - 용어 추출은 로컬 명사 추출기 먼저, 아무것도 못 뽑으면 작은 모델
+# - 생성은 timeout 안에 응답이 없으면 더 빠른 모델로 폴백
+router = ModelRouter({
+    "extract_terms": Route("extract_terms", [HEURISTIC, "gpt-4o-mini"], timeout=10, hedge_after=3),
+    "generate": Route("generate", ["gpt-4", "gpt-4o"], timeout=45),
+    "generate_structured": Route("generate_structured", [STRUCTURED_MODEL, "gpt-4o-mini"], timeout=30),
+    "generate_stream": Route("generate_stream", [STREAM_MODEL, "gpt-4o-mini"], timeout=30),
+    "repair": Route("repair", ["gpt-4o-mini", "gpt-4o"], timeout=15),
+})
+
+
+def _chat(task: str, messages, local=None, **kwargs):
+    """ 라우터가 고른 모델로 chat.completions.create → (응답, 모델)
+        messages 가 함수면 모델마다 새로 만든다 (프롬프트 토큰 예산이 모델 토크나이저 기준) """
+    def remote(model: str, timeout: float):
+        with metrics.span(f"llm.{task}", model=model):
+            response = client.chat.completions.create(
+                model=model,
+                messages=messages(model) if callable(messages) else messages,
+                timeout=timeout,
+                **kwargs,
+            )
+        return response, getattr(response, "usage", None)
+
+    return router.call(task, remote, local=local)
+
+
+def embed_text(text: str):
+    with metrics.span("llm.embed", model=EMBEDDING_MODEL):
+        response = client.embeddings.create(model=EMBEDDING_MODEL, input=text)
+    router.record_usage("embed", EMBEDDING_MODEL, getattr(response, "usage", None))
+    return response.data[0].embedding
+
+
+# ✅ 같은 보호자가 같은 설명으로 다시 요청하면(재시도 등) LLM 호출 없이 응답 재사용
+reminder_cache = ResponseCache(embed_fn=embed_text)
 
 def extract_terms(photo_description: str):  # ✅ 여기서 매개변수로 photo_description 받음
-    prompt_extract = f"""
-아래 설명에서 등장하는 '인물', '장소', '사물'만 뽑아 JSON 배열로 출력해.
-⚠️ 설명에 실제로 쓰인 단어만 넣어. 새로운 단어나 창작한 내용은 절대 넣지 마.
-⚠️ 반드시 JSON 배열로만 출력해. 다른 설명은 하지 마.
-
-설명: "{photo_description}"
-
-출력 예시:
-["아버지", "바닷가", "모래성"]
-"""
-    response = client.chat.completions.create(
-        model="gpt-4",
-        messages=[{"role": "user", "content": prompt_extract}]
+    response, model = _chat(
+        "extract_terms",
+        messages=[{"role": "user", "content": prompts.EXTRACT_TERMS.render(photo_description=photo_description)}],
+        local=lambda: extract_nouns(photo_description),
     )
+    if model == HEURISTIC:
+        return response
     content = response.choices[0].message.content.strip()
     try:
         allowed_terms = json.loads(content)
@@ -31,139 +84,351 @@ def extract_terms(photo_description: str):  # ✅ 여기서 매개변수로 phot
         allowed_terms = []
     return allowed_terms
 
-def generate_reminder(patient_name: str, photo_description: str, relation: str, tone: ToneEnum):
+@metrics.timed("llm.generate_reminder")
+def generate_reminder(patient_name: str, photo_description: str, relation: str, tone: ToneEnum,
+                      namespace: str = "default", use_cache: bool = True, single_call: bool = None) -> ReminderResult:
+    """ 회상 문장 + 퀴즈 생성 → 검증된 ReminderResult (형식이 깨지면 ReminderParseError) """
+    cache_fields, cache_context = _cache_args(patient_name, photo_description, relation, tone)
+    embedding = None
+    if use_cache:
+        cached, embedding = reminder_cache.lookup(namespace, semantic_text=photo_description, context=cache_context,
+                                                  **cache_fields)
+        if cached is not None:
+            print("✅ LLM 캐시 적중:", namespace)
+            metrics.record_cache("llm", "hit")
+            return parse_reminder(cached)
+        metrics.record_cache("llm", "miss")
+
+    if single_call is None:
+        single_call = LLM_SINGLE_CALL
+    if single_call:
+        result = _generate_reminder_single_call(patient_name, photo_description, relation, tone)
+    else:
+        raw = _generate_reminder_two_call(patient_name, photo_description, relation, tone)
+        print("🧠 GPT 응답 결과:\n", raw)
+        # ✅ TTS 전에 검증: 빠진 항목은 그 항목만 다시 요청
+        result = parse_reminder(raw, repair=repair_reminder_fields)
+    if use_cache:
+        # 검증/보완된 결과만 캐시
+        reminder_cache.set(namespace, result.to_text(), semantic_text=photo_description, context=cache_context,
+                           embedding=embedding, **cache_fields)
+    return result
+
+def _cache_args(patient_name: str, photo_description: str, relation: str, tone: ToneEnum):
+    fields = {
+        "patient_name": patient_name,
+        "photo_description": photo_description,
+        "relation": relation,
+        "tone": tone.value,
+    }
+    return fields, f"{relation}|{tone.value}|{patient_name}"
+
+async def stream_reminder(patient_name: str, photo_description: str, relation: str, tone: ToneEnum,
+                          on_reminder=None, namespace: str = "default", use_cache: bool = True) -> ReminderResult:
+    """ 스트리밍 생성. "회상 문장:" 줄이 완성되면 on_reminder(text) 를 바로 호출하고(퀴즈 생성과 겹침),
+        끝나면 검증된 ReminderResult 반환. on_reminder 에 넘긴 문장과 최종 reminder_text 가 다를 수 있으니 호출하는 쪽에서 비교
+        허용 단어 규칙(find_term_violations)을 어기면 어긴 항목만 보완하고 (회상 문장이 멀쩡하면 미리 시작한 TTS 유지),
+        보완으로도 못 고치면 스트리밍 없이 generate_reminder 로 다시 생성 """
+    cache_fields, cache_context = _cache_args(patient_name, photo_description, relation, tone)
+    embedding = None
+    if use_cache:
+        cached, embedding = await pool.io_pool.run(
+            reminder_cache.lookup, namespace, semantic_text=photo_description, context=cache_context, **cache_fields
+        )
+        if cached is not None:
+            print("✅ LLM 캐시 적중:", namespace)
+            metrics.record_cache("llm", "hit")
+            result = parse_reminder(cached)
+            if on_reminder:
+                on_reminder(result.reminder_text)
+            return result
+        metrics.record_cache("llm", "miss")
+
+    # 2회 호출 경로와 같이 설명에서 뽑은 용어만 쓰도록 프롬프트에 넣는다
+    allowed_terms = await pool.io_pool.run(extract_terms, photo_description) or [relation]
+
+    # 모델이 실패하면 라우터가 다음 모델로 처음부터 다시 스트리밍 (회상 TTS 는 한 번만 미리 시작)
+    dispatched = False
+
+    async def remote(model: str, timeout: float):
+        nonlocal dispatched
+        parser = StreamingSectionParser()
+        usage = None
+        start = time.perf_counter()
+        first_token = None
+        with metrics.span("llm.generate_stream", model=model):
+            stream = await async_client.chat.completions.create(
+                model=model,
+                messages=prompts.reminder_messages(patient_name, photo_description, relation, tone,
+                                                   allowed_terms, model=model),
+                stream=True,
+                stream_options={"include_usage": True},
+                timeout=timeout,
+            )
+            async for chunk in stream:
+                if getattr(chunk, "usage", None):
+                    usage = chunk.usage
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content or ""
+                if delta and first_token is None:
+                    first_token = time.perf_counter() - start
+                    ttft_seconds.observe(first_token, model=model)
+                for key, value in parser.feed(delta):
+                    if key == "회상 문장" and value and not dispatched and on_reminder:
+                        # 금지어가 섞인 문장이면 TTS 를 미리 시작하지 않는다
+                        if not reminder_text_violations(value, photo_description, relation):
+                            dispatched = True
+                            on_reminder(value)
+            parser.close()
+        return parser.raw, usage
+
+    raw, _ = await router.acall("generate_stream", remote)
+    print("🧠 GPT 스트리밍 응답 결과:\n", raw)
+    # 빠진 항목 보완(repair)은 블로킹 호출이라 io_pool 에서
+    result = await pool.io_pool.run(parse_reminder, raw, repair_reminder_fields)
+    violations = find_term_violations(asdict(result), photo_description, patient_name, relation)
+    if violations:
+        print("⚠️ 허용 단어 규칙 위반 → 해당 항목만 다시 요청:", violations)
+        repaired = await pool.io_pool.run(
+            _repair_violations, result, violations, photo_description, patient_name, relation,
+        )
+        if repaired is None:
+            print("⚠️ 항목 보완 실패 → 스트리밍 없이 재생성")
+            return await pool.io_pool.run(
+                generate_reminder, patient_name, photo_description, relation, tone,
+                namespace=namespace, use_cache=use_cache,
+            )
+        result = repaired
+    warn_ungrounded(result.reminder_text, photo_description, relation)
+    if use_cache:
+        await pool.io_pool.run(
+            reminder_cache.set, namespace, result.to_text(),
+            semantic_text=photo_description, context=cache_context, embedding=embedding, **cache_fields,
+        )
+    return result
+
+def repair_reminder_fields(raw_output: str, missing: list, rules: str = "") -> str:
+    """ 이전 응답에서 빠진 항목만 같은 형식으로 다시 받아옴 (rules: 추가로 지킬 규칙 한 줄) """
+    labels = ", ".join(FIELD_LABELS.get(m, m) for m in missing)
+    repair_prompt = prompts.REPAIR.render(labels=labels, rules=f"{rules}\n" if rules else "", raw_output=raw_output)
+    response, _ = _chat(
+        "repair",
+        messages=[{"role": "user", "content": repair_prompt}]
+    )
+    return response.choices[0].message.content
+
+def _generate_reminder_two_call(patient_name: str, photo_description: str, relation: str, tone: ToneEnum):
 
     allowed_terms = extract_terms(photo_description)
     if not allowed_terms:
         allowed_terms = [relation]
 
-    system_prompt = (
-        "너는 치매 환자에게 따뜻한 회상 문장을 건네는 도우미야.\n"
-        "너는 지금 보호자의 입장에서 환자에게 직접 말하고 있어.\n"
-        "항상 보호자가 환자에게 이야기하는 구조여야 해.\n"
-        "절대로 '보호자님', '사용자', '보호자' 같은 단어를 회상 문장에 넣지 마.\n"
-        "문장은 환자의 관계에 해당하는 호칭으로 자연스럽게 시작해줘. 예: 할머니, 어머니, 아버지 등\n"
-        f"환자의 이름은 '{patient_name}'이지만, 문장에서 직접 사용하지 말고, 대신 보호자와의 관계인 '{relation}'을 호칭으로 사용해줘.\n"
-        "예: '숙희님, 숙희야' 이런 표현은 쓰지 마. 관계 호칭만 자연스럽게 써줘.\n"
-        f"문체는 '{tone.value}' 스타일로 해줘.\n"
-        "문장은 너무 길지 않게, 말 끝은 쉼표(,)나 줄임표(…)로 부드럽게 마무리해줘.\n"
-        "도입부는 '오늘은~'처럼 단조롭게 시작하지 말고, 다양한 회상 분위기로 시작해줘.\n"
-        "기억을 자극할 수 있는 장소, 분위기, 감정을 꼭 담아줘.\n"
-        "생성되는 문장은 마지막에 반드시 '~요', '~다', '~죠' 등으로 자연스럽고 확실하게 끝나도록 해주세요."
-        "항상 '오늘은~'으로 시작하지 말고, 상황에 따라 자연스럽고 다양한 문장으로 도입해줘.\n"
-        "각 말투 스타일은 아래 기준을 따라야해:\n\n"
-
-        "👉 다정하게:\n"
-        "- MBTI로 치면 ENFJ/ISFJ 스타일. 감정에 공감하고 상대방을 배려하는 말투.따뜻한 말과 걱정 섞인 어투.\n "
-        "- 상대방을 배려하고 따뜻하게 느껴질 수 있는 말투여야 해.\n"
-        "- '~했죠?', '~좋았어요.'처럼 부드럽게 마무리되고 말끝이 올라가는 어미를 써줘.\n"
-        "- 감정을 조용히 공감하거나 안심시키는 느낌이 좋고, 친근한 호칭도 적절히 사용해.\n"
-        "- 예: '아버지, 오늘은 날씨가 참 좋았죠?… 산책하기 딱 좋았던 기억이 나요.'\n\n"
-
-        "👉 밝게:\n"
-        "- MBTI로 치면 ENFP/ESFP 스타일. 활기차고 감정을 풍부하게 표현하는 말투. 느낌표와 긍정적인 말 사용.\n"
-        "- 기쁜 감정, 환한 분위기가 느껴지는 말투여야 해.\n"
-        "- '~했어요!', '~즐거웠어요!'처럼 느낌표를 적절히 사용해 에너지를 표현해줘.\n"
-        "- 긍정적이고 활기찬 단어를 많이 쓰고, 리듬감 있게 말해줘.\n"
-        "- 예: '엄마! 오늘 사진 속 그날 기억나죠? 정말 신났었어요!'\n\n"
-
-        "👉 차분하게:\n"
-        "- MBTI로 치면 INFJ/ISTJ 스타일. 조용하고 안정적인 말투. 감정은 드러내지 않지만 진정성 있게 전달.\n"
-        "- 안정감 있고 잔잔한 분위기가 느껴지는 말투여야 해.\n"
-        "- '~였습니다.', '~했답니다.'처럼 서술형 어미를 사용해줘.\n"
-        "- 감정을 직접적으로 드러내기보단 조용히 회상하듯 말해줘.\n"
-        "- 예: '아버지, 그날도 어김없이 해가 지고 있었습니다… 참 고요한 날이었지요.'\n\n"
-
-        "그리고 문장은 너무 길지 않게, 말 끝은 쉼표(,)나 줄임표(…)를 활용해서 부드럽게 마무리해줘.\n"
-        "중간중간 자연스럽게 말을 쉬어주는 느낌을 주면 더 좋아.\n"
-        "기억을 자극할 수 있는 장소, 분위기, 감정을 꼭 담아줘."
-
-        "⚠️ 아주 중요한 규칙:\n"
-        "- 설명에 등장하지 않는 사람 이름, 장소, 사물, 사건은 절대 추가하지 마.\n"
-        "- 설명에 누가 같이 있었다는 정보가 없으면, 같이 있었다고 말하지 마.\n"
-        "- '우리가', '함께', '같이', '다 함께'와 같은 표현을 사용하지 마.\n"
+    response, _ = _chat(
+        "generate",
+        messages=lambda model: prompts.reminder_messages(patient_name, photo_description, relation, tone,
+                                                         allowed_terms, model=model),
+    )
+    return response.choices[0].message.content
+
+REMINDER_SCHEMA = {
+    "name": "reminder_quiz",
+    "strict": True,
+    "schema": {
+        "type": "object",
+        "properties": {
+            "allowed_terms": {"type": "array", "items": {"type": "string"}},
+            "reminder_text": {"type": "string"},
+            "quiz_type": {"type": "integer", "enum": [1, 2, 3]},
+            "quiz_question": {"type": "string"},
+            "quiz_options": {"type": "array", "items": {"type": "string"}},
+            "answer_index": {"type": "integer", "enum": [1, 2, 3, 4]},
+        },
+        "required": ["allowed_terms", "reminder_text", "quiz_type", "quiz_question", "quiz_options", "answer_index"],
+        "additionalProperties": False,
+    },
+}
+
+STRUCTURED_OUTPUT_NOTE = (
+    "출력은 반드시 주어진 JSON 스키마를 따르세요. 사용자 메시지의 '출력 형식'은 각 필드의 내용 기준으로만 사용합니다.\n"
+    "- quiz_options 에는 '1번.' 같은 번호 없이 보기 텍스트만 정확히 4개 넣으세요.\n"
+    "- answer_index 는 정답 보기의 번호(1~4)입니다."
+)
+
+FORBIDDEN_OPTION_WORDS = {"나", "너", "보호자", "사용자"}
+FORBIDDEN_REMINDER_WORDS = ("보호자님", "사용자", "보호자")
+
+# ✅ 설명에 없는 용어 검사
+# - 위반(해당 항목만 다시 요청): 금지어, 보기 규칙, 설명에 없는 정답 보기,
+#   구조화 출력의 allowed_terms 중 설명에 없는 용어를 실제 문장/보기에 쓴 경우
+# - 경고(로그만): 출력에서 규칙 기반으로 뽑은 명사가 설명에 없는 경우
+#   부사/활용형(곱게, 차려입 ...)이 섞여 오탐이 많아서 재생성 근거로 쓰지 않는다
+# - 호칭과 분위기·감정 표현(GENERIC_NOUNS), 부사·위치어·의존 명사·용언 어간(NON_CONTENT_WORDS)은 제외
+TERM_MAX_UNGROUNDED = int(os.getenv("LLM_TERM_MAX_UNGROUNDED", "3"))   # 이보다 많으면 경고 로그
+TERM_SCAN_LIMIT = 50
+GENERIC_NOUNS = {
+    "어머니", "아버지", "엄마", "아빠", "할머니", "할아버지", "어르신",
+    "모습", "얼굴", "미소", "웃음", "마음", "기분", "느낌", "분위기", "추억", "이야기", "목소리", "시간",
+    "하루", "햇살", "바람", "하늘", "행복", "설렘", "따스함", "풍경", "봄볕", "햇볕", "봄날", "노을", "계절",
+}
+NON_CONTENT_WORDS = {
+    # 부사
+    "곱게", "예쁘게", "환하게", "활짝", "살며시", "살랑", "살랑살랑", "천천히", "가만히", "조용히", "나란히", "다정히", "문득",
+    "다시", "아직", "오래", "한참", "잠시", "잠깐", "서로", "항상", "오래도록", "가득",
+    # 위치 / 의존 명사
+    "아래", "옆", "앞", "뒤", "속", "밖", "사이", "가운데", "곁", "근처", "주변", "자락", "무렵", "즈음",
+    "동안", "내내", "한쪽",
+    # 관형형에서 조사처럼 떨어져 남는 용언 어간 ("차려입은" → "차려입")
+    "차려입", "맞잡", "둘러앉", "끌어안", "껴안", "마주앉",
+}
+ADVERB_ENDINGS = ("하게", "롭게", "스럽게", "히")
+QUIZ_FIELDS = ("quiz_question", "quiz_options", "answer_index")
 
+
+def _grounding(photo_description: str, relation: str = "") -> str:
+    return (photo_description + relation).replace(" ", "")
+
+
+def _content_nouns(text: str) -> list:
+    return [term for term in extract_nouns(text, limit=TERM_SCAN_LIMIT)
+            if term not in GENERIC_NOUNS and term not in NON_CONTENT_WORDS and not term.endswith(ADVERB_ENDINGS)]
+
+
+def _invented_terms(allowed_terms, grounding: str) -> list:
+    """ 모델이 allowed_terms 로 보고했지만 설명에 없는 용어 """
+    return [term for term in allowed_terms or [] if term.strip() and term.replace(" ", "") not in grounding]
+
+
+def ungrounded_terms(reminder_text: str, photo_description: str, relation: str = "") -> list:
+    """ (참고용) 회상 문장에서 뽑은 명사 중 설명에 없는 것 — 규칙 기반이라 오탐이 있어 경고에만 쓴다 """
+    grounding = _grounding(photo_description, relation)
+    return [term for term in _content_nouns(reminder_text) if term not in grounding]
+
+
+def warn_ungrounded(reminder_text: str, photo_description: str, relation: str = ""):
+    extra = ungrounded_terms(reminder_text, photo_description, relation)
+    if len(extra) > TERM_MAX_UNGROUNDED:
+        print("⚠️ 회상 문장에 설명에 없을 수 있는 단어 (확인용):", extra)
+
+
+def reminder_text_violations(reminder_text: str, photo_description: str, relation: str = "",
+                             allowed_terms=None) -> list:
+    """ 회상 문장만 검사 (스트리밍에서 퀴즈가 끝나기 전에 TTS 를 시작해도 되는지 확인) """
+    violations = [f"회상 문장에 금지어: {word}" for word in FORBIDDEN_REMINDER_WORDS if word in reminder_text]
+    invented = [t for t in _invented_terms(allowed_terms, _grounding(photo_description, relation))
+                if t in reminder_text]
+    if invented:
+        violations.append(f"회상 문장에 설명에 없는 용어: {', '.join(invented)}")
+    return violations
+
+
+def find_term_violations(data: dict, photo_description: str, patient_name: str = "", relation: str = "") -> dict:
+    """ 생성 결과가 규칙을 어겼는지 서버에서 확인 → {다시 받아야 할 항목: [사유, ...]} (비어 있으면 통과)
+        allowed_terms 는 모델이 보고한 값이라 설명과 대조해서, 설명에 없는 용어를 실제로 쓴 경우만 위반 """
+    grounding = _grounding(photo_description, relation)
+    allowed_terms = data.get("allowed_terms")
+    violations = {}
+
+    reminder = reminder_text_violations(data.get("reminder_text", ""), photo_description, relation, allowed_terms)
+    if reminder:
+        violations["reminder_text"] = reminder
+
+    options = data.get("quiz_options", [])
+    quiz = []
+    if len(options) != 4:
+        quiz.append(f"보기 개수 {len(options)}개")
+    for opt in options:
+        if opt.strip() in FORBIDDEN_OPTION_WORDS or (patient_name and patient_name in opt):
+            quiz.append(f"금지된 보기: {opt}")
+    invented = [t for t in _invented_terms(allowed_terms, grounding)
+                if t in data.get("quiz_question", "") or any(t in opt for opt in options)]
+    if invented:
+        quiz.append(f"퀴즈에 설명에 없는 용어: {', '.join(invented)}")
+
+    index = data.get("answer_index")
+    if isinstance(index, int) and 1 <= index <= len(options):
+        answer = options[index - 1]
+        nouns = _content_nouns(answer)
+        if nouns and answer.replace(" ", "") not in grounding and all(n not in grounding for n in nouns):
+            quiz.append(f"정답 보기가 설명에 없음: {answer}")
+    if quiz:
+        violations["quiz_options"] = quiz
+    return violations
+
+
+def _repair_violations(result: ReminderResult, violations: dict, photo_description: str,
+                       patient_name: str, relation: str):
+    """ 위반한 항목만 비우고 repair 로 그 항목만 다시 받는다 (퀴즈는 문제/보기/정답을 한 묶음으로)
+        고친 결과, 보완 응답이 비었거나 여전히 위반이면 None """
+    fields = set(violations)
+    if fields & set(QUIZ_FIELDS):
+        fields |= set(QUIZ_FIELDS)
+    kept = ReminderResult(
+        reminder_text="" if "reminder_text" in fields else result.reminder_text,
+        quiz_question="" if "quiz_question" in fields else result.quiz_question,
+        quiz_options=[] if "quiz_options" in fields else list(result.quiz_options),
+        answer_index=None if "answer_index" in fields else result.answer_index,
+        quiz_type=result.quiz_type,
     )
-    # ✅ prompt를 system_prompt 밖에서 작성
-    prompt = f"""
-    - 환자 이름: {patient_name}
-    - 사진 설명: {photo_description}
-    - 환자와 보호자의 관계: {relation}
-    - 보호자의 말투 스타일: {tone.value}
-
-    퀴즈 유형은 다음 중 하나를 자동으로 선택해서 생성해주세요:
-    1. 이름 맞추기 – 사진 속 사람, 장소, 물건의 이름을 맞추는 문제
-    2. 시각 회상 – 사진 배경이나 상황을 설명하고 기억을 유도하는 문제
-    3. 자유 회상 – 사진을 보고 떠오를 수 있는 기억을 기반으로 보기 4개를 주고, 가장 관련 있는 것을 고르는 **객관식 퀴즈**로 만들어주세요
-
-    환자가 이해하기 쉽게 다정하고 천천히 말하는 어조로 구성해주세요.
-    환자에게 회상 문장을 건네는 상황이라고 생각하고 말투를 구성해주세요.
-    문장의 주체는 '보호자', 청자는 '환자'입니다.
-
-    출력 형식:
-    회상 문장: ...
-    퀴즈 유형: [1, 2, 3 중 하나]
-    퀴즈 문제: [한 줄 질문]
-    선택지는 반드시 아래 형식을 따르세요:
-    선택지:
-    1번. [보기1]
-    2번. [보기2]
-    3번. [보기3]
-    4번. [보기4]
-
-    정답: [번호]. [정답 보기 텍스트]
-
-    ❗ 반드시 보기마다 줄을 바꿔서 작성하고, ‘1번, 보기1, 2번, 보기2’처럼 한 줄에 몰아서 쓰지 마세요.
-    ❗ 번호는 ‘1번.’ 또는 ‘1번 ’ 형식으로 쓰고, 꼭 보기와 번호를 붙여 주세요.
-    ❗ 정답도 같은 형식으로, 보기 텍스트까지 명확하게 써주세요. (예: 정답: 2번. 보기2)
-    ❗ 퀴즈 문제는 보호자가 환자에게 묻는 말투여야 합니다.
-    예: "그날 우리가 함께 먹었던 음식이 뭐였는지 기억나세요?" 처럼 부드럽고 회상을 유도하는 말투로 질문해 주세요.
-    ❗ 제3자가 보호자에게 묻는 형식(예: "오빠와 함께 먹던 음식은 무엇이었을까요?")은 절대 쓰지 마세요.
-    ❗ 객관식 보기는 항상 환자의 시점에서 이해되도록 구성해주세요.
-    - "나", "너"와 같은 1인칭/2인칭 표현 대신, 사람 이름이나 관계(예: 오빠, 엄마 등)를 사용해주세요.
-    - 환자의 이름이 보기로 포함되지 않도록 해주세요.
-    - 모든 보기는 환자의 입장에서 **타인을 지칭하는 방식**으로 명확하게 표현해주세요.
-    ❗ 아주 중요한 규칙:
-    - 사진 설명에 등장하지 않는 사람 이름, 장소, 사물, 사건은 절대 새로 만들어내지 마세요.
-    - 사진 설명에 포함된 정보와 관계(`relation`)만 사용하여 회상 문장과 퀴즈를 작성하세요.
-    - 다음 단어들만 사용해서 회상 문장과 퀴즈를 만들어. ⚠️ 이 단어들 외에 새로운 인물, 장소, 사물을 절대 넣지 마. 단어 목록: {allowed_terms}
-
-    예시 입력값:
-    언제: 봄날
-    어디서: 전주 한옥 마을에서 
-    어떻게: 내가 한복을
-    무엇을: 입고 
-    가장 기억에 남는 것: 활짝 웃었다. 이 사진을 엄마가 이쁘다고 했다.
-    라는 보기가 있다고 가정을 했을 때 여기서 엄마는 한옥에 갔는지 안 갔는지 모르니까 함부로 갔다고 집어 넣으면 안돼
-
-    예시 (좋은 보기):
-    1번. 오빠  
-    2번. 엄마  
-    3번. 마트 주인  
-    4번. 계곡 주인장
-
-    예시 (❌ 피해야 할 보기):
-    1번. 나  
-    2번. 너  
-    3번. 유타  
-    4번. 보호자
-    """
-
-    response = client.chat.completions.create(
-        model="gpt-4",
-        messages=[
-            {"role": "system", "content": system_prompt},
-            {"role": "user", "content": prompt}
-        ]
+    terms = extract_nouns(photo_description) or [relation]
+    rules = prompts.TERMS_RULE_GIVEN.format(terms=terms)
+    try:
+        repaired = parse_reminder(kept.to_text(), repair=lambda raw, missing: repair_reminder_fields(raw, missing, rules))
+    except ReminderParseError as e:
+        print("⚠️ 항목 보완 응답에 빠진 항목:", e.missing)
+        return None
+    remaining = find_term_violations(asdict(repaired), photo_description, patient_name, relation)
+    if remaining:
+        print("⚠️ 보완 후에도 허용 단어 규칙 위반:", remaining)
+        return None
+    return repaired
+
+
+def _generate_reminder_single_call(patient_name: str, photo_description: str, relation: str, tone: ToneEnum) -> ReminderResult:
+    response, _ = _chat(
+        "generate_structured",
+        messages=lambda model: prompts.reminder_messages(patient_name, photo_description, relation, tone,
+                                                         extra_system=STRUCTURED_OUTPUT_NOTE, model=model),
+        response_format={"type": "json_schema", "json_schema": REMINDER_SCHEMA},
     )
-    return response.choices[0].message.content
+    try:
+        data = json.loads(response.choices[0].message.content)
+    except (json.JSONDecodeError, TypeError):
+        print("⚠️ 구조화 출력 파싱 실패 → 2회 호출 경로로 재생성")
+        return parse_reminder(_generate_reminder_two_call(patient_name, photo_description, relation, tone),
+                              repair=repair_reminder_fields)
+
+    result = ReminderResult(
+        reminder_text=data["reminder_text"].strip(),
+        quiz_question=data["quiz_question"].strip(),
+        quiz_options=[opt.strip() for opt in data["quiz_options"]],
+        answer_index=data["answer_index"],
+        quiz_type=data["quiz_type"],
+    )
+    invented = _invented_terms(data.get("allowed_terms"), _grounding(photo_description, relation))
+    if invented:
+        print("⚠️ 모델이 보고한 허용 용어 중 설명에 없는 것 (문장에 안 썼으면 통과):", invented)
+
+    violations = find_term_violations(data, photo_description, patient_name, relation)
+    if violations:
+        print("⚠️ 허용 단어 규칙 위반 → 해당 항목만 다시 요청:", violations)
+        result = _repair_violations(result, violations, photo_description, patient_name, relation)
+        if result is None:
+            # 보완으로도 못 고쳤을 때만 전체 재생성
+            print("⚠️ 항목 보완 실패 → 2회 호출 경로로 재생성")
+            return parse_reminder(_generate_reminder_two_call(patient_name, photo_description, relation, tone),
+                                  repair=repair_reminder_fields)
+
+    warn_ungrounded(result.reminder_text, photo_description, relation)
+    return result
 
-def generate_reminder_simple(photo_description: str, relation: str):
+def generate_reminder_simple(photo_description: str, relation: str, namespace: str = "default") -> ReminderResult:
     # 내부에서 기존 함수에 기본값을 넣어 호출
     return generate_reminder(
         patient_name="",
         photo_description=photo_description,
         relation=relation,
-        tone=ToneEnum.kind  # tone이 Enum이면 적절한 기본값 넣기
+        tone=ToneEnum.kind,  # tone이 Enum이면 적절한 기본값 넣기
+        namespace=namespace,
     )
 
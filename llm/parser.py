@@ -0,0 +1,210 @@
+# llm/parser.py
+# ✅ LLM 출력("회상 문장:/퀴즈 문제:/선택지:/정답:") 파서 — 두 엔드포인트 공용
+# - 미리 컴파일한 정규식으로 한 번에 파싱해서 ReminderResult 로 검증
+# - 빠진 항목만 모델에 다시 물어보는 repair 경로 지원
+import re
+from dataclasses import dataclass, field
+from typing import Callable, List, Optional
+
+_LINE_RE = re.compile(
+    r"^[ \t]*(?:"
+    r"(?P<key>회상 문장|퀴즈 유형|퀴즈 문제|선택지|정답)[ \t]*[:：][ \t]*(?P<value>.*?)"
+    r"|(?P<num>\d+)[ \t]*번[ \t]*[.,)]?[ \t]*(?P<option>.+?)"
+    r")[ \t\r]*$",
+    re.MULTILINE,
+)
+# 보기 번호(1~4) 뒤에 "번" / "." / ")" 가 있거나 번호만 있을 때만 번호로 본다
+# ("1990년에 간 여행" 처럼 숫자로 시작하는 보기 텍스트는 보기와 비교해서 찾음)
+_ANSWER_RE = re.compile(r"^\s*(?P<num>[1-4])\s*(?:번\s*[.)]?|[.)]|$)\s*(?P<text>.*?)\s*$")
+
+FIELD_LABELS = {
+    "reminder_text": "회상 문장",
+    "quiz_question": "퀴즈 문제",
+    "quiz_options": "선택지",
+    "answer_index": "정답",
+}
+REQUIRED_OPTIONS = 4
+READABLE_NUMS = {1: "첫 번째", 2: "두 번째", 3: "세 번째", 4: "네 번째"}
+
+
+class ReminderParseError(ValueError):
+    """ LLM 출력에 필요한 항목이 없거나 형식이 잘못됐을 때 """
+
+    def __init__(self, missing: List[str], raw: str = ""):
+        labels = ", ".join(FIELD_LABELS.get(m, m) for m in missing)
+        if missing == ["answer_index"]:
+            message = "GPT 응답에 퀴즈 정답이 없습니다."
+        else:
+            message = f"GPT 응답에 필요한 항목이 없습니다: {labels}"
+        super().__init__(message)
+        self.missing = missing
+        self.raw = raw
+
+
+@dataclass
+class ReminderResult:
+    reminder_text: str = ""
+    quiz_question: str = ""
+    quiz_options: List[str] = field(default_factory=list)
+    answer_index: Optional[int] = None   # 1부터 시작
+    quiz_type: Optional[int] = None
+    answer_raw: str = field(default="", repr=False, compare=False)  # "정답:" 원문
+
+    @property
+    def answer_text(self) -> str:
+        if self.answer_index and 1 <= self.answer_index <= len(self.quiz_options):
+            return self.quiz_options[self.answer_index - 1]
+        return ""
+
+    def missing_fields(self) -> List[str]:
+        missing = []
+        if not self.reminder_text:
+            missing.append("reminder_text")
+        if not self.quiz_question:
+            missing.append("quiz_question")
+        if len(self.quiz_options) != REQUIRED_OPTIONS:
+            missing.append("quiz_options")
+        if not self.answer_text:
+            missing.append("answer_index")
+        return missing
+
+    def is_valid(self) -> bool:
+        return not self.missing_fields()
+
+    def merge(self, other: "ReminderResult") -> "ReminderResult":
+        """ 비어 있는 항목만 other 값으로 채운 새 결과 """
+        options = self.quiz_options if len(self.quiz_options) == REQUIRED_OPTIONS else (other.quiz_options or self.quiz_options)
+        merged = ReminderResult(
+            reminder_text=self.reminder_text or other.reminder_text,
+            quiz_question=self.quiz_question or other.quiz_question,
+            quiz_options=list(options),
+            answer_index=self.answer_index,
+            quiz_type=self.quiz_type or other.quiz_type,
+        )
+        if not merged.answer_text:
+            merged.answer_index = other.answer_index
+        if not merged.answer_text and self.answer_raw:
+            # 보기가 보완된 뒤에 정답 원문을 다시 매칭
+            merged.answer_index = _parse_answer(self.answer_raw, merged.quiz_options)
+        return merged
+
+    def quiz_speech_text(self) -> str:
+        """ 퀴즈 TTS 용 문장 (문제 + '첫 번째, 보기' 형식의 선택지) """
+        options_text = "\n".join([
+            f"{READABLE_NUMS.get(i, f'{i}번째')}, {opt}" for i, opt in enumerate(self.quiz_options, start=1)
+        ])
+        return f"{self.quiz_question}\n{options_text}"
+
+    def to_text(self) -> str:
+        """ 기존 LLM 출력 형식으로 렌더링 (캐시 저장용). 빈 항목은 빼고 쓴다 (보완 요청의 이전 응답으로도 사용) """
+        lines = []
+        if self.reminder_text:
+            lines.append(f"회상 문장: {self.reminder_text}")
+        if self.quiz_type:
+            lines.append(f"퀴즈 유형: {self.quiz_type}")
+        if self.quiz_question:
+            lines.append(f"퀴즈 문제: {self.quiz_question}")
+        if self.quiz_options:
+            lines.append("선택지:")
+            lines += [f"{i}번. {opt}" for i, opt in enumerate(self.quiz_options, start=1)]
+        if self.answer_text:
+            lines.append(f"정답: {self.answer_index}번. {self.answer_text}")
+        return "\n".join(lines)
+
+
+def _normalize_option(text: str) -> str:
+    """ 비교용: 앞뒤 따옴표/괄호/마침표와 공백 차이 무시 """
+    return re.sub(r"\s+", " ", text.strip().strip("[]\"'「」.")).strip().lower()
+
+
+def _parse_answer(raw: str, options: List[str]) -> Optional[int]:
+    raw = raw.strip().strip("[]")
+    match = _ANSWER_RE.match(raw)
+    if match:
+        return int(match.group("num"))
+    # 번호 없이 보기 텍스트만 온 경우: 정규화 후 정확히 같은 보기가 하나일 때만
+    # (부분 문자열로 찾으면 "엄마" 가 "엄마 친구" 에 걸린다 → 모호하면 None 으로 두고 repair)
+    answer = _normalize_option(raw)
+    matches = [i for i, opt in enumerate(options, start=1) if answer and _normalize_option(opt) == answer]
+    return matches[0] if len(matches) == 1 else None
+
+
+def parse_reminder_output(raw: str) -> ReminderResult:
+    """ 한 번의 정규식 스캔으로 파싱 (검증은 하지 않음) """
+    result = ReminderResult()
+    capture_options = False
+    raw_answer = None
+
+    for match in _LINE_RE.finditer(raw or ""):
+        key = match.group("key")
+        if key is None:
+            if capture_options:
+                result.quiz_options.append(match.group("option").strip())
+            continue
+
+        value = match.group("value").strip()
+        capture_options = key == "선택지"
+        if key == "회상 문장":
+            result.reminder_text = value
+        elif key == "퀴즈 문제":
+            result.quiz_question = value
+        elif key == "퀴즈 유형":
+            digits = re.search(r"\d", value)
+            result.quiz_type = int(digits.group()) if digits else None
+        elif key == "정답":
+            raw_answer = value
+
+    if raw_answer is not None:
+        result.answer_raw = raw_answer
+        result.answer_index = _parse_answer(raw_answer, result.quiz_options)
+    return result
+
+
+def parse_reminder(raw: str, repair: Callable[[str, List[str]], str] = None) -> ReminderResult:
+    """ 파싱 + 검증. 빠진 항목이 있으면 repair(raw, missing) 로 그 항목만 다시 받아 병합 """
+    result = parse_reminder_output(raw)
+    missing = result.missing_fields()
+    if not missing:
+        return result
+
+    if repair is not None:
+        print("⚠️ LLM 응답 누락 항목 보완 요청:", missing)
+        patch = parse_reminder_output(repair(raw, missing))
+        result = result.merge(patch)
+        missing = result.missing_fields()
+        if not missing:
+            return result
+
+    raise ReminderParseError(missing, raw)
+
+
+class StreamingSectionParser:
+    """ 토큰 스트림을 받아 줄이 완성될 때마다 (항목, 값) 을 돌려줌 — "회상 문장:" 줄이 끝나면 바로 TTS 를 시작하기 위함 """
+
+    def __init__(self):
+        self._parts = []
+        self._pending = ""
+
+    @property
+    def raw(self) -> str:
+        return "".join(self._parts)
+
+    def _sections(self, lines) -> list:
+        sections = []
+        for line in lines:
+            match = _LINE_RE.match(line)
+            if match and match.group("key"):
+                sections.append((match.group("key"), match.group("value").strip()))
+        return sections
+
+    def feed(self, delta: str) -> list:
+        if not delta:
+            return []
+        self._parts.append(delta)
+        *complete, self._pending = (self._pending + delta).split("\n")
+        return self._sections(complete)
+
+    def close(self) -> list:
+        """ 마지막 줄(줄바꿈 없이 끝난 경우) 처리 """
+        rest, self._pending = self._pending, ""
+        return self._sections([rest]) if rest.strip() else []
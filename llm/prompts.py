@@ -0,0 +1,315 @@
+# llm/prompts.py
+# ✅ 프롬프트 템플릿 레지스트리
+# - 요청마다 같은 내용(규칙, 형식, 예시)을 앞에, 요청별 값(이름, 관계, 설명)을 맨 뒤에 둔다
+#   → 앞부분이 매번 바이트 단위로 같아서 OpenAI 프롬프트 prefix 캐시가 적용된다
+# - 말투(ToneEnum)별 system 프롬프트는 import 시 한 번만 만들어 두고, 해당 말투 기준만 넣는다
+# - 템플릿마다 토큰 예산을 두고, 로컬 토크나이저(tiktoken, 없으면 근사치)로 확인
+#   같이 보내는 system 프롬프트(말투별)가 있으면 그중 가장 긴 것까지 예산에 포함
+# - 토큰 수는 import 시점이 아니라 처음 render 할 때 센다 (tiktoken 은 첫 사용 때 BPE 파일을 내려받음,
+#   오프라인 등으로 로드에 실패하면 근사치로 계산)
+import os
+from dataclasses import dataclass
+from functools import lru_cache
+
+from enums import ToneEnum
+
+PROMPT_TOKEN_BUDGET = int(os.getenv("PROMPT_TOKEN_BUDGET", "3000"))
+DEFAULT_ENCODING = "cl100k_base"
+
+
+class PromptBudgetError(ValueError):
+    """ 정적 부분(+ system 프롬프트)만으로 토큰 예산을 넘는 템플릿 (설정 오류, 처음 render 할 때 발생) """
+
+
+@lru_cache(maxsize=8)
+def _encoding(model: str):
+    try:
+        import tiktoken
+    except ImportError:
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding(DEFAULT_ENCODING)
+    except Exception as e:
+        # BPE 파일 다운로드 실패(네트워크 없음) 등 → 근사치
+        print("⚠️ tiktoken 인코딩 로드 실패, 토큰 수 근사치 사용:", type(e).__name__, e)
+        return None
+
+
+def count_tokens(text: str, model: str = "gpt-4") -> int:
+    """ tiktoken 이 있으면 정확히, 없으면 보수적인 근사치 (한글 1자 ≈ 1토큰, 그 외 4자 ≈ 1토큰) """
+    encoding = _encoding(model)
+    if encoding is not None:
+        return len(encoding.encode(text))
+    non_ascii = sum(1 for ch in text if ord(ch) > 127)
+    return non_ascii + (len(text) - non_ascii + 3) // 4
+
+
+def truncate_tokens(text: str, max_tokens: int, model: str = "gpt-4") -> str:
+    if count_tokens(text, model) <= max_tokens:
+        return text
+    lo, hi = 0, len(text)
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if count_tokens(text[:mid], model) <= max_tokens:
+            lo = mid
+        else:
+            hi = mid - 1
+    return text[:lo]
+
+
+@dataclass(frozen=True)
+class PromptTemplate:
+    name: str
+    static: str               # 요청마다 같은 앞부분 (prefix 캐시 대상)
+    dynamic: str = ""         # str.format 필드가 있는 뒷부분
+    budget: int = PROMPT_TOKEN_BUDGET
+    trim_field: str = None    # 예산을 넘으면 이 필드를 잘라서 맞춘다
+    systems: tuple = ()       # 함께 보내는 system 프롬프트 후보 (예산은 가장 긴 것 기준)
+
+    def system_tokens(self, model: str = "gpt-4") -> int:
+        return _max_tokens(self.systems, model)
+
+    def check_budget(self, model: str = "gpt-4"):
+        """ 정적 부분 + system 프롬프트 각각이 예산 안에 드는지 (넘으면 PromptBudgetError) """
+        _check_budget(self, model)
+
+    def render(self, model: str = "gpt-4", **fields) -> str:
+        self.check_budget(model)
+        text = self.static + self.dynamic.format(**fields)
+        over = count_tokens(text, model) + self.system_tokens(model) - self.budget
+        if over > 0 and self.trim_field and fields.get(self.trim_field):
+            value = fields[self.trim_field]
+            keep = max(0, count_tokens(value, model) - over)
+            print(f"⚠️ 프롬프트 토큰 예산 초과 ({self.name}, {over}토큰) → {self.trim_field} 축약")
+            fields = {**fields, self.trim_field: truncate_tokens(value, keep, model)}
+            text = self.static + self.dynamic.format(**fields)
+        return text
+
+
+@lru_cache(maxsize=32)
+def _max_tokens(texts: tuple, model: str) -> int:
+    return max((count_tokens(t, model) for t in texts), default=0)
+
+
+@lru_cache(maxsize=32)
+def _check_budget(template: PromptTemplate, model: str) -> bool:
+    # 통과한 (템플릿, 모델) 만 캐시된다 (예외는 lru_cache 에 남지 않음)
+    static_tokens = count_tokens(template.static, model)
+    for system in template.systems or ("",):
+        system_tokens = count_tokens(system, model)
+        if static_tokens + system_tokens > template.budget:
+            raise PromptBudgetError(f"{template.name}: 정적 부분 {static_tokens}토큰 + system "
+                                    f"{system_tokens}토큰 > 예산 {template.budget}")
+    return True
+
+
+_registry = {}
+
+
+def register(template: PromptTemplate) -> PromptTemplate:
+    """ 이름으로 등록만 한다 (예산 확인은 처음 render 할 때) """
+    _registry[template.name] = template
+    return template
+
+
+def get(name: str) -> PromptTemplate:
+    return _registry[name]
+
+
+def static_token_counts(model: str = "gpt-4") -> dict:
+    """ 템플릿별 정적(prefix) 토큰 수 (캐시 가능 분량 확인용) """
+    return {name: count_tokens(t.static, model) for name, t in _registry.items()}
+
+
+# ---------- 회상 문장 + 퀴즈 ----------
+
+SYSTEM_BASE = (
+    "너는 치매 환자에게 따뜻한 회상 문장을 건네는 도우미야.\n"
+    "너는 지금 보호자의 입장에서 환자에게 직접 말하고 있어.\n"
+    "항상 보호자가 환자에게 이야기하는 구조여야 해.\n"
+    "절대로 '보호자님', '사용자', '보호자' 같은 단어를 회상 문장에 넣지 마.\n"
+    "문장은 환자의 관계에 해당하는 호칭으로 자연스럽게 시작해줘. 예: 할머니, 어머니, 아버지 등\n"
+    "환자의 이름은 문장에서 직접 사용하지 말고, 대신 보호자와의 관계를 호칭으로 사용해줘.\n"
+    "예: '숙희님, 숙희야' 이런 표현은 쓰지 마. 관계 호칭만 자연스럽게 써줘.\n"
+    "문장은 너무 길지 않게, 말 끝은 쉼표(,)나 줄임표(…)로 부드럽게 마무리해줘.\n"
+    "도입부는 '오늘은~'처럼 단조롭게 시작하지 말고, 다양한 회상 분위기로 시작해줘.\n"
+    "기억을 자극할 수 있는 장소, 분위기, 감정을 꼭 담아줘.\n"
+    "생성되는 문장은 마지막에 반드시 '~요', '~다', '~죠' 등으로 자연스럽고 확실하게 끝나도록 해주세요.\n"
+    "항상 '오늘은~'으로 시작하지 말고, 상황에 따라 자연스럽고 다양한 문장으로 도입해줘.\n"
+    "중간중간 자연스럽게 말을 쉬어주는 느낌을 주면 더 좋아.\n\n"
+
+    "⚠️ 아주 중요한 규칙:\n"
+    "- 설명에 등장하지 않는 사람 이름, 장소, 사물, 사건은 절대 추가하지 마.\n"
+    "- 설명에 누가 같이 있었다는 정보가 없으면, 같이 있었다고 말하지 마.\n"
+    "- '우리가', '함께', '같이', '다 함께'와 같은 표현을 사용하지 마.\n\n"
+)
+
+TONE_STYLES = {
+    ToneEnum.kind: (
+        "- MBTI로 치면 ENFJ/ISFJ 스타일. 감정에 공감하고 상대방을 배려하는 말투.따뜻한 말과 걱정 섞인 어투.\n"
+        "- 상대방을 배려하고 따뜻하게 느껴질 수 있는 말투여야 해.\n"
+        "- '~했죠?', '~좋았어요.'처럼 부드럽게 마무리되고 말끝이 올라가는 어미를 써줘.\n"
+        "- 감정을 조용히 공감하거나 안심시키는 느낌이 좋고, 친근한 호칭도 적절히 사용해.\n"
+        "- 예: '아버지, 오늘은 날씨가 참 좋았죠?… 산책하기 딱 좋았던 기억이 나요.'\n"
+    ),
+    ToneEnum.bright: (
+        "- MBTI로 치면 ENFP/ESFP 스타일. 활기차고 감정을 풍부하게 표현하는 말투. 느낌표와 긍정적인 말 사용.\n"
+        "- 기쁜 감정, 환한 분위기가 느껴지는 말투여야 해.\n"
+        "- '~했어요!', '~즐거웠어요!'처럼 느낌표를 적절히 사용해 에너지를 표현해줘.\n"
+        "- 긍정적이고 활기찬 단어를 많이 쓰고, 리듬감 있게 말해줘.\n"
+        "- 예: '엄마! 오늘 사진 속 그날 기억나죠? 정말 신났었어요!'\n"
+    ),
+    ToneEnum.calm: (
+        "- MBTI로 치면 INFJ/ISTJ 스타일. 조용하고 안정적인 말투. 감정은 드러내지 않지만 진정성 있게 전달.\n"
+        "- 안정감 있고 잔잔한 분위기가 느껴지는 말투여야 해.\n"
+        "- '~였습니다.', '~했답니다.'처럼 서술형 어미를 사용해줘.\n"
+        "- 감정을 직접적으로 드러내기보단 조용히 회상하듯 말해줘.\n"
+        "- 예: '아버지, 그날도 어김없이 해가 지고 있었습니다… 참 고요한 날이었지요.'\n"
+    ),
+}
+
+# 말투별 system 프롬프트 (import 시 한 번만 생성)
+SYSTEM_PROMPTS = {
+    tone: SYSTEM_BASE + f"문체는 '{tone.value}' 스타일로 해줘. 말투 기준:\n👉 {tone.value}:\n{style}"
+    for tone, style in TONE_STYLES.items()
+}
+
+REMINDER_INSTRUCTIONS = """퀴즈 유형은 다음 중 하나를 자동으로 선택해서 생성해주세요:
+1. 이름 맞추기 – 사진 속 사람, 장소, 물건의 이름을 맞추는 문제
+2. 시각 회상 – 사진 배경이나 상황을 설명하고 기억을 유도하는 문제
+3. 자유 회상 – 사진을 보고 떠오를 수 있는 기억을 기반으로 보기 4개를 주고, 가장 관련 있는 것을 고르는 **객관식 퀴즈**로 만들어주세요
+
+환자가 이해하기 쉽게 다정하고 천천히 말하는 어조로 구성해주세요.
+환자에게 회상 문장을 건네는 상황이라고 생각하고 말투를 구성해주세요.
+문장의 주체는 '보호자', 청자는 '환자'입니다.
+
+출력 형식:
+회상 문장: ...
+퀴즈 유형: [1, 2, 3 중 하나]
+퀴즈 문제: [한 줄 질문]
+선택지는 반드시 아래 형식을 따르세요:
+선택지:
+1번. [보기1]
+2번. [보기2]
+3번. [보기3]
+4번. [보기4]
+
+정답: [번호]. [정답 보기 텍스트]
+
+❗ 반드시 보기마다 줄을 바꿔서 작성하고, ‘1번, 보기1, 2번, 보기2’처럼 한 줄에 몰아서 쓰지 마세요.
+❗ 번호는 ‘1번.’ 또는 ‘1번 ’ 형식으로 쓰고, 꼭 보기와 번호를 붙여 주세요.
+❗ 정답도 같은 형식으로, 보기 텍스트까지 명확하게 써주세요. (예: 정답: 2번. 보기2)
+❗ 퀴즈 문제는 보호자가 환자에게 묻는 말투여야 합니다.
+예: "그날 우리가 함께 먹었던 음식이 뭐였는지 기억나세요?" 처럼 부드럽고 회상을 유도하는 말투로 질문해 주세요.
+❗ 제3자가 보호자에게 묻는 형식(예: "오빠와 함께 먹던 음식은 무엇이었을까요?")은 절대 쓰지 마세요.
+❗ 객관식 보기는 항상 환자의 시점에서 이해되도록 구성해주세요.
+- "나", "너"와 같은 1인칭/2인칭 표현 대신, 사람 이름이나 관계(예: 오빠, 엄마 등)를 사용해주세요.
+- 환자의 이름이 보기로 포함되지 않도록 해주세요.
+- 모든 보기는 환자의 입장에서 **타인을 지칭하는 방식**으로 명확하게 표현해주세요.
+❗ 아주 중요한 규칙:
+- 사진 설명에 등장하지 않는 사람 이름, 장소, 사물, 사건은 절대 새로 만들어내지 마세요.
+- 사진 설명에 포함된 정보와 관계(`relation`)만 사용하여 회상 문장과 퀴즈를 작성하세요.
+
+예시 입력값:
+언제: 봄날
+어디서: 전주 한옥 마을에서
+어떻게: 내가 한복을
+무엇을: 입고
+가장 기억에 남는 것: 활짝 웃었다. 이 사진을 엄마가 이쁘다고 했다.
+라는 보기가 있다고 가정을 했을 때 여기서 엄마는 한옥에 갔는지 안 갔는지 모르니까 함부로 갔다고 집어 넣으면 안돼
+
+예시 (좋은 보기):
+1번. 오빠
+2번. 엄마
+3번. 마트 주인
+4번. 계곡 주인장
+
+예시 (❌ 피해야 할 보기):
+1번. 나
+2번. 너
+3번. 유타
+4번. 보호자
+
+"""
+
+REMINDER_REQUEST = """[이번 요청]
+- 환자 이름: {patient_name} (문장과 보기에 직접 쓰지 말 것)
+- 사진 설명: {photo_description}
+- 환자와 보호자의 관계: {relation} (이 관계를 호칭으로 사용)
+- 보호자의 말투 스타일: {tone}
+{terms_rule}
+"""
+
+TERMS_RULE_SELF = (
+    "- 먼저 사진 설명에 실제로 쓰인 '인물', '장소', '사물' 단어만 allowed_terms 로 뽑고, "
+    "그 단어들만 사용해서 회상 문장과 퀴즈를 만들어. ⚠️ 설명에 없는 단어는 allowed_terms 에 넣지 마."
+)
+TERMS_RULE_GIVEN = (
+    "- 다음 단어들만 사용해서 회상 문장과 퀴즈를 만들어. "
+    "⚠️ 이 단어들 외에 새로운 인물, 장소, 사물을 절대 넣지 마. 단어 목록: {terms}"
+)
+
+REMINDER = register(PromptTemplate(
+    "reminder", REMINDER_INSTRUCTIONS, REMINDER_REQUEST, trim_field="photo_description",
+    systems=tuple(SYSTEM_PROMPTS.values()),
+))
+
+# ---------- 용어 추출 ----------
+
+EXTRACT_TERMS = register(PromptTemplate(
+    "extract_terms",
+    """아래 설명에서 등장하는 '인물', '장소', '사물'만 뽑아 JSON 배열로 출력해.
+⚠️ 설명에 실제로 쓰인 단어만 넣어. 새로운 단어나 창작한 내용은 절대 넣지 마.
+⚠️ 반드시 JSON 배열로만 출력해. 다른 설명은 하지 마.
+
+출력 예시:
+["아버지", "바닷가", "모래성"]
+
+""",
+    '설명: "{photo_description}"\n',
+    budget=1000,
+    trim_field="photo_description",
+))
+
+# ---------- 누락 항목 보완 ----------
+
+REPAIR = register(PromptTemplate(
+    "repair",
+    """아래 이전 응답은 회상 문장과 퀴즈를 만든 결과인데, 일부 항목이 빠졌거나 형식이 잘못됐어.
+이전 응답의 내용과 어울리게, 빠진 항목만 아래 형식으로 다시 써줘. 다른 항목은 쓰지 마.
+
+형식:
+회상 문장: ...
+퀴즈 문제: ...
+선택지:
+1번. [보기1]
+2번. [보기2]
+3번. [보기3]
+4번. [보기4]
+정답: [번호]번. [정답 보기 텍스트]
+
+""",
+    "빠진 항목: {labels}\n{rules}\n이전 응답:\n{raw_output}\n",
+    trim_field="raw_output",
+))
+
+
+def reminder_messages(patient_name: str, photo_description: str, relation: str, tone: ToneEnum,
+                      allowed_terms=None, extra_system: str = None, model: str = "gpt-4") -> list:
+    """ [system(말투별, 고정), (system 추가 지시, 고정), user(고정 지시 + 요청 값)] """
+    terms_rule = TERMS_RULE_SELF if allowed_terms is None else TERMS_RULE_GIVEN.format(terms=allowed_terms)
+    messages = [{"role": "system", "content": SYSTEM_PROMPTS[tone]}]
+    if extra_system:
+        messages.append({"role": "system", "content": extra_system})
+    messages.append({"role": "user", "content": REMINDER.render(
+        model=model,
+        patient_name=patient_name,
+        photo_description=photo_description,
+        relation=relation,
+        tone=tone.value,
+        terms_rule=terms_rule,
+    )})
+    return messages
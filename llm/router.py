@@ -0,0 +1,237 @@
+# llm/router.py
+# ✅ 작업(task)별 모델 라우팅 + 타임아웃 폴백 + 헤지 요청 + 경로별 지연/비용 기록
+# - 경로마다 models 목록: 첫 번째가 기본, 실패/타임아웃/빈 결과면 다음 모델로 (마지막 모델 실패 시 예외 전달)
+# - "heuristic" 은 로컬 추출기 자리 (호출하는 쪽에서 local 함수로 넘김, 비용 0)
+# - hedge_after 초 안에 응답이 없으면 같은 모델로 한 번 더 보내고 먼저 온 응답을 쓴다 (꼬리 지연 완화, 비용 증가)
+# - LLM_ROUTES(JSON)로 경로별 값을 덮어쓴다. 예:
+#   {"generate": {"models": ["gpt-4o", "gpt-4o-mini"], "timeout": 20, "hedge_after": 8}}
+# - LLM_PRICES(JSON)로 모델 단가(USD / 1M 토큰, [입력, 출력])를 덮어쓴다
+import json
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field, replace
+from typing import List
+
+from core import metrics
+
+HEURISTIC = "heuristic"
+LLM_HEDGE_WORKERS = int(os.getenv("LLM_HEDGE_WORKERS", "8"))
+
+DEFAULT_PRICES = {
+    "gpt-4": (30.0, 60.0),
+    "gpt-4o": (2.5, 10.0),
+    "gpt-4o-mini": (0.15, 0.6),
+    "gpt-4.1": (2.0, 8.0),
+    "gpt-4.1-mini": (0.4, 1.6),
+    "text-embedding-3-small": (0.02, 0.0),
+}
+
+route_seconds = metrics.registry.histogram("llm_route_duration_seconds", "경로/모델별 LLM 호출 시간(초)")
+route_calls = metrics.registry.counter("llm_route_calls_total", "경로/모델별 호출 결과 (ok / empty / timeout / error)")
+route_cost = metrics.registry.counter("llm_cost_usd_total", "경로/모델별 추정 비용(USD)")
+route_hedges = metrics.registry.counter("llm_hedged_requests_total", "헤지 요청 (event: sent / primary_won / hedge_won)")
+
+
+class RouteTimeout(TimeoutError):
+    """ 헤지 포함 모든 시도가 timeout 안에 끝나지 않았을 때 """
+
+
+@dataclass
+class Route:
+    task: str
+    models: List[str] = field(default_factory=list)
+    timeout: float = 30.0       # 시도 1회(모델 1개) 기준 초
+    hedge_after: float = 0.0    # 0 이면 헤지 안 함
+
+
+def _load_json_env(name: str) -> dict:
+    raw = os.getenv(name, "")
+    if not raw:
+        return {}
+    try:
+        value = json.loads(raw)
+        return value if isinstance(value, dict) else {}
+    except json.JSONDecodeError:
+        print(f"⚠️ {name} JSON 파싱 실패, 기본값 사용")
+        return {}
+
+
+def _is_timeout(e: Exception) -> bool:
+    # openai.APITimeoutError / httpx 타임아웃 / RouteTimeout 모두 이름에 Timeout 이 들어간다
+    return isinstance(e, TimeoutError) or "Timeout" in type(e).__name__
+
+
+class ModelRouter:
+    def __init__(self, routes: dict, prices: dict = None):
+        overrides = _load_json_env("LLM_ROUTES")
+        self.routes = {}
+        for task, route in routes.items():
+            self.routes[task] = replace(route, **{k: v for k, v in overrides.get(task, {}).items()
+                                                  if k in ("models", "timeout", "hedge_after")})
+        self.prices = {**DEFAULT_PRICES, **(prices or {}),
+                       **{k: tuple(v) for k, v in _load_json_env("LLM_PRICES").items()}}
+        self._executor = None
+        self._lock = threading.Lock()
+
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=LLM_HEDGE_WORKERS, thread_name_prefix="llm-hedge")
+            return self._executor
+
+    def route(self, task: str) -> Route:
+        return self.routes[task]
+
+    def primary(self, task: str) -> str:
+        return self.routes[task].models[0]
+
+    # ---------- 비용 ----------
+
+    def cost(self, model: str, usage) -> float:
+        if usage is None or model not in self.prices:
+            return 0.0
+        input_price, output_price = self.prices[model]
+        prompt = getattr(usage, "prompt_tokens", 0) or 0
+        completion = getattr(usage, "completion_tokens", 0) or 0
+        return (prompt * input_price + completion * output_price) / 1_000_000
+
+    def record_usage(self, task: str, model: str, usage):
+        """ 토큰 사용량 + 추정 비용 기록 (call() / acall() 을 거치지 않는 임베딩 호출도 여기로) """
+        metrics.record_llm_usage(usage, model, task)
+        cost = self.cost(model, usage)
+        if cost:
+            route_cost.inc(cost, route=task, model=model)
+
+    # ---------- 호출 ----------
+
+    def _attempt(self, task: str, model: str, fn):
+        """ 시도 1회. 헤지로 버려지는 응답도 토큰은 쓰였으므로 여기서 사용량/비용 기록 """
+        start = time.perf_counter()
+        outcome = "ok"
+        try:
+            if model == HEURISTIC:
+                result = fn()
+                if not result:
+                    outcome = "empty"
+                return result
+            result, usage = fn()
+            self.record_usage(task, model, usage)
+            return result, usage
+        except Exception as e:
+            outcome = "timeout" if _is_timeout(e) else "error"
+            raise
+        finally:
+            route_seconds.observe(time.perf_counter() - start, route=task, model=model)
+            route_calls.inc(route=task, model=model, outcome=outcome)
+
+    def _hedged(self, route: Route, model: str, fn):
+        """ hedge_after 초 뒤에도 응답이 없으면 같은 요청을 하나 더 보내고 먼저 성공한 쪽 사용
+            (진 쪽은 취소할 수 없어서 끝날 때까지 백그라운드에서 돌고 결과는 버린다) """
+        primary = self.executor.submit(self._attempt, route.task, model, fn)
+        done, _ = wait([primary], timeout=route.hedge_after)
+        if done:
+            return primary.result()
+
+        hedge = self.executor.submit(self._attempt, route.task, model, fn)
+        route_hedges.inc(route=route.task, model=model, event="sent")
+        pending = {primary, hedge}
+        deadline = time.monotonic() + route.timeout
+        last_error = None
+        while pending:
+            done, pending = wait(pending, timeout=max(0.0, deadline - time.monotonic()), return_when=FIRST_COMPLETED)
+            if not done:
+                break
+            for future in done:
+                if future.exception() is None:
+                    route_hedges.inc(route=route.task, model=model,
+                                     event="hedge_won" if future is hedge else "primary_won")
+                    return future.result()
+                last_error = future.exception()
+        if last_error is not None and not pending:
+            raise last_error
+        raise RouteTimeout(f"{route.task}/{model} {route.timeout}초 안에 응답 없음")
+
+    def call(self, task: str, remote, local=None, models: list = None):
+        """ remote(model, timeout) → (결과, usage), local() → 결과 (None / 빈 값이면 다음 모델)
+            성공한 (결과, 모델) 반환. 모든 모델이 실패하면 마지막 예외를 다시 던진다 """
+        route = self.routes[task]
+        last_error = None
+        for model in models or route.models:
+            if model == HEURISTIC:
+                if local is None:
+                    continue
+                try:
+                    result = self._attempt(task, model, local)
+                except Exception as e:
+                    # 로컬 추출기 오류(kiwipiepy 등)도 원격 모델 실패와 같이 다음 모델로
+                    last_error = e
+                    print(f"⚠️ LLM {task} / {model} 실패 → 다음 모델로:", type(e).__name__, e)
+                    continue
+                if result:
+                    return result, model
+                continue
+
+            def fn(model=model):
+                return remote(model, route.timeout)
+
+            try:
+                if route.hedge_after > 0:
+                    result, usage = self._hedged(route, model, fn)
+                else:
+                    result, usage = self._attempt(task, model, fn)
+            except Exception as e:
+                last_error = e
+                print(f"⚠️ LLM {task} / {model} 실패 → 다음 모델로:", type(e).__name__, e)
+                continue
+            return result, model
+
+        if last_error is not None:
+            raise last_error
+        raise RuntimeError(f"{task}: 사용할 수 있는 모델이 없습니다.")
+
+    async def acall(self, task: str, remote, models: list = None):
+        """ call() 의 비동기판 (스트리밍용, 헤지 / 로컬 추출기 없음)
+            remote(model, timeout) 코루틴 → (결과, usage). 실패하면 다음 모델, 성공한 (결과, 모델) 반환 """
+        route = self.routes[task]
+        last_error = None
+        for model in models or route.models:
+            if model == HEURISTIC:
+                continue
+            start = time.perf_counter()
+            outcome = "ok"
+            try:
+                result, usage = await remote(model, route.timeout)
+                self.record_usage(task, model, usage)
+                return result, model
+            except Exception as e:
+                outcome = "timeout" if _is_timeout(e) else "error"
+                last_error = e
+                print(f"⚠️ LLM {task} / {model} 실패 → 다음 모델로:", type(e).__name__, e)
+            finally:
+                route_seconds.observe(time.perf_counter() - start, route=task, model=model)
+                route_calls.inc(route=task, model=model, outcome=outcome)
+
+        if last_error is not None:
+            raise last_error
+        raise RuntimeError(f"{task}: 사용할 수 있는 모델이 없습니다.")
+
+    def stats(self) -> dict:
+        """ 경로/모델별 지연(p50/p95/p99), 호출 결과, 누적 비용 (/llm/routes) """
+        cost = {",".join(v for _, v in key): round(value, 6) for key, value in route_cost._values.items()}
+        calls = {",".join(v for _, v in key): value for key, value in route_calls._values.items()}
+        return {
+            "routes": {task: {"models": r.models, "timeout": r.timeout, "hedge_after": r.hedge_after}
+                       for task, r in self.routes.items()},
+            "latency": route_seconds.summary(),
+            "calls": calls,
+            "cost_usd": cost,
+        }
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
@@ -0,0 +1,91 @@
+# llm/terms.py
+# ✅ 사진 설명에서 허용 용어(명사)를 LLM 호출 없이 뽑는 로컬 추출기
+# - kiwipiepy 가 설치돼 있으면 형태소 분석으로 일반/고유 명사(NNG/NNP)와 외국어(SL)
+# - 없으면 어절 끝 조사를 떼고, 용언 어미로 끝나는 어절은 버리는 규칙 기반 추출
+# 뽑힌 용어는 항상 설명에 그대로 나오는 문자열이라 find_term_violations 검사를 통과한다.
+import os
+import re
+
+TERMS_MAX = int(os.getenv("LLM_TERMS_MAX", "8"))
+NOUN_TAGS = ("NNG", "NNP", "SL")
+
+_word_re = re.compile(r"[가-힣A-Za-z0-9]+")
+
+# 긴 것부터 떼어야 "에서" 가 "서" 보다 먼저 잡힌다
+JOSA = sorted((
+    "이랑", "에서", "에게", "한테", "께서", "까지", "부터", "처럼", "보다", "으로", "이나", "이며", "이고",
+    "은", "는", "이", "가", "을", "를", "에", "의", "와", "과", "도", "로", "랑", "만", "나",
+), key=len, reverse=True)
+
+# 동사/형용사 활용형 끝 (이걸로 끝나는 어절은 명사가 아님)
+VERB_ENDINGS = (
+    "했다", "였다", "했던", "하던", "하는", "하고", "하며", "해서", "했고", "있는", "있던", "있었", "없는",
+    "었다", "았다", "었던", "았던", "었고", "았고", "는데", "면서", "지만", "니다", "어요", "아요", "해요",
+    "세요", "하기", "던", "다", "며", "고", "요", "죠",
+)
+# 조사를 떼지 못했는데 이걸로 끝나면 관형형 어미("남는", "쌓은", "고요한")로 본다
+MODIFIER_ENDINGS = ("는", "은", "을", "를", "한")
+# 조사를 뗀 뒤 과거 시제 어간("무너뜨렸을" → "무너뜨렸")이 남으면 버린다
+PAST_STEMS = ("었", "았", "였", "했", "렸", "웠", "겠")
+
+STOPWORDS = {
+    "그날", "그때", "이날", "오늘", "어제", "함께", "같이", "정말", "너무", "아주", "가장", "모두", "우리",
+    "그리고", "그래서", "하지만", "기억", "순간", "사진", "때", "것", "수", "등", "곳", "날",
+}
+
+_kiwi = None
+
+
+def _kiwi_tokenizer():
+    global _kiwi
+    if _kiwi is None:
+        try:
+            from kiwipiepy import Kiwi
+            _kiwi = Kiwi()
+        except ImportError:
+            _kiwi = False
+    return _kiwi or None
+
+
+def _strip_josa(word: str) -> str:
+    for josa in JOSA:
+        if word.endswith(josa) and len(word) - len(josa) >= 2:
+            return word[: -len(josa)]
+    return word
+
+
+def _rule_based(text: str) -> list:
+    terms = []
+    for word in _word_re.findall(text):
+        if any(c.isdigit() for c in word) or word.endswith(VERB_ENDINGS):
+            continue
+        stem = _strip_josa(word)
+        if (stem == word and word.endswith(MODIFIER_ENDINGS)) or stem.endswith(PAST_STEMS):
+            continue
+        terms.append(stem)
+    return terms
+
+
+def _morph_based(kiwi, text: str) -> list:
+    terms = []
+    for token in kiwi.tokenize(text):
+        if token.tag in NOUN_TAGS:
+            terms.append(token.form)
+    return terms
+
+
+def extract_nouns(text: str, limit: int = TERMS_MAX) -> list:
+    """ 설명에 나온 순서대로, 중복 없이 최대 limit 개 (두 글자 미만 / 불용어 제외) """
+    kiwi = _kiwi_tokenizer()
+    candidates = _morph_based(kiwi, text) if kiwi else _rule_based(text)
+    compact = text.replace(" ", "")
+    seen = set()
+    terms = []
+    for term in candidates:
+        if len(term) < 2 or term in STOPWORDS or term in seen or term not in compact:
+            continue
+        seen.add(term)
+        terms.append(term)
+        if len(terms) >= limit:
+            break
+    return terms
@@ -1,72 +1,193 @@
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException
+from fastapi import Request
+from fastapi.responses import JSONResponse, StreamingResponse, Response
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
-from firebase.firebase_init import bucket
-from firebase_admin import firestore, storage
-from uuid import uuid4
+from firebase.firebase_init import db, repository
+from firebase.repository import FIRESTORE_BATCH_LIMIT
+from firebase_admin import firestore
+from contextlib import asynccontextmanager
+from core.resources import resources, storage
+from core.storage import LocalStorage
+from fastapi.staticfiles import StaticFiles
 import os
+import asyncio
+import time
 import traceback
-from enums import ToneEnum
-from llm.gpt_client import generate_reminder
-from scripts.register_voice import register_voice
-from voicefixer import VoiceFixer
-import subprocess
-import torchaudio
-import torchaudio.transforms as T
-import re
-from tts.elevenlabs_client import text_to_speech, create_voice, process_audio_speed
+from enums import ToneEnum, TopicEnum
+from llm.gpt_client import generate_reminder, reminder_cache, stream_reminder, LLM_STREAMING, router as llm_router
+from scripts.register_voice import ensure_voice, find_existing_voice, clean_voice_audio, clone_voice, voice_registry
+from audio.fingerprint import VoiceFingerprint
+from jobs.store import make_job_store
+from jobs.pipeline import JobPipeline, job_status
+from jobs.prefetch import PrefetchScheduler
+from dataclasses import asdict
+from typing import List, Optional
+from core.ratelimit import TokenBucket
+from scripts.register_voice import router as register_voice_router
+from audio.preprocess import AudioDecodeError
+from audio.ingest import read_upload
+from core import admission, metrics, pool
+from tts.elevenlabs_client import STREAM_OUTPUT_FORMAT, text_to_speech_async
+from tts.streaming import stream_speech
+from tts.cache import TTSCache, cache_key
 from enum import Enum
 from llm.gpt_client import generate_reminder_simple
+from llm.parser import ReminderParseError, ReminderResult
 # 아래에서 generate_reminder 대신 generate_reminder_simple 호출
 
 
-app = FastAPI()
+# ✅ 워커 프로세스 시작 시 CPU 풀을 띄우고 VoiceFixer / VAD 모델 미리 로드 (AUDIO_WARMUP=0 인 텍스트 전용 워커는 생략),
+#    종료 시 백그라운드 작업 / 커넥션 풀 / 워커 풀 정리
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    async with resources.lifespan(app):
+        app.state.warmup_task = asyncio.create_task(pool.warm_cpu_pool())
+        await job_pipeline.start(make_job_store(db, storage))
+        prefetcher.start()
+        try:
+            yield
+        finally:
+            await prefetcher.stop()
+            await job_pipeline.stop()
+            job_pipeline.store.close()
+            await repository.close()     # 모아 둔 쓰기 커밋 + 스냅샷 리스너 해제
+            pool.shutdown()
+            llm_router.shutdown()
 
-db = firestore.client()
-bucket = storage.bucket()
 
-# ✅ 고급 전처리 함수: VoiceFixer + VAD + mp3 변환
+app = FastAPI(lifespan=lifespan)
+app.include_router(register_voice_router)
 
-def preprocess_for_elevenlabs(input_mp3: str) -> str:
-    def mp3_to_wav(mp3_path: str) -> str:
-        wav_path = mp3_path.replace(".mp3", ".wav")
-        subprocess.run(["ffmpeg", "-y", "-i", mp3_path, wav_path], check=True)
-        return wav_path
+tts_cache = TTSCache(storage)
 
-    def apply_voicefixer(wav_path: str) -> str:
-        vf = VoiceFixer()
-        cleaned_wav = wav_path.replace(".wav", "_vf.wav")
-        vf.restore(input=wav_path, output=cleaned_wav, cuda=False, mode=1)
-        return cleaned_wav
+# ✅ 로컬 저장소 모드(STORAGE_BACKEND=local)에서는 local_backup/ 을 정적 파일로 서빙
+if isinstance(resources.storage, LocalStorage):
+    os.makedirs(resources.storage.root, exist_ok=True)
+    app.mount(resources.storage.base_url, StaticFiles(directory=resources.storage.root), name="local_backup")
 
-    def apply_vad(wav_path: str) -> str:
-        waveform, sample_rate = torchaudio.load(wav_path)
-        vad = T.Vad(sample_rate=sample_rate)
-        voiced = vad(waveform)
-        voiced_path = wav_path.replace(".wav", "_vad.wav")
-        torchaudio.save(voiced_path, voiced, sample_rate)
-        return voiced_path
+# ✅ 요청별 처리 시간 (라우트 템플릿 기준이라 /jobs/{job_id} 도 한 줄로 모임)
+http_seconds = metrics.registry.histogram("http_request_duration_seconds", "HTTP 요청 처리 시간(초)")
 
-    def to_final_mp3(wav_path: str) -> str:
-        mp3_path = wav_path.replace(".wav", "_final.mp3")
-        subprocess.run([
-            "ffmpeg", "-y", "-i", wav_path,
-            "-af", "highpass=f=300, lowpass=f=3000",
-            "-ar", "22050", "-ac", "1", "-b:a", "64k",
-            mp3_path
-        ], check=True)
-        return mp3_path
+@app.middleware("http")
+async def record_request_metrics(request: Request, call_next):
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        path = getattr(route, "path", "unmatched")
+        http_seconds.observe(time.perf_counter() - start, method=request.method, path=path, status=status)
+
+@app.get("/metrics")
+def metrics_endpoint():
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
+
+metrics.register_collector(lambda: metrics.registry.gauge("llm_cache_entries", "LLM 응답 캐시 항목 수")
+                           .set(reminder_cache.stats().get("entries", 0)))
+
+# ✅ 로드밸런서용 readiness 체크: 음성 모델을 미리 로드하는 워커는 로드 전까지 503
+@app.get("/ready")
+def ready():
+    status = {"ready": pool.cpu_ready(), "audio_warmup": pool.AUDIO_WARMUP, "pools": pool.stats()}
+    if not status["ready"]:
+        return JSONResponse(status_code=503, content=status)
+    return status
+
+@metrics.timed("tts.synthesize_and_upload")
+async def synthesize_and_upload(text: str, voice_id: str, priority: str = admission.INTERACTIVE) -> str:
+    """ TTS(속도 0.83 적용) → Storage 업로드 후 공개 URL 반환 (같은 입력이면 캐시 URL 재사용) """
+    async def synthesize():
+        return await text_to_speech_async(text, voice_id, speed=0.83, priority=priority)
+
+    return await tts_cache.get_or_create(text, voice_id, synthesize, speed=0.83)
+
+async def run_llm(fn, priority: str = admission.INTERACTIVE, **kwargs):
+    """ LLM 호출(블로킹)을 llm_gate 슬롯 안에서 io_pool 로 실행 """
+    async with admission.llm_gate.slot(priority):
+        return await pool.io_pool.run(fn, **kwargs)
+
+async def generate_and_synthesize(voice_id: str, **kwargs):
+    """ 회상 문장 + 퀴즈 생성 후 두 mp3 생성 → (ReminderResult, reminder_url, quiz_url)
+        LLM_STREAMING 이면 "회상 문장:" 줄이 나오자마자 회상 TTS 를 시작하고 퀴즈 생성과 겹친다 """
+    if not LLM_STREAMING:
+        result = await run_llm(generate_reminder, **kwargs)
+        reminder_url, quiz_url = await asyncio.gather(
+            synthesize_and_upload(result.reminder_text, voice_id),
+            synthesize_and_upload(result.quiz_speech_text(), voice_id),
+        )
+        return result, reminder_url, quiz_url
 
-    wav = mp3_to_wav(input_mp3)
-    cleaned = apply_voicefixer(wav)
-    voiced = apply_vad(cleaned)
-    final_mp3 = to_final_mp3(voiced)
+    early = {}
 
-    # cleanup
-    for path in [wav, cleaned, voiced]:
-        try: os.remove(path)
-        except: pass
+    def on_reminder(text: str):
+        early["text"] = text
+        early["task"] = asyncio.create_task(synthesize_and_upload(text, voice_id))
 
-    return final_mp3
+    try:
+        async with admission.llm_gate.slot():
+            result = await stream_reminder(on_reminder=on_reminder, **kwargs)
+
+        reminder_task = early.get("task")
+        if reminder_task is None or early["text"] != result.reminder_text:
+            # 보완(repair) 등으로 최종 문장이 달라졌으면 버리고 다시 생성
+            if reminder_task is not None:
+                reminder_task.cancel()
+            print("⚠️ 미리 시작한 회상 TTS 를 쓸 수 없어 다시 생성")
+            reminder_task = asyncio.create_task(synthesize_and_upload(result.reminder_text, voice_id))
+            early["task"] = reminder_task
+
+        quiz_url = await synthesize_and_upload(result.quiz_speech_text(), voice_id)
+        reminder_url = await reminder_task
+        return result, reminder_url, quiz_url
+    except BaseException:
+        task = early.get("task")
+        if task is not None and not task.done():
+            task.cancel()
+        raise
+
+@app.get("/admission/stats")
+def admission_stats():
+    return admission.stats()
+
+@app.get("/llm/routes")
+def llm_routes():
+    # 경로/모델별 지연, 폴백 횟수, 추정 비용 (모델 배분 조정용)
+    return llm_router.stats()
+
+@app.get("/tts-cache/stats")
+def tts_cache_stats():
+    return tts_cache.stats()
+
+async def resolve_relationship(user_id: str, relationship: str) -> str:
+    """ Form으로 받은 relationship을 우선 사용하고, 비어 있으면 Firestore 프로필 (캐시) fallback """
+    if relationship:
+        return relationship
+    return await pool.io_pool.run(repository.relationship, user_id)
+
+# ✅ 생성에 쓴 원본 입력도 reminder 문서에 남겨 둔다 → 프리페치가 같은 주제의 설명으로 새 문장 생성 (jobs/prefetch.py)
+DEFAULT_TOPIC = TopicEnum.행복했던기억   # 주제를 고르지 않은 요청
+
+def source_fields(topic: Optional[TopicEnum], photo_description: str, relationship: str) -> dict:
+    return {
+        "topic": (topic or DEFAULT_TOPIC).value,
+        "photo_description": photo_description,
+        "relationship": relationship,
+    }
+
+@app.get("/reminders/history")
+async def reminder_history(guardian_uid: str, page_size: int = 20, cursor: str = None):
+    """ 회상 문장 기록 (최근 것부터). 응답의 next_cursor 를 다음 요청의 cursor 로 """
+    admission.check_guardian(guardian_uid)
+    items, next_cursor = await pool.io_pool.run(repository.list_reminders, guardian_uid, page_size, cursor)
+    return {"items": items, "next_cursor": next_cursor}
+
+@app.get("/repository/stats")
+def repository_stats():
+    return repository.stats()
 
 class ReminderInput(BaseModel):
     patient_name: str
@@ -76,6 +197,68 @@ class ReminderInput(BaseModel):
 class TTSRequest(BaseModel):
     text: str
     voice_id: str
+    guardian_uid: str
+
+# ✅ 스트리밍 TTS: 합성되는 대로 속도 조절된 mp3 청크를 바로 내려주고,
+#    같은 바이트는 스트림이 끝난 뒤 백그라운드로 TTS 캐시(tts_cache/ + 로컬 디스크)에 저장
+#    같은 문장이 로컬 캐시에 있으면 합성 없이 저장된 바이트를 그대로 내려준다
+@app.post("/tts-stream")
+async def tts_stream(req: TTSRequest):
+    admission.check_guardian(req.guardian_uid)
+    # 스트림은 저비트레이트 포맷이라 일반 합성 결과와 다른 키 (/generate-and-read 가 저음질 파일을 받지 않도록)
+    key = cache_key(req.text, req.voice_id, speed=0.83, output_format=STREAM_OUTPUT_FORMAT)
+    blob_path = tts_cache.blob_path(key)
+
+    cached = await tts_cache.read_local(key)
+    if cached is not None:
+        audio_url = await storage.url_async(blob_path)
+        return Response(content=cached, media_type="audio/mpeg", headers={"X-Audio-Url": audio_url})
+
+    token = storage.new_token()
+    audio_url = await storage.url_async(blob_path, token=token)
+
+    chunks = []
+    completed = False
+    stream = stream_speech(req.text, req.voice_id, speed=0.83)
+
+    # 첫 청크를 미리 받아서, TTS 자체가 실패하면 200 대신 에러 코드로 응답
+    try:
+        first_chunk = await stream.__anext__()
+    except StopAsyncIteration:
+        raise HTTPException(status_code=502, detail="TTS 스트림이 비어 있습니다.")
+    except HTTPException:
+        # 503(TTS 슬롯 대기 초과) 은 그대로 전달
+        raise
+    except Exception as e:
+        traceback.print_exc()
+        raise HTTPException(status_code=502, detail=str(e))
+
+    async def body():
+        nonlocal completed
+        try:
+            chunks.append(first_chunk)
+            yield first_chunk
+            async for chunk in stream:
+                chunks.append(chunk)
+                yield chunk
+            completed = True
+        finally:
+            # 클라이언트가 끊어도 TTS 슬롯이 바로 반환되도록
+            await stream.aclose()
+
+    async def upload_when_done():
+        if not completed:
+            print("⚠️ 스트림이 중간에 끊겨 업로드를 건너뜀:", blob_path)
+            return
+        await tts_cache.put(key, b"".join(chunks), token)
+        print("✅ 스트리밍 TTS 업로드 완료:", blob_path)
+
+    return StreamingResponse(
+        body(),
+        media_type="audio/mpeg",
+        headers={"X-Audio-Url": audio_url},
+        background=BackgroundTask(upload_when_done),
+    )
 
 @app.post("/generate-and-read")
 async def generate_and_read(
@@ -85,145 +268,76 @@ async def generate_and_read(
     patient_name: str = Form(...),
     photo_description: str = Form(...),
     relationship: str = Form(...),
-    tone: ToneEnum = Form(...)
+    tone: ToneEnum = Form(...),
+    topic: Optional[TopicEnum] = Form(None),
 ):
     try:
         user_id = guardian_uid
+        admission.check_guardian(user_id)
 
-        # ✅ Form으로 받은 relationship을 우선 사용하고, 비어 있으면 Firestore fallback
-        if not relationship:
-            profile_doc = db.collection("users").document(user_id).collection("profile").document("info").get()
-            if profile_doc.exists:
-                relationship = profile_doc.to_dict().get("relationship", "보호자")
-            else:
-                relationship = "어르신"
+        relationship = await resolve_relationship(user_id, relationship)
 
-        # 1. 보호자 음성 등록
-        temp_filename = f"temp_{uuid4().hex}.mp3"
-        with open(temp_filename, "wb") as buffer:
-            buffer.write(await file.read())
+        # 1. 보호자 음성 등록 (같은 음성이면 전처리/클로닝 없이 기존 voice_id 재사용)
+        upload = await read_upload(file)
+        voice_id, voice_reused = await ensure_voice(user_id, name, upload.data, content_hash=upload.sha256)
 
-        cleaned_path = preprocess_for_elevenlabs(temp_filename)
-
-        cleaned_blob = bucket.blob(f"cleaned_voice/{user_id}/{os.path.basename(cleaned_path)}")
-        cleaned_blob.upload_from_filename(cleaned_path)
-
-        voice_id = register_voice(cleaned_path, name, guardian_uid=user_id)
-
-        os.remove(temp_filename)
-        try:
-            os.remove(cleaned_path)
-        except FileNotFoundError:
-            print(f"파일 삭제 실패: {cleaned_path}")
-
-        # 2. 회상 문장 및 퀴즈 생성
-        result = generate_reminder(
+        # 2~4. 회상 문장 및 퀴즈 생성 → mp3 생성 + Firebase 업로드
+        # ✅ 스트리밍이면 회상 문장 TTS 가 퀴즈 생성과 겹쳐서 진행됨
+        result, reminder_url, quiz_url = await generate_and_synthesize(
+            voice_id,
             patient_name=patient_name,
             photo_description=photo_description,
             relation=relationship,
-            tone=tone
+            tone=tone,
+            namespace=user_id,
         )
-
-        print("🧠 GPT 응답 결과:\n", result)
-
-        # 파싱
-        reminder_text = ""
-        quiz_question = ""
-        quiz_options = []
-        quiz_answer = ""
-        capture_options = False
-
-        for line in result.strip().splitlines():
-            line = line.strip()
-            if line.startswith("회상 문장:"):
-                reminder_text = line.split("회상 문장:")[1].strip()
-            elif line.startswith("퀴즈 문제:"):
-                quiz_question = line.split("퀴즈 문제:")[1].strip()
-            elif line.startswith("선택지:"):
-                capture_options = True
-            elif line.startswith("정답:"):
-                capture_options = False
-                raw = line.split("정답:")[1].strip()
-                match = re.match(r"\d+번[.,]?\s*(.+)", raw)
-                if match:
-                    quiz_answer = match.group(1).strip()
-                else:
-                    quiz_answer = raw  # 혹시 포맷이 달라도 대비
-            elif capture_options:
-                match = re.match(r"\d+번[.,]?\s*(.+)", line)
-                if match:
-                    quiz_options.append(match.group(1).strip())
-
-        print("🎯 파싱된 선택지 목록:", quiz_options)
-
-        # 3. mp3 생성
-        reminder_mp3 = f"reminder_{uuid4().hex}.mp3"
-        text_to_speech(reminder_text, voice_id, reminder_mp3)
-        process_audio_speed(reminder_mp3, reminder_mp3, speed=0.83)
-
-        readable_nums = {1: "첫 번째", 2: "두 번째", 3: "세 번째", 4: "네 번째"}
-        options_text = "\n".join([
-            f"{readable_nums[i+1]}, {opt}" for i, opt in enumerate(quiz_options)
-        ])
-        quiz_text = f"{quiz_question}\n{options_text}"
-
-        quiz_mp3 = f"quiz_{uuid4().hex}.mp3"
-        text_to_speech(quiz_text, voice_id, quiz_mp3)
-        process_audio_speed(quiz_mp3, quiz_mp3, speed=0.83)
-
-        # 4. Firebase 업로드
-        reminder_blob = bucket.blob(f"tts/{user_id}/{reminder_mp3}")
-        reminder_blob.upload_from_filename(reminder_mp3)
-        reminder_url = f"https://storage.googleapis.com/{bucket.name}/tts/{user_id}/{reminder_mp3}"
-
-        quiz_blob = bucket.blob(f"tts/{user_id}/{quiz_mp3}")
-        quiz_blob.upload_from_filename(quiz_mp3)
-        quiz_url = f"https://storage.googleapis.com/{bucket.name}/tts/{user_id}/{quiz_mp3}"
+        print("🎯 파싱된 선택지 목록:", result.quiz_options)
 
         # 5. Firestore 저장
-        print("📝 정답 내용 확인:", quiz_answer)
-
-        if not quiz_answer:
-            raise HTTPException(status_code=400, detail="GPT 응답에 퀴즈 정답이 없습니다.")
+        print("📝 정답 내용 확인:", result.answer_text)
 
         doc_data = {
-            "reminder_text": reminder_text,
-            "quiz_question": quiz_question,
-            "quiz_options": quiz_options,
-            "quiz_answer": quiz_answer,
+            "reminder_text": result.reminder_text,
+            "quiz_question": result.quiz_question,
+            "quiz_options": result.quiz_options,
+            "quiz_answer": result.answer_text,
+            "quiz_answer_index": result.answer_index,
             "tts_url": reminder_url,
             "quiz_tts_url": quiz_url,
             "voice_id": voice_id,
             "created_at": firestore.SERVER_TIMESTAMP,
+            **source_fields(topic, photo_description, relationship),
         }
-        res= db.collection("users").document(user_id).collection("reminders").add(doc_data)
-        print("✅ Firestore 저장 완료:", res)
-
-        # 6. 정리
-        os.remove(reminder_mp3)
-        os.remove(quiz_mp3)
+        with metrics.span("firestore.write", kind="reminder"):
+            doc_id = await repository.add_reminder(user_id, doc_data)
+        print("✅ Firestore 저장 완료:", doc_id)
 
         return {
             "message": "회상 문장 + 퀴즈 + mp3 + 저장 완료",
-            "reminder": reminder_text,
-            "question": quiz_question,
+            "reminder": result.reminder_text,
+            "question": result.quiz_question,
             "tts_url": reminder_url,
             "quiz_tts_url": quiz_url,
+            "voice_reused": voice_reused,
         }
 
+    except HTTPException:
+        # 503(풀 포화), 400(파싱 실패) 등은 그대로 전달
+        raise
+    except ReminderParseError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except AudioDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"음성 파일을 읽을 수 없습니다: {e}")
     except Exception as e:
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
 #=======================================================================
-class TopicEnum(str, Enum):
-    가족 = "가족"
-    여행 = "여행"
-    학창시절 = "학창시절"
-    동네 = "동네"
-    행복했던기억 = "환자가 행복했던 기억"
+# guardian_uid 없이 호출하던 기존 클라이언트는 예전처럼 공용 사용자 문서에 저장 (보호자별 속도 제한 없음)
+GENERATE_ONLY_DEFAULT_UID = "test_user"
 
 @app.post("/generate-only")
 async def generate_only(
+    guardian_uid: Optional[str] = Form(None),
     topic: TopicEnum = Form(...),          # ✅ 선택
     when: str = Form(...),                # ✅ 언제
     where: str = Form(...),               # ✅ 어디서
@@ -233,7 +347,9 @@ async def generate_only(
     relationship: str = Form(...),        # ✅ 관계
 ):
     try:
-        user_id = "test_user"
+        user_id = guardian_uid or GENERATE_ONLY_DEFAULT_UID
+        if guardian_uid:
+            admission.check_guardian(guardian_uid)
 
         # ✅ description에 모두 포함
         combined_description = (
@@ -242,61 +358,339 @@ async def generate_only(
         )
 
         # LLM 호출
-        result = generate_reminder_simple(
+        result = await run_llm(
+            generate_reminder_simple,
             photo_description=combined_description,
-            relation=relationship
-        ) 
-
-        print("🧠 GPT 응답 결과:\n", result)
-
-        # ✅ 파싱
-        reminder_text = ""
-        quiz_question = ""
-        quiz_options = []
-        quiz_answer = ""
-        capture_options = False
-
-        for line in result.strip().splitlines():
-            line = line.strip()
-            if line.startswith("회상 문장:"):
-                reminder_text = line.split("회상 문장:")[1].strip()
-            elif line.startswith("퀴즈 문제:"):
-                quiz_question = line.split("퀴즈 문제:")[1].strip()
-            elif line.startswith("선택지:"):
-                capture_options = True
-            elif line.startswith("정답:"):
-                capture_options = False
-                raw = line.split("정답:")[1].strip()
-                m_num = re.match(r"(\d+)번", raw)
-                quiz_answer = m_num.group(1) if m_num else raw
-            elif capture_options:
-                match = re.match(r"\d+번[.,]?\s*(.+)", line)
-                if match:
-                    quiz_options.append(match.group(1).strip())
-
-        if not quiz_answer:
-            raise HTTPException(status_code=400, detail="GPT 응답에 퀴즈 정답이 없습니다.")
+            relation=relationship,
+            namespace=user_id,
+        )
 
         # ✅ Firestore 저장
         doc_data = {
-            "topic": topic.value,
-            "reminder_text": reminder_text,
-            "quiz_question": quiz_question,
-            "quiz_options": quiz_options,
-            "quiz_answer": quiz_answer,
+            **source_fields(topic, combined_description, relationship),
+            "reminder_text": result.reminder_text,
+            "quiz_question": result.quiz_question,
+            "quiz_options": result.quiz_options,
+            "quiz_answer": result.answer_text,        # 다른 엔드포인트와 같이 정답 보기 텍스트 (번호는 quiz_answer_index)
+            "quiz_answer_index": result.answer_index,
             "created_at": firestore.SERVER_TIMESTAMP,
         }
-        db.collection("users").document(user_id).collection("reminders").add(doc_data)
+        with metrics.span("firestore.write", kind="reminder"):
+            await repository.add_reminder(user_id, doc_data)
 
         # ✅ 응답
         return {
             "topic": topic.value,
-            "reminder": reminder_text,
-            "question": quiz_question,
-            "options": quiz_options,
-            "answer": quiz_answer
+            "reminder": result.reminder_text,
+            "question": result.quiz_question,
+            "options": result.quiz_options,
+            "answer": result.answer_text,
+            "answer_index": result.answer_index,
         }
 
+    except HTTPException:
+        # 503(풀 포화), 400(파싱 실패) 등은 그대로 전달
+        raise
+    except ReminderParseError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
+
+#=======================================================================
+# ✅ 비동기 작업 모드: 제출 즉시 job_id 반환 → 백그라운드에서 단계별 실행 → GET /jobs/{id} 로 조회
+#    기다리는 사용자가 없으므로 모든 단계가 BACKGROUND 슬롯 (대화형 요청에 양보, 입장 대기 시간 제한 없음)
+async def _stage_preprocess(ctx):
+    raw_audio = await ctx.get_blob("raw")
+    existing, fingerprint = await find_existing_voice(ctx.data["guardian_uid"], raw_audio,
+                                                      content_hash=ctx.data.get("content_hash", ""))
+    if existing:
+        return {"voice_id": existing, "voice_reused": True}
+    # 새 음성이면 보호자별 음성 업로드 한도 적용 (초과 시 429 로 작업 실패)
+    cleaned_audio = await clean_voice_audio(ctx.data["guardian_uid"], raw_audio, priority=admission.BACKGROUND)
+    await ctx.put_blob("cleaned", cleaned_audio)
+    return {"fingerprint": fingerprint.to_dict(), "voice_reused": False}
+
+async def _stage_clone(ctx):
+    if ctx.data.get("voice_id"):
+        return {}
+    cleaned_audio = await ctx.get_blob("cleaned")
+    fingerprint = VoiceFingerprint.from_dict(ctx.data["fingerprint"])
+    voice_id = await clone_voice(ctx.data["guardian_uid"], ctx.data["name"], cleaned_audio, fingerprint)
+    return {"voice_id": voice_id}
+
+async def _stage_generate(ctx):
+    user_id = ctx.data["guardian_uid"]
+    relationship = await resolve_relationship(user_id, ctx.data.get("relationship"))
+    result = await run_llm(
+        generate_reminder,
+        priority=admission.BACKGROUND,
+        patient_name=ctx.data["patient_name"],
+        photo_description=ctx.data["photo_description"],
+        relation=relationship,
+        tone=ToneEnum(ctx.data["tone"]),
+        namespace=user_id,
+    )
+    return {"relationship": relationship, "reminder": asdict(result)}
+
+async def _stage_synthesize(ctx):
+    result = ReminderResult(**ctx.data["reminder"])
+    reminder_url, quiz_url = await asyncio.gather(
+        synthesize_and_upload(result.reminder_text, ctx.data["voice_id"], admission.BACKGROUND),
+        synthesize_and_upload(result.quiz_speech_text(), ctx.data["voice_id"], admission.BACKGROUND),
+    )
+    return {"tts_url": reminder_url, "quiz_tts_url": quiz_url}
+
+async def _stage_publish(ctx):
+    result = ReminderResult(**ctx.data["reminder"])
+    user_id = ctx.data["guardian_uid"]
+    doc_data = {
+        "reminder_text": result.reminder_text,
+        "quiz_question": result.quiz_question,
+        "quiz_options": result.quiz_options,
+        "quiz_answer": result.answer_text,
+        "quiz_answer_index": result.answer_index,
+        "tts_url": ctx.data["tts_url"],
+        "quiz_tts_url": ctx.data["quiz_tts_url"],
+        "voice_id": ctx.data["voice_id"],
+        "created_at": firestore.SERVER_TIMESTAMP,
+        **source_fields(TopicEnum(ctx.data["topic"]) if ctx.data.get("topic") else None,
+                        ctx.data["photo_description"], ctx.data["relationship"]),
+    }
+    # 문서 id = job_id → 저장 후 단계 완료 기록 전에 워커가 죽어 다시 실행돼도 문서는 하나
+    doc_id = await repository.add_reminder(user_id, doc_data, doc_id=ctx.job_id)
+    return {
+        "reminder_doc_id": doc_id,
+        "result": {
+            "reminder": result.reminder_text,
+            "question": result.quiz_question,
+            "tts_url": ctx.data["tts_url"],
+            "quiz_tts_url": ctx.data["quiz_tts_url"],
+            "voice_reused": ctx.data.get("voice_reused", False),
+        },
+    }
+
+# 작업 저장소는 lifespan 에서 생성 (import 만으로 jobs.sqlite3 를 만들지 않도록)
+job_pipeline = JobPipeline(None, {
+    "preprocess": _stage_preprocess,
+    "clone": _stage_clone,
+    "generate": _stage_generate,
+    "synthesize": _stage_synthesize,
+    "publish": _stage_publish,
+})
+
+@app.post("/jobs/generate-and-read", status_code=202)
+async def submit_generate_and_read(
+    guardian_uid: str = Form(...),
+    name: str = Form(...),
+    file: UploadFile = File(...),
+    patient_name: str = Form(...),
+    photo_description: str = Form(...),
+    relationship: str = Form(...),
+    tone: ToneEnum = Form(...),
+    topic: Optional[TopicEnum] = Form(None),
+):
+    admission.check_guardian(guardian_uid)
+    # 잘못된 파일은 작업을 만들기 전에 거절 (blob 업로드 비용 없음)
+    upload = await read_upload(file)
+    payload = {
+        "guardian_uid": guardian_uid,
+        "name": name,
+        "patient_name": patient_name,
+        "photo_description": photo_description,
+        "relationship": relationship,
+        "tone": tone.value,
+        "topic": topic.value if topic else None,
+        "content_hash": upload.sha256,
+    }
+    job = await job_pipeline.submit(payload, blobs={"raw": upload.data})
+    return {"job_id": job["job_id"], "status_url": f"/jobs/{job['job_id']}"}
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = await pool.io_pool.run(job_pipeline.store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다.")
+    return job_status(job)
+
+@app.post("/jobs/{job_id}/retry")
+async def retry_job(job_id: str):
+    job = await job_pipeline.retry(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다.")
+    return job_status(job)
+
+#=======================================================================
+# ✅ 앨범 단위 일괄 생성: LLM 호출을 동시성/속도 제한 안에서 병렬로, 저장은 Firestore batch 한 번
+BATCH_MAX_ITEMS = int(os.getenv("BATCH_MAX_ITEMS", "50"))
+BATCH_LLM_CONCURRENCY = int(os.getenv("BATCH_LLM_CONCURRENCY", "4"))
+BATCH_LLM_RATE_PER_SEC = float(os.getenv("BATCH_LLM_RATE_PER_SEC", "2"))   # 0 이면 속도 제한 없음 (동시성 제한만)
+
+batch_llm_bucket = (TokenBucket(rate=BATCH_LLM_RATE_PER_SEC, burst=BATCH_LLM_CONCURRENCY)
+                    if BATCH_LLM_RATE_PER_SEC > 0 else None)
+
+class BatchReminderRequest(BaseModel):
+    guardian_uid: str
+    patient_name: str = ""
+    relationship: str = ""
+    tone: ToneEnum = ToneEnum.kind
+    topic: Optional[TopicEnum] = None
+    photo_descriptions: List[str]
+    synthesize: bool = True
+
+@app.post("/generate-batch")
+async def generate_batch(req: BatchReminderRequest):
+    if not req.photo_descriptions:
+        raise HTTPException(status_code=400, detail="사진 설명이 비어 있습니다.")
+    if len(req.photo_descriptions) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"한 번에 최대 {BATCH_MAX_ITEMS}개까지 생성할 수 있습니다.")
+
+    user_id = req.guardian_uid
+    admission.check_guardian(user_id)
+    relationship = await resolve_relationship(user_id, req.relationship)
+
+    # 하나의 보호자 voice 를 모든 항목에 재사용
+    voice_id = None
+    if req.synthesize:
+        voice_id = await pool.io_pool.run(voice_registry.current_voice_id, user_id)
+
+    semaphore = asyncio.Semaphore(BATCH_LLM_CONCURRENCY)
+
+    async def generate_one(index: int, description: str) -> dict:
+        item = {"index": index, "photo_description": description}
+        try:
+            async with semaphore:
+                if batch_llm_bucket is not None:
+                    await batch_llm_bucket.acquire()
+                # 앨범 일괄 생성은 대량 작업이라 대화형 요청에 LLM/TTS 슬롯을 양보
+                result = await run_llm(
+                    generate_reminder,
+                    priority=admission.BACKGROUND,
+                    patient_name=req.patient_name,
+                    photo_description=description,
+                    relation=relationship,
+                    tone=req.tone,
+                    namespace=user_id,
+                )
+            item["result"] = result
+            if voice_id:
+                item["tts_url"], item["quiz_tts_url"] = await asyncio.gather(
+                    synthesize_and_upload(result.reminder_text, voice_id, admission.BACKGROUND),
+                    synthesize_and_upload(result.quiz_speech_text(), voice_id, admission.BACKGROUND),
+                )
+            item["status"] = "ok"
+        except Exception as e:
+            traceback.print_exc()
+            item["status"] = "error"
+            item["error"] = str(e)
+        return item
+
+    items = await asyncio.gather(*[
+        generate_one(i, desc) for i, desc in enumerate(req.photo_descriptions)
+    ])
+
+    # ✅ 성공한 항목만 batch 로 한 번에 저장 (500개 단위, repository 의 묶음 쓰기)
+    ok_items = [item for item in items if item["status"] == "ok"]
+    for start in range(0, len(ok_items), FIRESTORE_BATCH_LIMIT):
+        chunk = ok_items[start:start + FIRESTORE_BATCH_LIMIT]
+        docs = []
+        for item in chunk:
+            result = item["result"]
+            doc_data = {
+                "reminder_text": result.reminder_text,
+                "quiz_question": result.quiz_question,
+                "quiz_options": result.quiz_options,
+                "quiz_answer": result.answer_text,
+                "quiz_answer_index": result.answer_index,
+                "created_at": firestore.SERVER_TIMESTAMP,
+                **source_fields(req.topic, item["photo_description"], relationship),
+            }
+            if voice_id:
+                doc_data.update({
+                    "tts_url": item["tts_url"],
+                    "quiz_tts_url": item["quiz_tts_url"],
+                    "voice_id": voice_id,
+                })
+            docs.append(doc_data)
+        try:
+            doc_ids = await repository.add_reminders(user_id, docs)
+        except Exception as e:
+            traceback.print_exc()
+            for item in chunk:
+                item["status"] = "error"
+                item["error"] = f"Firestore 저장 실패: {e}"
+            continue
+        for item, doc_id in zip(chunk, doc_ids):
+            item["reminder_doc_id"] = doc_id
+
+    response_items = []
+    for item in items:
+        entry = {"index": item["index"], "status": item["status"]}
+        if item["status"] == "ok":
+            result = item["result"]
+            entry.update({
+                "reminder_doc_id": item.get("reminder_doc_id"),
+                "reminder": result.reminder_text,
+                "question": result.quiz_question,
+                "options": result.quiz_options,
+                "answer": result.answer_text,
+                "tts_url": item.get("tts_url"),
+                "quiz_tts_url": item.get("quiz_tts_url"),
+            })
+        else:
+            entry["error"] = item["error"]
+        response_items.append(entry)
+
+    succeeded = sum(1 for item in items if item["status"] == "ok")
+    return {
+        "total": len(items),
+        "succeeded": succeeded,
+        "failed": len(items) - succeeded,
+        "voice_id": voice_id,
+        "items": response_items,
+    }
+
+#=======================================================================
+# ✅ 미리 만들어 둔 회상 문장 큐: 한가한 시간에 채우고, 세션에서는 준비된 것만 꺼내 씀
+async def _prefetch_generate(uid: str, description: str, relation: str):
+    return await run_llm(
+        generate_reminder,
+        priority=admission.BACKGROUND,
+        patient_name="",
+        photo_description=description,
+        relation=relation,
+        tone=ToneEnum.kind,
+        namespace=uid,
+        use_cache=False,   # 같은 설명이라도 매번 새 문장이 필요
+    )
+
+prefetcher = PrefetchScheduler(
+    db,
+    generate=_prefetch_generate,
+    synthesize=lambda text, voice_id: synthesize_and_upload(text, voice_id, admission.BACKGROUND),
+    current_voice_id=voice_registry.current_voice_id,
+    repository=repository,
+)
+
+@app.get("/reminders/next")
+async def pop_next_reminder(guardian_uid: str):
+    reminder = await pool.io_pool.run(prefetcher.pop_next, guardian_uid)
+    if reminder is None:
+        raise HTTPException(status_code=404, detail="준비된 회상 문장이 없습니다.")
+    reminder.pop("created_at", None)
+    reminder.pop("played_at", None)
+    return reminder
+
+@app.post("/reminders/prefetch/settings")
+async def set_prefetch(guardian_uid: str = Form(...), enabled: bool = Form(True)):
+    """ 사용자별 프리페치 켜기 / 끄기 (켠 사용자만 한가한 시간에 큐를 채움) """
+    await pool.io_pool.run(prefetcher.set_enabled, guardian_uid, enabled)
+    return {"guardian_uid": guardian_uid, "enabled": enabled}
+
+@app.post("/reminders/prefetch")
+async def prefetch_now(guardian_uid: str = Form(...)):
+    """ 한가한 시간대를 기다리지 않고 바로 큐 채우기 (운영/테스트용)
+        프리페치를 켠 사용자만, 다른 워커가 채우는 중이면 created=0 """
+    created = await prefetcher.fill(guardian_uid)
+    depth = await pool.io_pool.run(prefetcher.queue_depth, guardian_uid)
+    return {"created": created, "queue_depth": depth}
@@ -1,41 +1,34 @@
-import os
+import shutil
 
 from dotenv import load_dotenv
-from elevenlabs.client import ElevenLabs
 from io import BytesIO
-from firebase.firebase_init import db, bucket
+from firebase.firebase_init import repository
 from fastapi import APIRouter, UploadFile, File, Form, HTTPException
 from uuid import uuid4
 import traceback
 
-from voicefixer.voicefixer import VoiceFixer
-import subprocess
-import torchaudio
-import torchaudio.transforms as T
+from audio.preprocess import preprocess_for_elevenlabs, AudioDecodeError, FFMPEG_PATH
+from audio.fingerprint import compute_fingerprint
+from audio.ingest import read_upload
+from scripts.voice_registry import VoiceRegistry
+from core import admission, metrics, pool
+from core.resources import resources, LazyProxy, storage
+from core.storage import CACHE_PRIVATE, MP3
 
 router = APIRouter()
 
 load_dotenv()
-elevenlabs = ElevenLabs(api_key=os.getenv("ELEVENLABS_API_KEY"))
+elevenlabs = LazyProxy(lambda: resources.elevenlabs)
+voice_registry = VoiceRegistry(repository)
 
-# ✅ ffmpeg 절대 경로
-FFMPEG_PATH = "C:/Program Files/ffmpeg-7.0.2-essentials_build/ffmpeg-7.0.2-essentials_build/bin/ffmpeg.exe"  # ← 본인 PC의 경로로 수정
+# ✅ ffmpeg 경로 (기본 "ffmpeg", 다른 위치면 FFMPEG_PATH 환경변수 — audio/preprocess.py)
 print("✅ FFMPEG_PATH:", FFMPEG_PATH)
-print("✅ 존재 여부:", os.path.exists(FFMPEG_PATH))
+print("✅ 존재 여부:", shutil.which(FFMPEG_PATH) is not None)
 
-def update_firestore_voice_id(guardian_uid: str, new_voice_id: str):
-    """ Firestore 보호자 Document에 voiceId 저장 """
-    try:
-        guardian_ref = db.collection("guardians").document(guardian_uid)
-        guardian_ref.update({"voiceId": new_voice_id})
-        print(f"✅ Firestore에 voiceId 저장 완료! (guardian_uid: {guardian_uid})")
-    except Exception as e:
-        print("❌ Firestore 업데이트 실패:", e)
-
-def register_voice(file_path: str, voice_name: str, guardian_uid: str):
-    """ 음성 파일을 ElevenLabs에 등록 """
-    with open(file_path, "rb") as f:
-        audio_bytes = BytesIO(f.read())
+def register_voice(audio_data: bytes, voice_name: str, guardian_uid: str):
+    """ 전처리된 음성(mp3 바이트)을 ElevenLabs에 등록 """
+    audio_bytes = BytesIO(audio_data)
+    audio_bytes.name = "voice.mp3"
 
     voice = elevenlabs.voices.ivc.create(
         name=voice_name,
@@ -46,48 +39,60 @@ def register_voice(file_path: str, voice_name: str, guardian_uid: str):
     print("✅ Voice 등록 완료! 새 Voice ID:", new_voice_id)
     return new_voice_id
 
-def preprocess_for_elevenlabs(input_mp3: str) -> str:
-    """ VoiceFixer 및 VAD 등 전처리 후 mp3 생성 """
-
-    def mp3_to_wav(mp3_path: str) -> str:
-        wav_path = mp3_path.replace(".mp3", ".wav")
-        subprocess.run([FFMPEG_PATH, "-y", "-i", mp3_path, wav_path], check=True)
-        return wav_path
-
-    def apply_voicefixer(wav_path: str) -> str:
-        vf = VoiceFixer()
-        cleaned_wav = wav_path.replace(".wav", "_vf.wav")
-        vf.restore(input=wav_path, output=cleaned_wav, cuda=False, mode=1)
-        return cleaned_wav
-
-    def apply_vad(wav_path: str) -> str:
-        waveform, sample_rate = torchaudio.load(wav_path)
-        vad = T.Vad(sample_rate=sample_rate)
-        voiced = vad(waveform)
-        voiced_path = wav_path.replace(".wav", "_vad.wav")
-        torchaudio.save(voiced_path, voiced, sample_rate)
-        return voiced_path
-
-    def to_final_mp3(wav_path: str) -> str:
-        mp3_path = wav_path.replace(".wav", "_final.mp3")
-        subprocess.run([
-            FFMPEG_PATH, "-y", "-i", wav_path,
-            "-af", "highpass=f=300, lowpass=f=3000",
-            "-ar", "22050", "-ac", "1", "-b:a", "64k",
-            mp3_path
-        ], check=True)
-        return mp3_path
-
-    wav = mp3_to_wav(input_mp3)
-    cleaned = apply_voicefixer(wav)
-    voiced = apply_vad(cleaned)
-    final_mp3 = to_final_mp3(voiced)
-
-    for path in [wav, cleaned, voiced]:
-        try: os.remove(path)
-        except: pass
-
-    return final_mp3
+async def find_existing_voice(guardian_uid: str, audio_data: bytes, ffmpeg_path: str = FFMPEG_PATH,
+                              content_hash: str = ""):
+    """ 업로드 음성 지문 계산 후 같은 음성이 등록돼 있으면 (voice_id, 지문), 아니면 (None, 지문)
+        content_hash(업로드 sha256)가 저장된 값과 같으면 디코딩 없이 바로 반환 """
+    if content_hash:
+        with metrics.span("voice.lookup", kind="content_hash"):
+            record = await pool.io_pool.run(voice_registry.find_by_content_hash, guardian_uid, content_hash)
+        if record is not None:
+            metrics.record_cache("voice", "hit_content_hash")
+            return record.voice_id, record.fingerprint
+
+    with metrics.span("voice.fingerprint"):
+        fingerprint = await pool.io_pool.run(compute_fingerprint, audio_data, ffmpeg_path, content_hash)
+    with metrics.span("voice.lookup"):
+        existing = await pool.io_pool.run(voice_registry.find_existing, guardian_uid, fingerprint)
+    metrics.record_cache("voice", "hit" if existing else "miss")
+    return existing, fingerprint
+
+async def clean_voice_audio(guardian_uid: str, audio_data: bytes, ffmpeg_path: str = FFMPEG_PATH,
+                            priority: str = admission.INTERACTIVE) -> bytes:
+    """ 전처리 (CPU 풀, 메모리 내 처리) 후 Storage 에 보관. VoiceFixer 동시 실행 수는 cpu_gate 로 제한
+        새 음성일 때만 불리므로 보호자별 음성 업로드 한도도 여기서 적용 (ensure_voice / 작업 파이프라인 공통) """
+    admission.check_voice_upload(guardian_uid)
+    async with admission.cpu_gate.slot(priority):
+        with metrics.span("audio.preprocess"):
+            cleaned_audio = await pool.cpu_pool.run(preprocess_for_elevenlabs, audio_data, ffmpeg_path)
+
+    with metrics.span("storage.upload", kind="cleaned_voice"):
+        await storage.upload_async(f"cleaned_voice/{guardian_uid}/{uuid4().hex}_final.mp3", cleaned_audio,
+                                   MP3, CACHE_PRIVATE)
+    return cleaned_audio
+
+async def clone_voice(guardian_uid: str, voice_name: str, cleaned_audio: bytes, fingerprint) -> str:
+    """ ElevenLabs 등록 → Firestore에 voiceId + 지문 저장
+        이전 voice 는 지우지 않는다 (기존 reminder 문서 / 프리페치 큐가 그 voice_id 로 다시 합성할 수 있음) """
+    with metrics.span("voice.clone"):
+        new_voice_id = await pool.io_pool.run(register_voice, cleaned_audio, voice_name, guardian_uid)
+
+    with metrics.span("firestore.write", kind="voice"):
+        replaced = await voice_registry.remember(guardian_uid, new_voice_id, fingerprint)
+    if replaced:
+        print("ℹ️ 이전 Voice 유지 (기존 문장에서 참조):", replaced)
+    return new_voice_id
+
+async def ensure_voice(guardian_uid: str, voice_name: str, audio_data: bytes, ffmpeg_path: str = FFMPEG_PATH,
+                       content_hash: str = ""):
+    """ 같은 음성이면 기존 voice_id 재사용, 아니면 전처리 → 클로닝 → 저장. (voice_id, 재사용 여부) 반환 """
+    existing, fingerprint = await find_existing_voice(guardian_uid, audio_data, ffmpeg_path, content_hash)
+    if existing:
+        return existing, True
+
+    cleaned_audio = await clean_voice_audio(guardian_uid, audio_data, ffmpeg_path)
+    new_voice_id = await clone_voice(guardian_uid, voice_name, cleaned_audio, fingerprint)
+    return new_voice_id, False
 
 @router.post("/register-voice")
 async def register_voice_endpoint(
@@ -95,37 +100,23 @@ async def register_voice_endpoint(
     name: str = Form(...),
     file: UploadFile = File(...)
 ):
-    temp_filename = f"temp_{uuid4().hex}.mp3"
-    cleaned_path = None
-
     try:
-        with open(temp_filename, "wb") as buffer:
-            buffer.write(await file.read())
-
-        # ✅ 전처리
-        cleaned_path = preprocess_for_elevenlabs(temp_filename)
-
-        # ✅ Firebase Storage 업로드
-        cleaned_blob = bucket.blob(f"cleaned_voice/{guardian_uid}/{os.path.basename(cleaned_path)}")
-        cleaned_blob.upload_from_filename(cleaned_path)
+        admission.check_guardian(guardian_uid)
+        # 크기 / 길이 / 포맷 검사를 통과해야 전처리 시작
+        upload = await read_upload(file)
 
-        # ✅ ElevenLabs 등록
-        new_voice_id = register_voice(cleaned_path, name, guardian_uid)
-
-        # ✅ Firestore에 voiceId 저장
-        update_firestore_voice_id(guardian_uid, new_voice_id)
+        new_voice_id, reused = await ensure_voice(guardian_uid, name, upload.data, content_hash=upload.sha256)
 
         return {
-            "message": "보호자 목소리 등록 완료!",
-            "voice_id": new_voice_id
+            "message": "이미 등록된 보호자 목소리입니다." if reused else "보호자 목소리 등록 완료!",
+            "voice_id": new_voice_id,
+            "reused": reused,
         }
 
+    except HTTPException:
+        raise
+    except AudioDecodeError as e:
+        raise HTTPException(status_code=400, detail=f"음성 파일을 읽을 수 없습니다: {e}")
     except Exception as e:
         traceback.print_exc()
         raise HTTPException(status_code=500, detail=str(e))
-
-    finally:
-        if os.path.exists(temp_filename):
-            os.remove(temp_filename)
-        if cleaned_path and os.path.exists(cleaned_path):
-            os.remove(cleaned_path)
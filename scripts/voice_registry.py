@@ -0,0 +1,69 @@
+# scripts/voice_registry.py
+# ✅ 보호자별 ElevenLabs voice_id 재사용
+# - 업로드 음성 지문이 저장된 지문과 같으면 전처리/클로닝을 건너뛰고 기존 voice_id 반환
+# - guardians/{uid} 문서는 firebase/repository.py 가 캐시 (스냅샷 리스너로 다른 인스턴스의 변경도 반영)
+from dataclasses import dataclass
+from typing import Optional
+
+from audio.fingerprint import VoiceFingerprint
+from core import pool
+
+
+@dataclass
+class VoiceRecord:
+    voice_id: str
+    fingerprint: Optional[VoiceFingerprint] = None
+
+
+class VoiceRegistry:
+    def __init__(self, repository):
+        self.repository = repository
+        self.hits = 0
+        self.misses = 0
+
+    def _load(self, guardian_uid: str) -> Optional[VoiceRecord]:
+        data = self.repository.get_guardian(guardian_uid) or {}
+        voice_id = data.get("voiceId")
+        if not voice_id:
+            return None
+        fp_data = data.get("voiceFingerprint")
+        return VoiceRecord(voice_id, VoiceFingerprint.from_dict(fp_data) if fp_data else None)
+
+    def current_voice_id(self, guardian_uid: str) -> Optional[str]:
+        record = self._load(guardian_uid)
+        return record.voice_id if record else None
+
+    def find_existing(self, guardian_uid: str, fingerprint: VoiceFingerprint) -> Optional[str]:
+        """ (블로킹) 같은 음성이 이미 등록돼 있으면 voice_id, 아니면 None """
+        record = self._load(guardian_uid)
+        if record and record.fingerprint and fingerprint.matches(record.fingerprint):
+            self.hits += 1
+            print(f"✅ 기존 voice 재사용 (guardian_uid: {guardian_uid}, voice_id: {record.voice_id})")
+            return record.voice_id
+        self.misses += 1
+        return None
+
+    def find_by_content_hash(self, guardian_uid: str, content_hash: str) -> Optional[VoiceRecord]:
+        """ (블로킹) 업로드 파일 해시가 저장된 지문과 같으면 그 레코드 (디코딩 / 지문 계산 생략용) """
+        record = self._load(guardian_uid)
+        if content_hash and record and record.fingerprint and record.fingerprint.content_hash == content_hash:
+            self.hits += 1
+            print(f"✅ 같은 파일 재업로드 → 기존 voice 재사용 (guardian_uid: {guardian_uid}, voice_id: {record.voice_id})")
+            return record
+        return None
+
+    async def remember(self, guardian_uid: str, voice_id: str, fingerprint: VoiceFingerprint) -> Optional[str]:
+        """ 새 voice 를 저장하고(묶음 쓰기), 교체된 이전 voice_id 를 반환 """
+        previous = await pool.io_pool.run(self._load, guardian_uid)
+        await self.repository.set_guardian(
+            guardian_uid, {"voiceId": voice_id, "voiceFingerprint": fingerprint.to_dict()}
+        )
+        if previous and previous.voice_id != voice_id:
+            return previous.voice_id
+        return None
+
+    def invalidate(self, guardian_uid: str):
+        self.repository.invalidate_guardian(guardian_uid)
+
+    def stats(self) -> dict:
+        return {"hits": self.hits, "misses": self.misses}
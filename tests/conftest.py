@@ -0,0 +1,54 @@
+# tests/conftest.py
+# ✅ 저장소 루트를 import 경로에 추가 (패키지 설치 없이 `python -m pytest` 로 실행)
+#    설정은 모듈 import 시점에 읽히므로 프로젝트 모듈을 import 하기 전에 테스트용 환경변수부터
+import asyncio
+import glob
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+_workdir = tempfile.mkdtemp(prefix="tests_")
+os.environ.setdefault("AUDIO_WARMUP", "0")
+os.environ.setdefault("JOB_SQLITE_PATH", os.path.join(_workdir, "jobs.sqlite3"))
+os.environ.setdefault("TTS_CACHE_DIR", os.path.join(_workdir, "tts_cache"))
+os.environ.setdefault("PREFETCH_INTERVAL_SECONDS", "86400")
+
+
+@pytest.fixture
+def fakes(tmp_path):
+    """ bench/fakes 로 OpenAI / ElevenLabs / Firebase 를 대역으로 바꿔 끼운다 (테스트마다 새 Firestore / Storage) """
+    from bench import fakes as bench_fakes
+
+    with open(sorted(glob.glob(os.path.join(ROOT, "local_backup", "*.mp3")))[0], "rb") as f:
+        audio = f.read()
+    return bench_fakes.install(audio, llm_latency=0, tts_latency=0, clone_latency=0, firestore_latency=0,
+                               storage_root=str(tmp_path / "storage"))
+
+
+@pytest.fixture
+def app(fakes):
+    """ 대역을 끼운 뒤 import 한 main 모듈 """
+    import main
+
+    return main
+
+
+@pytest.fixture
+def call_app(app):
+    """ call_app(async fn(client)) → lifespan 안에서 ASGI 로 직접 요청한 결과 """
+    import httpx
+
+    def call(fn):
+        async def run():
+            async with app.app.router.lifespan_context(app.app):
+                transport = httpx.ASGITransport(app=app.app)
+                async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                    return await fn(client)
+        return asyncio.run(run())
+
+    return call
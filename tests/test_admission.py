@@ -0,0 +1,113 @@
+# tests/test_admission.py
+# ✅ core/admission: 슬롯 제한 / interactive 우선 / 대기 초과 503 / 보호자별 429
+import asyncio
+
+import pytest
+
+from core.admission import BACKGROUND, INTERACTIVE, AdmissionGate, GuardianLimiter, RateLimited
+from core.pool import PoolSaturated
+
+
+def test_gate_limits_concurrency():
+    gate = AdmissionGate("test", capacity=2, max_wait=5)
+    peak = 0
+
+    async def work():
+        nonlocal peak
+        async with gate.slot():
+            peak = max(peak, gate.in_use)
+            await asyncio.sleep(0.01)
+
+    async def main():
+        await asyncio.gather(*(work() for _ in range(6)))
+
+    asyncio.run(main())
+    assert peak == 2
+    assert gate.in_use == 0
+
+
+def test_interactive_waiter_goes_before_background():
+    gate = AdmissionGate("test", capacity=1, max_wait=5, background_share=1.0)
+    order = []
+
+    async def work(priority, name):
+        async with gate.slot(priority):
+            order.append(name)
+
+    async def main():
+        await gate.acquire(INTERACTIVE)
+        background = asyncio.create_task(work(BACKGROUND, "background"))
+        await asyncio.sleep(0)
+        interactive = asyncio.create_task(work(INTERACTIVE, "interactive"))
+        await asyncio.sleep(0)
+        gate.release(INTERACTIVE)
+        await asyncio.gather(background, interactive)
+
+    asyncio.run(main())
+    assert order == ["interactive", "background"]
+
+
+def test_background_share_leaves_room_for_interactive():
+    gate = AdmissionGate("test", capacity=2, max_wait=5, background_share=0.5)
+
+    async def main():
+        await gate.acquire(BACKGROUND)
+        waiting = asyncio.create_task(gate.acquire(BACKGROUND))
+        await asyncio.sleep(0.01)
+        assert not waiting.done()
+        await asyncio.wait_for(gate.acquire(INTERACTIVE), timeout=1)
+        waiting.cancel()
+        await asyncio.gather(waiting, return_exceptions=True)
+
+    asyncio.run(main())
+    assert gate.stats()["in_use"] == {INTERACTIVE: 1, BACKGROUND: 1}
+
+
+def test_wait_timeout_is_503_with_retry_after():
+    gate = AdmissionGate("test", capacity=1, max_wait=0.05)
+
+    async def main():
+        await gate.acquire()
+        with pytest.raises(PoolSaturated) as e:
+            await gate.acquire()
+        return e.value
+
+    error = asyncio.run(main())
+    assert error.status_code == 503
+    assert error.headers["Retry-After"] == "1"
+    assert gate.rejected == 1
+    assert gate.waiting == 0
+
+
+def test_full_queue_is_rejected_immediately():
+    gate = AdmissionGate("test", capacity=1, max_wait=5, max_queue=1)
+
+    async def main():
+        await gate.acquire()
+        queued = asyncio.create_task(gate.acquire())
+        await asyncio.sleep(0)
+        with pytest.raises(PoolSaturated):
+            await gate.acquire()
+        queued.cancel()
+        await asyncio.gather(queued, return_exceptions=True)
+
+    asyncio.run(main())
+
+
+def test_guardian_limiter_is_per_guardian():
+    limiter = GuardianLimiter("test", rate_per_sec=0.01, burst=2)
+    limiter.check("a")
+    limiter.check("a")
+    with pytest.raises(RateLimited) as e:
+        limiter.check("a")
+    assert e.value.status_code == 429
+    assert int(e.value.headers["Retry-After"]) >= 1
+    limiter.check("b")      # 다른 보호자는 영향 없음
+    limiter.check("")       # uid 없으면 검사하지 않음
+
+
+def test_guardian_limiter_forgets_oldest():
+    limiter = GuardianLimiter("test", rate_per_sec=1, burst=1, max_tracked=2)
+    for uid in ("a", "b", "c"):
+        limiter.check(uid)
+    assert limiter.stats()["tracked_guardians"] == 2
@@ -0,0 +1,40 @@
+# tests/test_batch.py
+# ✅ /generate-batch: 병렬 생성 + 묶음 저장, 속도 제한 0 = 제한 없음
+PHOTOS = ["바닷가에서 모래성을 쌓았다", "제주도 유채꽃밭에서 찍은 가족사진", "할머니 칠순 잔치"]
+
+
+def _batch(call_app, body):
+    async def fn(client):
+        return await client.post("/generate-batch", json=body)
+    return call_app(fn)
+
+
+def test_batch_text_only(call_app, fakes):
+    res = _batch(call_app, {"guardian_uid": "batch-text", "photo_descriptions": PHOTOS, "synthesize": False})
+    assert res.status_code == 200
+    data = res.json()
+    assert data["total"] == 3 and data["succeeded"] == 3 and data["failed"] == 0
+    assert data["voice_id"] is None
+    assert all(item["tts_url"] is None for item in data["items"])
+
+
+def test_batch_reuses_guardian_voice(call_app, fakes):
+    fakes.db.collection("guardians").document("batch-voice").set({"voiceId": "voice-batch"})
+    res = _batch(call_app, {"guardian_uid": "batch-voice", "photo_descriptions": PHOTOS[:2]})
+    assert res.status_code == 200
+    data = res.json()
+    assert data["succeeded"] == 2 and data["voice_id"] == "voice-batch"
+    assert all(item["tts_url"] and item["quiz_tts_url"] for item in data["items"])
+
+
+def test_batch_rate_zero_means_no_limit(call_app, app, monkeypatch):
+    monkeypatch.setattr(app, "batch_llm_bucket", None)
+    res = _batch(call_app, {"guardian_uid": "batch-norate", "photo_descriptions": PHOTOS, "synthesize": False})
+    assert res.status_code == 200
+    assert res.json()["succeeded"] == 3
+
+
+def test_batch_rejects_empty_and_oversized(call_app, app):
+    assert _batch(call_app, {"guardian_uid": "batch-bad", "photo_descriptions": []}).status_code == 400
+    too_many = ["사진"] * (app.BATCH_MAX_ITEMS + 1)
+    assert _batch(call_app, {"guardian_uid": "batch-bad", "photo_descriptions": too_many}).status_code == 400
@@ -0,0 +1,34 @@
+# tests/test_generate_only.py
+# ✅ /generate-only: guardian_uid 선택 / 정답은 다른 엔드포인트와 같이 보기 텍스트로 저장
+FORM = {
+    "topic": "여행",
+    "when": "여름에",
+    "where": "바닷가에서",
+    "how": "가족과 함께",
+    "what": "모래성을 쌓았다",
+    "memory_moment": "파도가 모래성을 무너뜨렸을 때",
+    "relationship": "딸",
+}
+
+
+def test_answer_stored_as_option_text(call_app):
+    async def fn(client):
+        generated = await client.post("/generate-only", data={**FORM, "guardian_uid": "only-1"})
+        history = await client.get("/reminders/history", params={"guardian_uid": "only-1"})
+        return generated, history
+
+    generated, history = call_app(fn)
+    assert generated.status_code == 200
+    body = generated.json()
+    assert body["answer"] == body["options"][body["answer_index"] - 1]
+
+    [doc] = history.json()["items"]
+    assert doc["quiz_answer"] == body["answer"]
+    assert doc["quiz_answer_index"] == body["answer_index"]
+
+
+def test_guardian_uid_optional(call_app):
+    async def fn(client):
+        return await client.post("/generate-only", data=FORM)
+
+    assert call_app(fn).status_code == 200
@@ -0,0 +1,73 @@
+# tests/test_ingest.py
+# ✅ audio/ingest.read_upload: 포맷 판별 / 크기·길이 제한 / 해시
+import asyncio
+import hashlib
+import io
+import wave
+
+import pytest
+from starlette.datastructures import UploadFile
+
+from audio.ingest import UploadRejected, read_upload, sniff_format
+
+
+def _wav(seconds: float, sample_rate: int = 16000) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(sample_rate)
+        w.writeframes(b"\x00\x00" * int(seconds * sample_rate))
+    return buffer.getvalue()
+
+
+def _read(data: bytes, **kwargs):
+    upload = UploadFile(file=io.BytesIO(data), size=len(data), filename="voice.wav")
+    return asyncio.run(read_upload(upload, chunk_size=1024, **kwargs))
+
+
+def test_wav_upload_reads_format_duration_and_hash():
+    data = _wav(1.5)
+    result = _read(data)
+    assert result.format == "wav"
+    assert result.duration == pytest.approx(1.5)
+    assert result.size == len(data)
+    assert result.data == data
+    assert result.sha256 == hashlib.sha256(data).hexdigest()
+
+
+def test_empty_upload_is_400():
+    with pytest.raises(UploadRejected) as e:
+        _read(b"")
+    assert e.value.status_code == 400
+
+
+def test_unknown_format_is_415():
+    with pytest.raises(UploadRejected) as e:
+        _read(b"hello, this is not audio" * 10)
+    assert e.value.status_code == 415
+
+
+def test_too_large_is_413():
+    with pytest.raises(UploadRejected) as e:
+        _read(_wav(1.0), max_bytes=4096)
+    assert e.value.status_code == 413
+
+
+def test_too_long_is_413():
+    with pytest.raises(UploadRejected) as e:
+        _read(_wav(2.0), max_seconds=1.0)
+    assert e.value.status_code == 413
+    assert "너무 깁니다" in e.value.detail
+
+
+@pytest.mark.parametrize("header, fmt", [
+    (b"OggS" + b"\x00" * 28, "ogg"),
+    (b"fLaC" + b"\x00" * 28, "flac"),
+    (b"ID3\x04" + b"\x00" * 28, "mp3"),
+    (b"\x00\x00\x00\x20ftypM4A " + b"\x00" * 20, "mp4"),
+    (b"\x1a\x45\xdf\xa3" + b"\x00" * 28, "webm"),
+    (b"#!AMR\n" + b"\x00" * 26, "amr"),
+])
+def test_sniff_format(header, fmt):
+    assert sniff_format(header) == fmt
@@ -0,0 +1,195 @@
+# tests/test_jobs.py
+# ✅ jobs/pipeline + jobs/store: 단계 순서 / 워커 여러 개여도 한 번만 실행 / 임대 만료 인계 / 503 재시도
+import asyncio
+import time
+
+import pytest
+from fastapi import HTTPException
+
+from bench.fakes import FakeFirestore
+from core.storage import LocalStorage
+from firebase.repository import FirestoreRepository
+from jobs import pipeline as pipeline_module
+from jobs.pipeline import STAGES, JobPipeline, _is_retryable, _retry_delay, job_status
+from jobs.store import STATUS_DONE, STATUS_FAILED, FirestoreJobStore, SQLiteJobStore
+
+
+@pytest.fixture(params=["sqlite", "firestore"])
+def store(request, tmp_path):
+    if request.param == "sqlite":
+        s = SQLiteJobStore(str(tmp_path / "jobs.sqlite3"))
+    else:
+        s = FirestoreJobStore(FakeFirestore(), LocalStorage(root=str(tmp_path / "storage")))
+    yield s
+    s.close()
+
+
+def _handlers(calls, fail=None):
+    """ 각 단계가 불린 순서를 calls 에 기록. fail = {stage: [던질 예외, ...]} """
+    fail = fail or {}
+
+    def make(stage):
+        async def handler(ctx):
+            calls.append((ctx.job_id, stage))
+            errors = fail.get(stage)
+            if errors:
+                raise errors.pop(0)
+            return {stage: True}
+        return handler
+
+    return {stage: make(stage) for stage in STAGES}
+
+
+async def _drain(pipelines, job_ids, timeout=5.0):
+    deadline = time.monotonic() + timeout
+    store = pipelines[0].store
+    while time.monotonic() < deadline:
+        jobs = [store.get(job_id) for job_id in job_ids]
+        # 임대 해제가 마지막 단계라 그것까지 기다린다
+        if all(job["status"] in (STATUS_DONE, STATUS_FAILED) and not job["lease_owner"] for job in jobs):
+            return jobs
+        await asyncio.sleep(0.01)
+    raise AssertionError("작업이 끝나지 않음")
+
+
+def test_stages_run_in_order(store):
+    calls = []
+
+    async def run():
+        pipeline = JobPipeline(None, _handlers(calls))
+        await pipeline.start(store)
+        job = await pipeline.submit({"guardian_uid": "u1"}, blobs={"raw": b"abc"})
+        [done] = await _drain([pipeline], [job["job_id"]])
+        await pipeline.stop()
+        return job["job_id"], done
+
+    job_id, done = asyncio.run(run())
+    assert [stage for _, stage in calls] == STAGES
+    assert done["status"] == STATUS_DONE and done["lease_owner"] is None
+    assert all(done["context"][stage] for stage in STAGES)
+    assert job_status(done)["progress"] == 1.0
+    assert store.get_blob(job_id, "raw") is None
+
+
+def test_unfinished_jobs_run_once_across_workers(tmp_path):
+    # 같은 저장소를 보는 워커 3개가 동시에 시작해도 작업마다 단계는 한 번씩만
+    path = str(tmp_path / "jobs.sqlite3")
+    seed = SQLiteJobStore(path)
+    job_ids = [seed.create("generate-and-read", {"n": i})["job_id"] for i in range(4)]
+    calls = []
+
+    async def run():
+        pipelines = [JobPipeline(None, _handlers(calls)) for _ in range(3)]
+        await asyncio.gather(*(p.start(SQLiteJobStore(path)) for p in pipelines))
+        jobs = await _drain(pipelines, job_ids)
+        for p in pipelines:
+            await p.stop()
+            p.store.close()
+        return jobs
+
+    jobs = asyncio.run(run())
+    assert all(job["status"] == STATUS_DONE for job in jobs)
+    assert sorted(calls) == sorted((job_id, stage) for job_id in job_ids for stage in STAGES)
+    seed.close()
+
+
+def test_claim_blocks_other_owner_until_lease_expires(store):
+    job = store.create("generate-and-read", {})
+    assert store.claim(job["job_id"], "worker-a", 60)["lease_owner"] == "worker-a"
+    assert store.claim(job["job_id"], "worker-b", 60) is None
+    assert store.claim(job["job_id"], "worker-a", 60) is not None   # 자기 임대는 연장
+
+    store.update(job["job_id"], lease_expires=time.time() - 1)       # worker-a 가 죽어서 만료
+    assert store.claim(job["job_id"], "worker-b", 60)["lease_owner"] == "worker-b"
+
+    store.release(job["job_id"], "worker-a")                          # 남의 임대는 풀지 않음
+    assert store.get(job["job_id"])["lease_owner"] == "worker-b"
+    store.release(job["job_id"], "worker-b")
+    assert store.get(job["job_id"])["lease_owner"] is None
+
+
+def test_finished_job_is_not_claimed(store):
+    job = store.create("generate-and-read", {})
+    store.update(job["job_id"], status=STATUS_DONE)
+    assert store.claim(job["job_id"], "worker-a", 60) is None
+    assert store.claim("missing", "worker-a", 60) is None
+
+
+def test_recover_skips_jobs_leased_by_live_worker(store):
+    leased = store.create("generate-and-read", {})
+    expired = store.create("generate-and-read", {})
+    store.claim(leased["job_id"], "other", 60)
+    store.claim(expired["job_id"], "other", 60)
+    store.update(expired["job_id"], lease_expires=time.time() - 1)
+
+    async def run():
+        pipeline = JobPipeline(store, _handlers([]))
+        count = await pipeline.recover()
+        return count, pipeline._queue.get_nowait()
+
+    assert asyncio.run(run()) == (1, expired["job_id"])
+
+
+def test_admission_503_is_retried(store, monkeypatch):
+    monkeypatch.setattr(pipeline_module, "JOB_RETRY_BASE_SECONDS", 0)
+    calls = []
+    busy = HTTPException(status_code=503, detail="busy", headers={"Retry-After": "0"})
+    fail = {"preprocess": [busy, busy]}
+
+    async def run():
+        pipeline = JobPipeline(None, _handlers(calls, fail))
+        await pipeline.start(store)
+        job = await pipeline.submit({})
+        [done] = await _drain([pipeline], [job["job_id"]])
+        await pipeline.stop()
+        return done
+
+    done = asyncio.run(run())
+    assert done["status"] == STATUS_DONE
+    assert done["attempts"]["preprocess"] == 3
+
+
+def test_guardian_limit_fails_without_retry(store):
+    calls = []
+    fail = {"preprocess": [HTTPException(status_code=429, detail="slow down", headers={"Retry-After": "30"})]}
+
+    async def run():
+        pipeline = JobPipeline(None, _handlers(calls, fail))
+        await pipeline.start(store)
+        job = await pipeline.submit({})
+        [done] = await _drain([pipeline], [job["job_id"]])
+        await pipeline.stop()
+        return done
+
+    done = asyncio.run(run())
+    assert done["status"] == STATUS_FAILED
+    assert (done["error_status"], done["retry_after"]) == (429, 30)
+    assert len(calls) == 1 and done["lease_owner"] is None
+
+
+def test_retry_policy():
+    assert _is_retryable(HTTPException(status_code=503))
+    assert _is_retryable(HTTPException(status_code=502))
+    assert not _is_retryable(HTTPException(status_code=429))
+    assert not _is_retryable(ValueError("bad audio"))
+    assert _is_retryable(RuntimeError("timeout"))
+
+    busy = HTTPException(status_code=503, headers={"Retry-After": "7"})
+    assert _retry_delay(busy, 1) == 7
+    assert _retry_delay(RuntimeError(), 2) == pipeline_module.JOB_RETRY_BASE_SECONDS * 2
+    assert _retry_delay(RuntimeError(), 50) == pipeline_module.JOB_RETRY_MAX_SECONDS
+
+
+def test_publish_with_job_id_is_idempotent():
+    db = FakeFirestore()
+    repository = FirestoreRepository(db, listen=False)
+
+    async def run():
+        first = await repository.add_reminder("u1", {"reminder_text": "a"}, doc_id="job-1")
+        second = await repository.add_reminder("u1", {"reminder_text": "a"}, doc_id="job-1")
+        await repository.close()
+        return first, second
+
+    assert asyncio.run(run()) == ("job-1", "job-1")
+    items, _ = repository.list_reminders("u1")
+    assert [item["reminder_doc_id"] for item in items] == ["job-1"]
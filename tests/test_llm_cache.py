@@ -0,0 +1,84 @@
+# tests/test_llm_cache.py
+# ✅ llm/cache: 정확 일치 / TTL / 개수 제한 / 근사 일치(임베딩 1회)
+import time
+
+from llm.cache import ResponseCache
+
+FIELDS = {"patient": "김철수", "relation": "딸", "tone": "따뜻한"}
+
+
+class FakeEmbed:
+    """ 같은 글자가 많을수록 가까운 임베딩 (호출 수 기록) """
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, text):
+        self.calls.append(text)
+        return [text.count(ch) for ch in "바다산모래눈"] + [1.0]
+
+
+def test_exact_hit_and_miss():
+    cache = ResponseCache()
+    assert cache.get("u1", **FIELDS) is None
+    cache.set("u1", "문장", **FIELDS)
+    assert cache.get("u1", **FIELDS) == "문장"
+    assert cache.get("u2", **FIELDS) is None
+    stats = cache.stats()
+    assert (stats["hits_exact"], stats["misses"]) == (1, 2)
+
+
+def test_expired_entry_is_dropped():
+    cache = ResponseCache(ttl=-1)
+    cache.set("u1", "문장", **FIELDS)
+    assert cache.get("u1", **FIELDS) is None
+    assert cache.stats()["entries"] == 0
+
+
+def test_per_namespace_cap_evicts_oldest():
+    cache = ResponseCache(max_per_namespace=2)
+    for i in range(3):
+        cache.set("u1", f"문장{i}", n=i)
+    assert cache.get("u1", n=0) is None
+    assert cache.get("u1", n=2) == "문장2"
+
+
+def test_namespace_count_is_capped_lru():
+    cache = ResponseCache(max_namespaces=2)
+    cache.set("u1", "a", **FIELDS)
+    cache.set("u2", "b", **FIELDS)
+    assert cache.get("u1", **FIELDS) == "a"     # u1 을 최근으로
+    cache.set("u3", "c", **FIELDS)
+    assert cache.stats()["namespaces"] == 2
+    assert cache.get("u2", **FIELDS) is None
+    assert cache.get("u1", **FIELDS) == "a"
+
+
+def test_miss_does_not_create_namespace():
+    cache = ResponseCache(max_namespaces=1)
+    cache.set("u1", "a", **FIELDS)
+    for i in range(5):
+        cache.get(f"other{i}", **FIELDS)
+    assert cache.get("u1", **FIELDS) == "a"
+
+
+def test_semantic_miss_embeds_once():
+    embed = FakeEmbed()
+    cache = ResponseCache(embed_fn=embed, semantic=True, threshold=0.99)
+    cache.set("u1", "바다 문장", semantic_text="바다 바다", photo="p1")
+    embed.calls.clear()
+
+    value, embedding = cache.lookup("u1", semantic_text="산 눈", photo="p2")
+    assert value is None and embedding is not None
+    cache.set("u1", "산 문장", semantic_text="산 눈", embedding=embedding, photo="p2")
+    assert embed.calls == ["산 눈"]
+
+
+def test_semantic_hit_requires_same_context():
+    embed = FakeEmbed()
+    cache = ResponseCache(embed_fn=embed, semantic=True, threshold=0.99)
+    cache.set("u1", "바다 문장", semantic_text="바다 모래", context="딸", photo="p1")
+
+    assert cache.get("u1", semantic_text="모래 바다", context="딸", photo="p2") == "바다 문장"
+    assert cache.get("u1", semantic_text="모래 바다", context="아들", photo="p2") is None
+    assert cache.stats()["hits_semantic"] == 1
@@ -0,0 +1,89 @@
+# tests/test_metrics.py
+# ✅ core/metrics: 카운터 / 히스토그램 분위수 / Prometheus 출력 / span·timed
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from core import metrics
+from core.metrics import Registry
+
+
+def test_counter_and_gauge_by_labels():
+    registry = Registry()
+    counter = registry.counter("requests_total", "요청 수")
+    counter.inc(route="a")
+    counter.inc(2, route="a")
+    counter.inc(route="b")
+    assert counter.value(route="a") == 3
+    assert registry.counter("requests_total") is counter
+
+    gauge = registry.gauge("in_use")
+    gauge.set(5, gate="llm")
+    gauge.set(2, gate="llm")
+    assert gauge.value(gate="llm") == 2
+
+
+def test_histogram_quantiles_and_render():
+    registry = Registry()
+    hist = registry.histogram("latency_seconds", "지연", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 0.5, 2.0):
+        hist.observe(value, stage="x")
+
+    assert hist.quantiles(stage="x") == {0.5: 0.5, 0.95: 2.0, 0.99: 2.0}
+    assert hist.summary()["x"]["count"] == 4
+
+    text = registry.render()
+    assert "# TYPE latency_seconds histogram" in text
+    assert 'latency_seconds_bucket{stage="x",le="0.1"} 1' in text
+    assert 'latency_seconds_bucket{stage="x",le="1.0"} 3' in text
+    assert 'latency_seconds_bucket{stage="x",le="+Inf"} 4' in text
+    assert 'latency_seconds_quantile{stage="x",quantile="0.5"} 0.5' in text
+
+
+def test_render_escapes_label_values_and_runs_collectors():
+    registry = Registry()
+    gauge = registry.gauge("pending")
+    registry.register_collector(lambda: gauge.set(7, pool='io"pool'))
+    registry.register_collector(lambda: 1 / 0)     # 실패한 수집기는 건너뛴다
+    assert 'pending{pool="io\\"pool"} 7.0' in registry.render()
+
+
+def test_span_records_duration_and_errors():
+    with metrics.span("test.ok"):
+        pass
+    with pytest.raises(ValueError):
+        with metrics.span("test.fail"):
+            raise ValueError("boom")
+
+    assert metrics.stage_seconds.summary()["test.ok"]["count"] == 1
+    assert metrics.stage_errors.value(stage="test.fail", error="ValueError") == 1
+
+
+def test_timed_wraps_sync_and_async():
+    @metrics.timed("test.sync")
+    def sync_fn(x):
+        return x + 1
+
+    @metrics.timed("test.async")
+    async def async_fn(x):
+        return x * 2
+
+    assert sync_fn(1) == 2
+    assert asyncio.run(async_fn(2)) == 4
+    summary = metrics.stage_seconds.summary()
+    assert summary["test.sync"]["count"] == 1
+    assert summary["test.async"]["count"] == 1
+
+
+def test_record_helpers():
+    usage = SimpleNamespace(prompt_tokens=10, completion_tokens=4,
+                            prompt_tokens_details=SimpleNamespace(cached_tokens=6))
+    metrics.record_llm_usage(usage, "m-test", "t-test")
+    assert metrics.llm_tokens.value(model="m-test", task="t-test", kind="prompt") == 10
+    assert metrics.llm_tokens.value(model="m-test", task="t-test", kind="prompt_cached") == 6
+
+    metrics.record_cache("test-cache", "hit")
+    assert metrics.cache_events.value(cache="test-cache", event="hit") == 1
+    metrics.record_tts_characters("안녕하세요", mode="test")
+    assert metrics.tts_characters.value(mode="test") == 5
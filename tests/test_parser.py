@@ -0,0 +1,118 @@
+# tests/test_parser.py
+# ✅ llm/parser: 한 번에 파싱 / 정답 번호 해석 / 누락 보완 / 스트리밍 줄 단위 파싱
+import pytest
+
+from llm.parser import (
+    ReminderParseError, StreamingSectionParser, _parse_answer, parse_reminder, parse_reminder_output,
+)
+
+RAW = """회상 문장: 어머니, 그날 바닷가에서 모래성을 쌓았죠.
+퀴즈 유형: 1
+퀴즈 문제: 그날 무엇을 만들었을까요?
+선택지:
+1번. 모래성
+2번. 눈사람
+3번. 종이배
+4번. 연
+정답: 1번. 모래성
+"""
+
+OPTIONS = ["1990년에 간 여행", "부산 바다", "2002년 월드컵", "제주도"]
+
+
+def test_parse_full_output():
+    result = parse_reminder(RAW)
+    assert result.reminder_text == "어머니, 그날 바닷가에서 모래성을 쌓았죠."
+    assert result.quiz_question == "그날 무엇을 만들었을까요?"
+    assert result.quiz_options == ["모래성", "눈사람", "종이배", "연"]
+    assert result.quiz_type == 1
+    assert result.answer_index == 1
+    assert result.answer_text == "모래성"
+
+
+@pytest.mark.parametrize("raw, index", [
+    ("2", 2),
+    ("2번", 2),
+    ("2번. 부산 바다", 2),
+    ("3) 2002년 월드컵", 3),
+    ("4. 제주도", 4),
+    ("[1]", 1),
+])
+def test_answer_number_with_delimiter(raw, index):
+    assert _parse_answer(raw, OPTIONS) == index
+
+
+@pytest.mark.parametrize("raw, index", [
+    ("1990년에 간 여행", 1),     # 숫자로 시작하는 보기 텍스트는 번호가 아니다
+    ("2002년 월드컵", 3),
+    ("제주도", 4),
+])
+def test_answer_text_matches_option(raw, index):
+    assert _parse_answer(raw, OPTIONS) == index
+
+
+@pytest.mark.parametrize("raw", ["5번", "모르겠음", "0", "부산", "여행"])
+def test_answer_out_of_range_is_none(raw):
+    # 부분 문자열("부산" ⊂ "부산 바다")이나 숫자("0" ⊂ "1990년...")로는 보기를 고르지 않는다
+    assert _parse_answer(raw, OPTIONS) is None
+
+
+@pytest.mark.parametrize("raw, index", [
+    ("엄마", 2),                 # "엄마 친구" 보다 먼저 나와도 정확히 같은 보기
+    ("엄마 친구", 1),
+    ("  엄마   친구. ", 1),      # 공백 / 마침표 차이는 무시
+    ('"이모"', 4),
+])
+def test_answer_text_requires_exact_option(raw, index):
+    assert _parse_answer(raw, ["엄마 친구", "엄마", "아빠", "이모"]) == index
+
+
+def test_ambiguous_answer_text_goes_to_repair():
+    raw = RAW.replace("1번. 모래성\n2번. 눈사람", "1번. 모래성\n2번. 모래성").replace("정답: 1번. 모래성", "정답: 모래성")
+    assert parse_reminder_output(raw).answer_index is None
+    asked = []
+
+    def repair(previous, missing):
+        asked.append(missing)
+        return "정답: 2번. 모래성\n"
+
+    assert parse_reminder(raw, repair=repair).answer_index == 2
+    assert asked == [["answer_index"]]
+
+
+def test_missing_fields_raise():
+    with pytest.raises(ReminderParseError) as e:
+        parse_reminder("회상 문장: 안녕하세요\n")
+    assert "quiz_question" in e.value.missing
+    assert "answer_index" in e.value.missing
+
+
+def test_repair_fills_only_missing_fields():
+    raw = RAW.replace("정답: 1번. 모래성\n", "")
+    asked = []
+
+    def repair(previous, missing):
+        asked.append(missing)
+        return "정답: 1번. 모래성\n"
+
+    result = parse_reminder(raw, repair=repair)
+    assert asked == [["answer_index"]]
+    assert result.answer_text == "모래성"
+    assert result.reminder_text.startswith("어머니")
+
+
+def test_streaming_parser_emits_complete_lines():
+    parser = StreamingSectionParser()
+    sections = []
+    for i in range(0, len(RAW.rstrip("\n")), 7):
+        sections.extend(parser.feed(RAW.rstrip("\n")[i:i + 7]))
+    sections.extend(parser.close())
+    assert sections[0] == ("회상 문장", "어머니, 그날 바닷가에서 모래성을 쌓았죠.")
+    assert sections[-1] == ("정답", "1번. 모래성")
+    assert parse_reminder_output(parser.raw).answer_index == 1
+
+
+def test_streaming_parser_waits_for_newline():
+    parser = StreamingSectionParser()
+    assert parser.feed("회상 문장: 어머니") == []
+    assert parser.feed(", 안녕하세요\n퀴즈") == [("회상 문장", "어머니, 안녕하세요")]
@@ -0,0 +1,51 @@
+# tests/test_pool.py
+# ✅ core/pool: 대기열 제한 503 / 텍스트 전용 워커(AUDIO_WARMUP=0)는 모델 로드 없이 ready
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from core import pool
+from core.pool import BoundedPool, PoolSaturated
+
+
+def test_bounded_pool_rejects_when_full():
+    release = threading.Event()
+    bounded = BoundedPool("test", lambda: ThreadPoolExecutor(max_workers=1), max_pending=1)
+
+    async def main():
+        running = asyncio.create_task(bounded.run(release.wait, 5))
+        await asyncio.sleep(0.01)
+        with pytest.raises(PoolSaturated) as e:
+            await bounded.run(lambda: None)
+        release.set()
+        await running
+        return e.value
+
+    try:
+        error = asyncio.run(main())
+    finally:
+        bounded.shutdown()
+    assert error.status_code == 503
+    assert "Retry-After" in error.headers
+    assert bounded.pending == 0
+
+
+def test_text_only_worker_is_ready_without_warmup(monkeypatch):
+    monkeypatch.setattr(pool, "AUDIO_WARMUP", False)
+    monkeypatch.setattr(pool, "_cpu_ready", False)
+
+    def no_executor():
+        raise AssertionError("워밍업을 끈 워커는 CPU 풀을 만들면 안 됨")
+
+    monkeypatch.setattr(pool.cpu_pool, "_executor_factory", no_executor)
+    assert pool.cpu_ready()
+    assert asyncio.run(pool.warm_cpu_pool()) is True
+    assert pool.cpu_pool._executor is None
+
+
+def test_audio_worker_waits_for_warmup(monkeypatch):
+    monkeypatch.setattr(pool, "AUDIO_WARMUP", True)
+    monkeypatch.setattr(pool, "_cpu_ready", False)
+    assert not pool.cpu_ready()
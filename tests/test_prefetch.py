@@ -0,0 +1,179 @@
+# tests/test_prefetch.py
+# ✅ jobs/prefetch: 큐 깊이까지 채우기 / 준비된 문장 한 번만 꺼내기 / 켠 사용자만 대상 / 사용자별 lease
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from bench.fakes import FakeFirestore
+from enums import TopicEnum
+from firebase.repository import FirestoreRepository
+from jobs.prefetch import PrefetchScheduler, _in_offpeak, _local_hour
+from llm.parser import ReminderResult
+
+UID = "patient-1"
+
+
+def _scheduler(db, voice_id="voice-1", target_depth=3):
+    async def generate(uid, description, relation):
+        return ReminderResult(
+            reminder_text=f"{relation}, {description}",
+            quiz_question="무엇을 했을까요?",
+            quiz_options=["모래성", "눈사람", "종이배", "연"],
+            answer_index=1,
+        )
+
+    async def synthesize(text, voice):
+        return f"https://example.com/{voice}/{abs(hash(text))}.mp3"
+
+    repository = FirestoreRepository(db, listen=False)
+    scheduler = PrefetchScheduler(db, generate, synthesize, lambda uid: voice_id, repository,
+                                  target_depth=target_depth)
+    scheduler.set_enabled(UID)
+    return scheduler
+
+
+def _reminders(db, uid=UID):
+    return db.collection("users").document(uid).collection("reminders")
+
+
+def _add_source(db, topic=TopicEnum.행복했던기억, description="바닷가에서 모래성을 쌓았다", uid=UID):
+    _reminders(db, uid).document().set({
+        "topic": topic.value, "photo_description": description, "relationship": "딸",
+        "prefetched": False, "played": True, "created_at": 0,
+    })
+
+
+def _prefetched(db):
+    return [d.to_dict() for d in _reminders(db).where("prefetched", "==", True).stream()]
+
+
+def test_fill_reaches_target_depth():
+    db = FakeFirestore()
+    descriptions = {}
+    for topic in TopicEnum:
+        descriptions[topic.value] = f"{topic.value} 사진 설명"
+        _add_source(db, topic, descriptions[topic.value])
+    scheduler = _scheduler(db)
+
+    assert asyncio.run(scheduler.fill(UID)) == 3
+    docs = _prefetched(db)
+    assert len(docs) == 3
+    assert len({doc["topic"] for doc in docs}) == 3     # 주제를 돌아가며
+    for doc in docs:
+        assert doc["photo_description"] == descriptions[doc["topic"]]
+        assert doc["relationship"] == "딸"
+        assert doc["played"] is False
+        assert doc["voice_id"] == "voice-1"
+        assert doc["tts_url"] and doc["quiz_tts_url"]
+    assert scheduler.queue_depth(UID) == 3
+    # 이미 목표 깊이면 더 만들지 않는다
+    assert asyncio.run(scheduler.fill(UID)) == 0
+
+
+def test_fill_skips_users_who_did_not_opt_in():
+    db = FakeFirestore()
+    _add_source(db)
+    scheduler = _scheduler(db)
+    scheduler.set_enabled(UID, False)
+    assert asyncio.run(scheduler.fill(UID)) == 0
+    assert _prefetched(db) == []
+
+
+def test_fill_skips_while_another_worker_holds_the_lease():
+    db = FakeFirestore()
+    _add_source(db)
+    other = _scheduler(db)
+    scheduler = _scheduler(db)
+    assert other.claim(UID)
+    assert not scheduler.claim(UID)
+    assert asyncio.run(scheduler.fill(UID)) == 0
+
+    other.release(UID)
+    assert asyncio.run(scheduler.fill(UID)) > 0
+    # 채운 뒤 lease 를 놓는다
+    assert other.claim(UID)
+
+
+def test_expired_lease_can_be_taken_over():
+    db = FakeFirestore()
+    other = _scheduler(db)
+    assert other.claim(UID)
+    db.collection("prefetch").document(UID).update({"lease_expires": time.time() - 1})
+    assert _scheduler(db).claim(UID)
+
+
+def test_concurrent_fill_runs_once():
+    db = FakeFirestore()
+    for topic in TopicEnum:
+        _add_source(db, topic, f"{topic.value} 사진 설명")
+    schedulers = [_scheduler(db) for _ in range(3)]
+
+    async def main():
+        return await asyncio.gather(*(s.fill(UID) for s in schedulers))
+
+    assert sorted(asyncio.run(main())) == [0, 0, 3]
+    assert len(_prefetched(db)) == 3
+
+
+def test_fill_without_sources_creates_nothing():
+    db = FakeFirestore()
+    assert asyncio.run(_scheduler(db).fill(UID)) == 0
+
+
+def test_fill_without_voice_skips_tts():
+    db = FakeFirestore()
+    _add_source(db)
+    asyncio.run(_scheduler(db, voice_id=None, target_depth=1).fill(UID))
+    [doc] = _prefetched(db)
+    assert "tts_url" not in doc
+
+
+def test_pop_next_returns_oldest_and_marks_played():
+    db = FakeFirestore()
+    for i in range(2):
+        _reminders(db).document(f"r{i}").set({"prefetched": True, "played": False, "created_at": i})
+    scheduler = _scheduler(db)
+
+    first = scheduler.pop_next(UID)
+    assert first["reminder_doc_id"] == "r0"
+    assert _reminders(db).document("r0").get().to_dict()["played"] is True
+    assert scheduler.pop_next(UID)["reminder_doc_id"] == "r1"
+    assert scheduler.pop_next(UID) is None
+
+
+def test_concurrent_pop_next_claims_each_doc_once():
+    db = FakeFirestore()
+    for i in range(3):
+        _reminders(db).document(f"r{i}").set({"prefetched": True, "played": False, "created_at": i})
+    scheduler = _scheduler(db)
+
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        results = list(executor.map(lambda _: scheduler.pop_next(UID), range(6)))
+    claimed = [r["reminder_doc_id"] for r in results if r is not None]
+    assert sorted(claimed) == ["r0", "r1", "r2"]
+
+
+def test_load_users_reads_only_opted_in_users():
+    db = FakeFirestore()
+    _add_source(db, uid="no-opt-in")
+    scheduler = _scheduler(db)
+    scheduler.set_enabled("b")
+    scheduler.set_enabled("c")
+    scheduler.set_enabled("c", False)
+
+    restarted = _scheduler(db)
+    assert restarted.load_users() == 2
+    assert restarted._users == {UID, "b"}
+
+
+def test_offpeak_window():
+    assert _in_offpeak(3, "1-6")
+    assert not _in_offpeak(6, "1-6")
+    assert _in_offpeak(23, "22-5") and _in_offpeak(2, "22-5")
+    assert not _in_offpeak(12, "22-5")
+    assert _in_offpeak(12, "")
+
+
+def test_local_hour_uses_configured_timezone():
+    utc, seoul = _local_hour("UTC"), _local_hour("Asia/Seoul")
+    assert (utc + 9) % 24 == seoul
@@ -0,0 +1,83 @@
+# tests/test_prompts.py
+# ✅ llm/prompts: 지연 토큰 계산 / tiktoken 로드 실패 시 근사치 / 예산 확인 / 필드 축약
+import sys
+import types
+
+import pytest
+
+from enums import ToneEnum
+from llm import prompts
+from llm.prompts import PromptBudgetError, PromptTemplate
+
+
+@pytest.fixture(autouse=True)
+def approximate_tokens(monkeypatch):
+    # 네트워크 / tiktoken 설치 여부와 상관없이 근사치(한글 1자 = 1토큰)로 계산
+    monkeypatch.setattr(prompts, "_encoding", lambda model: None)
+
+
+def test_approximate_count():
+    assert prompts.count_tokens("가나다") == 3
+    assert prompts.count_tokens("abcdefgh") == 2
+
+
+def test_encoding_load_error_falls_back(monkeypatch):
+    monkeypatch.undo()
+
+    def fail(*args, **kwargs):
+        raise ConnectionError("no network")
+
+    monkeypatch.setitem(sys.modules, "tiktoken",
+                        types.SimpleNamespace(encoding_for_model=fail, get_encoding=fail))
+    prompts._encoding.cache_clear()
+    try:
+        assert prompts.count_tokens("가나다", model="test-model") == 3
+    finally:
+        prompts._encoding.cache_clear()
+
+
+def test_truncate_tokens():
+    assert prompts.truncate_tokens("가나다라마", 3) == "가나다"
+    assert prompts.truncate_tokens("가나", 3) == "가나"
+    assert prompts.truncate_tokens("가나", 0) == ""
+
+
+def test_register_does_not_count_tokens(monkeypatch):
+    def boom(*args, **kwargs):
+        raise AssertionError("import / register 시점에 토큰을 세면 안 됨")
+
+    monkeypatch.setattr(prompts, "count_tokens", boom)
+    template = PromptTemplate("lazy-test", "가" * 10, budget=5)
+    assert prompts.register(template) is template
+    assert prompts.get("lazy-test") is template
+
+
+def test_budget_checked_on_first_render():
+    template = prompts.register(PromptTemplate("over-test", "가" * 10, budget=5))
+    with pytest.raises(PromptBudgetError):
+        template.render()
+
+
+def test_budget_includes_every_system_variant():
+    ok = PromptTemplate("sys-ok", "가" * 10, budget=20, systems=("나" * 5, "다" * 10))
+    over = PromptTemplate("sys-over", "가" * 10, budget=20, systems=("나" * 5, "다" * 11))
+    ok.check_budget()
+    with pytest.raises(PromptBudgetError, match="system 11토큰"):
+        over.check_budget()
+
+
+def test_render_trims_field_to_fit_budget_with_system():
+    template = PromptTemplate("trim-test", "가" * 10, "{desc}", budget=30,
+                              trim_field="desc", systems=("나" * 5,))
+    text = template.render(desc="다" * 100)
+    assert prompts.count_tokens(text) + 5 <= 30
+    assert text.startswith("가" * 10)
+    assert template.render(desc="다" * 3) == "가" * 10 + "다" * 3
+
+
+def test_reminder_messages_fit_budget_for_every_tone():
+    for tone in ToneEnum:
+        messages = prompts.reminder_messages("홍길동", "바닷가 " * 2000, "딸", tone)
+        assert messages[0]["content"] == prompts.SYSTEM_PROMPTS[tone]
+        total = sum(prompts.count_tokens(m["content"]) for m in messages)
+        assert total <= prompts.REMINDER.budget
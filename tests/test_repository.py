@@ -0,0 +1,104 @@
+# tests/test_repository.py
+# ✅ firebase/repository.WriteBatcher: 묶음 커밋 / 호출자별 실패 분리 / 500개 제한
+import asyncio
+
+from firebase.repository import FirestoreRepository, WriteBatcher
+
+
+class _Ref:
+    def __init__(self, doc_id):
+        self.id = doc_id
+
+
+class _Batch:
+    def __init__(self, db):
+        self.db = db
+        self.ops = []
+
+    def set(self, ref, data, merge=False):
+        self.ops.append((ref, data))
+
+    def commit(self):
+        # 실제 Firestore 처럼 묶음 전체가 원자적으로 성공 / 실패
+        if len(self.ops) > self.db.limit or any(data.get("bad") for _, data in self.ops):
+            raise ValueError("commit rejected")
+        self.db.commits.append([ref.id for ref, _ in self.ops])
+
+
+class _DB:
+    def __init__(self, limit=500):
+        self.limit = limit
+        self.commits = []
+
+    def batch(self):
+        return _Batch(self)
+
+
+def test_concurrent_writes_share_one_commit():
+    db = _DB()
+
+    async def main():
+        writer = WriteBatcher(db, flush_interval=0.01)
+        return await asyncio.gather(*(writer.set(_Ref(f"d{i}"), {"i": i}) for i in range(5)))
+
+    assert asyncio.run(main()) == [f"d{i}" for i in range(5)]
+    assert db.commits == [[f"d{i}" for i in range(5)]]
+
+
+def test_bad_write_fails_only_its_caller():
+    db = _DB()
+
+    async def main():
+        writer = WriteBatcher(db, flush_interval=0.01)
+        return await asyncio.gather(
+            writer.set(_Ref("a"), {}), writer.set(_Ref("bad"), {"bad": True}), writer.set(_Ref("c"), {}),
+            return_exceptions=True,
+        )
+
+    a, bad, c = asyncio.run(main())
+    assert (a, c) == ("a", "c")
+    assert isinstance(bad, ValueError)
+    assert sorted(db.commits) == [["a"], ["c"]]
+
+
+def test_batches_are_split_at_max_ops():
+    db = _DB(limit=3)
+
+    async def main():
+        writer = WriteBatcher(db, flush_interval=0.01, max_ops=3)
+        return await asyncio.gather(*(writer.set(_Ref(f"d{i}"), {}) for i in range(7)))
+
+    assert len(asyncio.run(main())) == 7
+    assert [len(c) for c in db.commits] == [3, 3, 1]
+
+
+def test_close_flushes_pending_writes():
+    db = _DB()
+
+    async def main():
+        writer = WriteBatcher(db, flush_interval=60)
+        task = asyncio.create_task(writer.set(_Ref("a"), {}))
+        await asyncio.sleep(0)
+        await writer.close()
+        return await task
+
+    assert asyncio.run(main()) == "a"
+    assert db.commits == [["a"]]
+
+
+def test_repository_add_reminders_round_trip():
+    from bench.fakes import FakeFirestore
+
+    db = FakeFirestore()
+    repository = FirestoreRepository(db, listen=False)
+
+    async def main():
+        ids = await repository.add_reminders("u", [{"n": i, "created_at": i} for i in range(3)])
+        await repository.close()
+        return ids
+
+    ids = asyncio.run(main())
+    items, cursor = repository.list_reminders("u", page_size=2)
+    assert [item["n"] for item in items] == [2, 1]
+    assert cursor is not None
+    assert {item["reminder_doc_id"] for item in items} <= set(ids)
@@ -0,0 +1,116 @@
+# tests/test_router.py
+# ✅ llm/router: 모델 폴백 / 로컬 추출기 / 헤지 요청
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from llm.router import HEURISTIC, ModelRouter, Route
+
+USAGE = SimpleNamespace(prompt_tokens=10, completion_tokens=5)
+
+
+def _router(models, timeout=1.0, hedge_after=0.0):
+    return ModelRouter({"t": Route("t", models=models, timeout=timeout, hedge_after=hedge_after)})
+
+
+def test_falls_back_to_next_model_on_error():
+    calls = []
+
+    def remote(model, timeout):
+        calls.append(model)
+        if model == "a":
+            raise RuntimeError("down")
+        return "ok", USAGE
+
+    assert _router(["a", "b"]).call("t", remote) == ("ok", "b")
+    assert calls == ["a", "b"]
+
+
+def test_raises_last_error_when_every_model_fails():
+    def remote(model, timeout):
+        raise ValueError(model)
+
+    with pytest.raises(ValueError, match="b"):
+        _router(["a", "b"]).call("t", remote)
+
+
+def test_heuristic_result_skips_remote():
+    def remote(model, timeout):
+        raise AssertionError("원격 모델을 부르면 안 됨")
+
+    assert _router([HEURISTIC, "a"]).call("t", remote, local=lambda: ["바닷가"]) == (["바닷가"], HEURISTIC)
+
+
+@pytest.mark.parametrize("local", [lambda: [], lambda: (_ for _ in ()).throw(RuntimeError("kiwi"))])
+def test_empty_or_failing_heuristic_falls_through(local):
+    result = _router([HEURISTIC, "a"]).call("t", lambda model, timeout: (["모래성"], USAGE), local=local)
+    assert result == (["모래성"], "a")
+
+
+def test_heuristic_without_local_is_skipped():
+    assert _router([HEURISTIC, "a"]).call("t", lambda model, timeout: ("ok", USAGE)) == ("ok", "a")
+
+
+def test_hedge_wins_when_primary_is_slow():
+    router = _router(["a"], timeout=2.0, hedge_after=0.05)
+    release = threading.Event()
+    calls = []
+    lock = threading.Lock()
+
+    def remote(model, timeout):
+        with lock:
+            calls.append(model)
+            first = len(calls) == 1
+        if first:
+            release.wait(2.0)     # 첫 요청은 멈춰 있고, 헤지 요청이 먼저 끝난다
+            return "primary", USAGE
+        return "hedge", USAGE
+
+    try:
+        start = time.monotonic()
+        assert router.call("t", remote) == ("hedge", "a")
+        assert time.monotonic() - start < 1.0
+        assert len(calls) == 2
+    finally:
+        release.set()
+        router.shutdown()
+
+
+def test_no_hedge_when_primary_is_fast():
+    router = _router(["a"], timeout=2.0, hedge_after=0.5)
+    calls = []
+
+    def remote(model, timeout):
+        calls.append(model)
+        return "ok", USAGE
+
+    try:
+        assert router.call("t", remote) == ("ok", "a")
+        assert calls == ["a"]
+    finally:
+        router.shutdown()
+
+
+def test_hedged_timeout_falls_back_to_next_model():
+    router = _router(["slow", "fast"], timeout=0.1, hedge_after=0.02)
+    release = threading.Event()
+
+    def remote(model, timeout):
+        if model == "slow":
+            release.wait(2.0)
+            return "late", USAGE
+        return "ok", USAGE
+
+    try:
+        assert router.call("t", remote) == ("ok", "fast")
+    finally:
+        release.set()
+        router.shutdown()
+
+
+def test_cost_uses_price_table():
+    router = ModelRouter({}, prices={"m": (1.0, 2.0)})
+    assert router.cost("m", SimpleNamespace(prompt_tokens=1_000_000, completion_tokens=500_000)) == pytest.approx(2.0)
+    assert router.cost("unknown", USAGE) == 0.0
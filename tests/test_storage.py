@@ -0,0 +1,65 @@
+# tests/test_storage.py
+# ✅ core/storage: LocalStorage 입출력 / 경로 검사 / URL 모드별 url_async
+import asyncio
+import threading
+
+import pytest
+
+from core.storage import GCSStorage, LocalStorage
+
+
+class FakeBlob:
+    def __init__(self, bucket, path):
+        self.bucket = bucket
+        self.path = path
+        self.metadata = None
+
+    def generate_signed_url(self, **kwargs):
+        self.bucket.sign_threads.append(threading.current_thread())
+        return f"https://signed/{self.path}"
+
+
+class FakeBucket:
+    name = "test-bucket"
+
+    def __init__(self):
+        self.sign_threads = []
+
+    def blob(self, path):
+        return FakeBlob(self, path)
+
+
+def test_local_storage_round_trip(tmp_path):
+    storage = LocalStorage(root=str(tmp_path), base_url="/files/")
+    url = storage.upload("u1/reminders/a.mp3", b"mp3")
+    assert url == "/files/u1/reminders/a.mp3"
+    assert storage.exists("u1/reminders/a.mp3")
+    assert storage.download("u1/reminders/a.mp3") == b"mp3"
+    assert storage.download("u1/reminders/none.mp3") is None
+
+    storage.delete_prefix("u1/")
+    assert not storage.exists("u1/reminders/a.mp3")
+
+
+def test_local_storage_rejects_path_traversal(tmp_path):
+    storage = LocalStorage(root=str(tmp_path))
+    with pytest.raises(ValueError):
+        storage.upload("../escape.mp3", b"x")
+
+
+def test_signed_url_async_runs_off_event_loop():
+    bucket = FakeBucket()
+    storage = GCSStorage(bucket, url_mode="signed")
+
+    async def main():
+        return await storage.url_async("u1/a.mp3", token="ignored"), threading.current_thread()
+
+    url, loop_thread = asyncio.run(main())
+    assert url == "https://signed/u1/a.mp3"
+    assert bucket.sign_threads and bucket.sign_threads[0] is not loop_thread
+
+
+def test_token_url_async_with_token_is_inline():
+    storage = GCSStorage(FakeBucket(), url_mode="token")
+    url = asyncio.run(storage.url_async("u1/a b.mp3", token="tok"))
+    assert url == "https://firebasestorage.googleapis.com/v0/b/test-bucket/o/u1%2Fa%20b.mp3?alt=media&token=tok"
@@ -0,0 +1,106 @@
+# tests/test_stream.py
+# ✅ llm/gpt_client.stream_reminder: 회상 문장 줄이 끝나면 바로 on_reminder / 모델 실패 시 폴백 / 퀴즈만 보완
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from enums import ToneEnum
+from llm import gpt_client
+
+DESCRIPTION = "할머니와 손녀가 마당에서 한복을 입고 사진을 찍었다"
+REMINDER = "어머니, 그날 마당에서 한복을 곱게 입으셨지요."
+QUIZ = """퀴즈 문제: 그날 무엇을 입으셨나요?
+선택지:
+1번. 한복
+2번. 양복
+3번. 잠옷
+4번. 교복
+정답: 1번. 한복"""
+
+
+def _chunk(text):
+    return SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=text))], usage=None)
+
+
+class _FakeStreams:
+    """ 모델별 응답: 문자열이면 몇 글자씩 흘려보내고, 예외면 그 예외를 던진다. 흘려보낸 기록은 events 에 """
+
+    def __init__(self, by_model):
+        self.by_model = by_model
+        self.models = []
+        self.events = []
+        self.chat = SimpleNamespace(completions=self)
+
+    async def create(self, model, messages, stream=False, **kwargs):
+        self.models.append(model)
+        content = self.by_model[model]
+        if isinstance(content, Exception):
+            raise content
+        return self._stream(content)
+
+    async def _stream(self, content):
+        for i in range(0, len(content), 5):
+            self.events.append(("chunk", content[i:i + 5]))
+            yield _chunk(content[i:i + 5])
+        yield SimpleNamespace(choices=[], usage=SimpleNamespace(prompt_tokens=10, completion_tokens=20))
+
+
+@pytest.fixture
+def streams(monkeypatch):
+    def install(by_model, repair_text=None):
+        fake = _FakeStreams(by_model)
+        monkeypatch.setattr(gpt_client, "async_client", fake)
+        monkeypatch.setattr(gpt_client, "extract_terms", lambda description: ["할머니", "한복"])
+
+        def chat(task, messages, local=None, **kwargs):
+            fake.events.append(("chat", task))
+            message = SimpleNamespace(content=repair_text)
+            return SimpleNamespace(choices=[SimpleNamespace(message=message)]), "m"
+
+        monkeypatch.setattr(gpt_client, "_chat", chat)
+        return fake
+    return install
+
+
+def _run(fake):
+    def on_reminder(text):
+        fake.events.append(("on_reminder", text))
+
+    return asyncio.run(gpt_client.stream_reminder(
+        "김영희", DESCRIPTION, "딸", ToneEnum.kind, on_reminder=on_reminder, use_cache=False,
+    ))
+
+
+def test_reminder_dispatched_before_quiz_streams(streams):
+    primary = gpt_client.router.route("generate_stream").models[0]
+    fake = streams({primary: f"회상 문장: {REMINDER}\n{QUIZ}"})
+
+    result = _run(fake)
+    assert result.reminder_text == REMINDER and result.answer_text == "한복"
+    dispatch = fake.events.index(("on_reminder", REMINDER))
+    streamed = "".join(text for kind, text in fake.events[:dispatch] if kind == "chunk")
+    assert "퀴즈 문제" not in streamed   # 퀴즈가 나오기 전에 TTS 시작
+
+
+def test_stream_falls_back_to_next_model(streams):
+    primary, fallback = gpt_client.router.route("generate_stream").models[:2]
+    fake = streams({primary: RuntimeError("stream reset"), fallback: f"회상 문장: {REMINDER}\n{QUIZ}"})
+
+    result = _run(fake)
+    assert fake.models == [primary, fallback]
+    assert result.reminder_text == REMINDER
+
+
+def test_quiz_violation_keeps_streamed_reminder(streams):
+    primary = gpt_client.router.route("generate_stream").models[0]
+    bad_quiz = QUIZ.replace("1번. 한복", "1번. 등산복").replace("정답: 1번. 한복", "정답: 1번. 등산복")
+    fake = streams({primary: f"회상 문장: {REMINDER}\n{bad_quiz}"}, repair_text=QUIZ)
+
+    result = _run(fake)
+    assert ("chat", "repair") in fake.events
+    assert ("chat", "generate") not in fake.events and ("chat", "generate_structured") not in fake.events
+    # 미리 TTS 를 시작한 회상 문장과 최종 문장이 같다 → 호출하는 쪽이 TTS 를 다시 만들지 않음
+    assert result.reminder_text == REMINDER
+    assert [e for e in fake.events if e[0] == "on_reminder"] == [("on_reminder", REMINDER)]
+    assert result.answer_text == "한복"
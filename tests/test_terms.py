@@ -0,0 +1,117 @@
+# tests/test_terms.py
+# ✅ llm/gpt_client 허용 단어 검사: 오탐(부사/어간)은 경고만 / 진짜 위반은 그 항목만 다시 요청
+import json
+from types import SimpleNamespace
+
+import pytest
+
+from enums import ToneEnum
+from llm import gpt_client
+from llm.gpt_client import find_term_violations, reminder_text_violations, ungrounded_terms
+
+DESCRIPTION = "할머니와 손녀가 마당에서 한복을 입고 사진을 찍었다"
+RELATION = "딸"
+OPTIONS = ["한복", "양복", "잠옷", "교복"]
+
+
+def _data(**overrides):
+    data = {
+        "allowed_terms": ["할머니", "손녀", "마당", "한복"],
+        "reminder_text": "어머니, 봄볕 아래 곱게 한복을 차려입은 모습이 참 고우셨지요. 옷 자락이 살랑 날렸어요.",
+        "quiz_type": 1,
+        "quiz_question": "그날 마당에서 무엇을 입으셨나요?",
+        "quiz_options": list(OPTIONS),
+        "answer_index": 1,
+    }
+    data.update(overrides)
+    return data
+
+
+def test_adverbs_and_verb_stems_are_not_violations():
+    data = _data()
+    assert find_term_violations(data, DESCRIPTION, "김영희", RELATION) == {}
+    # 규칙 기반 추출기가 뽑는 부사 / 위치어 / 의존 명사 / 어간은 경고 후보에서도 빠진다
+    extra = ungrounded_terms(data["reminder_text"], DESCRIPTION, RELATION)
+    assert not {"봄볕", "아래", "곱게", "차려입", "자락", "살랑"} & set(extra)
+
+
+def test_ungrounded_nouns_alone_do_not_fail():
+    text = "어머니, 그날 치마와 저고리, 꽃신, 노리개까지 곱게 갖추셨지요."
+    assert len(ungrounded_terms(text, DESCRIPTION, RELATION)) > gpt_client.TERM_MAX_UNGROUNDED
+    assert find_term_violations(_data(reminder_text=text), DESCRIPTION, "", RELATION) == {}
+
+
+def test_forbidden_word_flags_reminder_only():
+    violations = find_term_violations(_data(reminder_text="보호자님, 그날 한복이 고왔지요."), DESCRIPTION, "", RELATION)
+    assert list(violations) == ["reminder_text"]
+
+
+def test_reported_term_missing_from_description_is_violation_when_used():
+    data = _data(allowed_terms=["한복", "바닷가"], reminder_text="어머니, 바닷가에서 한복을 입으셨지요.")
+    assert "바닷가" in reminder_text_violations(data["reminder_text"], DESCRIPTION, RELATION, data["allowed_terms"])[0]
+    assert list(find_term_violations(data, DESCRIPTION, "", RELATION)) == ["reminder_text"]
+    # 보고만 하고 쓰지 않았으면 통과
+    assert find_term_violations(_data(allowed_terms=["한복", "바닷가"]), DESCRIPTION, "", RELATION) == {}
+
+
+@pytest.mark.parametrize("overrides", [
+    {"quiz_options": ["등산복", "양복", "잠옷", "교복"]},          # 정답 보기가 설명에 없음
+    {"quiz_options": ["한복", "나", "잠옷", "교복"]},              # 금지된 보기
+    {"quiz_options": ["한복", "양복", "잠옷"]},                    # 보기 개수
+])
+def test_quiz_violations(overrides):
+    assert list(find_term_violations(_data(**overrides), DESCRIPTION, "", RELATION)) == ["quiz_options"]
+
+
+def _response(content: str):
+    message = SimpleNamespace(content=content)
+    return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def _fake_chat(monkeypatch, structured: dict, repair_text: str):
+    calls = []
+
+    def chat(task, messages, local=None, **kwargs):
+        calls.append(task)
+        if task == "generate_structured":
+            return _response(json.dumps(structured, ensure_ascii=False)), "m"
+        if task == "repair":
+            return _response(repair_text), "m"
+        if task == "extract_terms":
+            return ["할머니", "한복"], gpt_client.HEURISTIC
+        return _response(REGENERATED), "m"
+
+    monkeypatch.setattr(gpt_client, "_chat", chat)
+    return calls
+
+
+REGENERATED = """회상 문장: 어머니, 마당에서 한복을 입으셨지요.
+퀴즈 문제: 무엇을 입으셨나요?
+선택지:
+1번. 한복
+2번. 양복
+3번. 잠옷
+4번. 교복
+정답: 1번. 한복
+"""
+
+
+def test_single_call_repairs_only_the_quiz(monkeypatch):
+    structured = _data(quiz_options=["등산복", "양복", "잠옷", "교복"])
+    repair = "퀴즈 문제: 그날 무엇을 입으셨나요?\n선택지:\n1번. 양복\n2번. 한복\n3번. 잠옷\n4번. 교복\n정답: 2번. 한복"
+    calls = _fake_chat(monkeypatch, structured, repair)
+
+    result = gpt_client._generate_reminder_single_call("김영희", DESCRIPTION, RELATION, ToneEnum.kind)
+    assert calls == ["generate_structured", "repair"]          # 2회 호출 경로로 가지 않음
+    assert result.reminder_text == structured["reminder_text"]  # 회상 문장은 그대로
+    assert result.answer_text == "한복"
+
+
+def test_single_call_regenerates_when_repair_still_violates(monkeypatch):
+    structured = _data(reminder_text="보호자님, 한복이 고왔지요.")
+    calls = _fake_chat(monkeypatch, structured, "회상 문장: 보호자님, 다시 봐도 고왔지요.")
+
+    result = gpt_client._generate_reminder_single_call("김영희", DESCRIPTION, RELATION, ToneEnum.kind)
+    assert calls[:2] == ["generate_structured", "repair"]
+    assert "generate" in calls
+    assert result.reminder_text == "어머니, 마당에서 한복을 입으셨지요."
@@ -0,0 +1,68 @@
+# tests/test_tts.py
+# ✅ tts/elevenlabs_client: voice_settings.speed 를 명시적으로 거부할 때만 time-stretch 로 전환
+import asyncio
+import json
+
+import httpx
+import pytest
+
+from core import pool
+from tts import elevenlabs_client
+from tts.elevenlabs_client import TTSError, text_to_speech_async
+
+
+@pytest.fixture
+def elevenlabs(monkeypatch):
+    """ responses: 요청 순서대로 돌려줄 (status, body). 받은 voice_settings 는 sent 에 """
+    monkeypatch.setattr(elevenlabs_client, "_native_speed_supported", True)
+    monkeypatch.setattr(elevenlabs_client, "TTS_MAX_RETRIES", 0)
+
+    async def stretch(fn, audio, speed):
+        return b"stretched:" + audio
+
+    monkeypatch.setattr(pool.cpu_pool, "run", stretch)
+
+    def install(responses):
+        sent = []
+
+        def handler(request):
+            sent.append(json.loads(request.content)["voice_settings"])
+            status, body = responses.pop(0)
+            if status == 200:
+                return httpx.Response(200, content=body)
+            return httpx.Response(status, json=body)
+
+        client = httpx.AsyncClient(base_url="https://tts.test", transport=httpx.MockTransport(handler))
+        monkeypatch.setattr(elevenlabs_client, "get_async_client", lambda: client)
+        return sent
+
+    return install
+
+
+def test_native_speed_sent_when_supported(elevenlabs):
+    sent = elevenlabs([(200, b"mp3")])
+    assert asyncio.run(text_to_speech_async("안녕하세요", "voice-1", speed=0.83)) == b"mp3"
+    assert sent[0]["speed"] == 0.83
+
+
+def test_explicit_speed_rejection_downgrades_and_retries_once(elevenlabs):
+    rejection = {"detail": {"status": "invalid_voice_settings", "message": "speed is not supported for this model"}}
+    sent = elevenlabs([(422, rejection), (200, b"mp3")])
+
+    assert asyncio.run(text_to_speech_async("안녕하세요", "voice-1", speed=0.83)) == b"stretched:mp3"
+    assert "speed" in sent[0] and "speed" not in sent[1]
+    assert len(sent) == 2
+    assert elevenlabs_client._native_speed_supported is False
+
+
+@pytest.mark.parametrize("status, body", [
+    (400, {"detail": "text is too long"}),
+    (422, {"detail": "voice_id not found"}),
+])
+def test_other_validation_errors_keep_native_speed(elevenlabs, status, body):
+    sent = elevenlabs([(status, body)])
+    with pytest.raises(TTSError) as e:
+        asyncio.run(text_to_speech_async("안녕하세요", "voice-1", speed=0.83))
+    assert e.value.status_code == status
+    assert len(sent) == 1
+    assert elevenlabs_client._native_speed_supported is True
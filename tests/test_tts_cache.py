@@ -0,0 +1,94 @@
+# tests/test_tts_cache.py
+# ✅ tts/cache: 키는 요청 값만으로 / 스트리밍 포맷은 다른 키 / 로컬 → Storage 2단 조회
+import asyncio
+
+import pytest
+
+from core.storage import LocalStorage
+from tts import elevenlabs_client
+from tts.cache import LocalLRU, TTSCache, cache_key
+from tts.elevenlabs_client import STREAM_OUTPUT_FORMAT
+
+TEXT = "어머니, 그날 바닷가에서 모래성을 쌓았지요."
+
+
+@pytest.fixture
+def storage(tmp_path):
+    return LocalStorage(root=str(tmp_path / "storage"), base_url="/files")
+
+
+def _cache(storage, directory):
+    return TTSCache(storage, local=LocalLRU(directory=str(directory)))
+
+
+def _synthesizer(audio=b"mp3-bytes"):
+    calls = []
+
+    async def synthesize():
+        calls.append(1)
+        return audio
+
+    return synthesize, calls
+
+
+def test_key_separates_stream_format():
+    full = cache_key(TEXT, "voice-1", speed=0.83)
+    assert full != cache_key(TEXT, "voice-1", speed=0.83, output_format=STREAM_OUTPUT_FORMAT)
+    assert full != cache_key(TEXT, "voice-1", speed=1.0)
+    assert full == cache_key(f"  {TEXT} ", "voice-1", speed=0.83)
+
+
+def test_key_ignores_native_speed_state(monkeypatch):
+    before = cache_key(TEXT, "voice-1", speed=0.83)
+    monkeypatch.setattr(elevenlabs_client, "_native_speed_supported", False)
+    assert cache_key(TEXT, "voice-1", speed=0.83) == before
+
+
+def test_local_tier_hit(storage, tmp_path):
+    cache = _cache(storage, tmp_path / "local")
+    synthesize, calls = _synthesizer()
+
+    async def run():
+        first = await cache.get_or_create(TEXT, "voice-1", synthesize, speed=0.83)
+        second = await cache.get_or_create(TEXT, "voice-1", synthesize, speed=0.83)
+        local = await cache.read_local(cache_key(TEXT, "voice-1", speed=0.83))
+        return first, second, local
+
+    first, second, local = asyncio.run(run())
+    assert first == second and len(calls) == 1
+    assert local == b"mp3-bytes"
+    assert (cache.misses, cache.hits_local) == (1, 2)
+
+
+def test_storage_tier_hit_from_another_worker(storage, tmp_path):
+    synthesize, calls = _synthesizer()
+    asyncio.run(_cache(storage, tmp_path / "a").get_or_create(TEXT, "voice-1", synthesize, speed=0.83))
+
+    other = _cache(storage, tmp_path / "b")   # 로컬 디스크는 비었지만 Storage 는 공유
+    url = asyncio.run(other.get_or_create(TEXT, "voice-1", synthesize, speed=0.83))
+    assert len(calls) == 1
+    assert other.hits_remote == 1 and url.endswith(".mp3")
+
+
+def test_streamed_bytes_do_not_serve_full_quality_requests(storage, tmp_path):
+    cache = _cache(storage, tmp_path / "local")
+    stream_key = cache_key(TEXT, "voice-1", speed=0.83, output_format=STREAM_OUTPUT_FORMAT)
+    synthesize, calls = _synthesizer(b"full-quality")
+
+    async def run():
+        await cache.put(stream_key, b"low-bitrate")
+        await cache.get_or_create(TEXT, "voice-1", synthesize, speed=0.83)
+        return await cache.read_local(cache_key(TEXT, "voice-1", speed=0.83))
+
+    assert asyncio.run(run()) == b"full-quality"
+    assert len(calls) == 1
+
+
+def test_local_lru_evicts_oldest(tmp_path):
+    lru = LocalLRU(directory=str(tmp_path / "lru"), max_bytes=10)
+    lru.put("a", b"12345")
+    lru.put("b", b"12345")
+    assert lru.get("a") == b"12345"    # a 가 최근 사용으로
+    lru.put("c", b"12345")
+    assert lru.get("b") is None and lru.get("a") is not None
+    assert lru.total_bytes == 10
@@ -0,0 +1,52 @@
+# tests/test_vad.py
+# ✅ audio/vad: 말소리 구간 검출 / 앞뒤 무음 제거 / 긴 쉼 줄이기
+import numpy as np
+
+from audio import vad
+
+SR = 16000
+
+
+def _tone(seconds: float, amplitude: float = 0.5) -> np.ndarray:
+    t = np.arange(int(seconds * SR)) / SR
+    return (amplitude * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+def _silence(seconds: float) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    return (rng.normal(0, 1e-4, int(seconds * SR))).astype(np.float32)
+
+
+def test_speech_segments_finds_tone_between_silence():
+    wav = np.concatenate([_silence(1.0), _tone(0.5), _silence(1.0)])
+    segments = vad.speech_segments(wav, SR)
+    assert len(segments) == 1
+    start, end = segments[0]
+    hangover = SR * vad.VAD_HANGOVER_MS // 1000
+    assert abs(start - (SR - hangover)) < SR * 0.05
+    assert abs(end - (int(1.5 * SR) + hangover)) < SR * 0.05
+
+
+def test_trim_silence_drops_edges_and_shortens_long_pause():
+    wav = np.concatenate([_silence(1.0), _tone(0.5), _silence(2.0), _tone(0.5), _silence(1.0)])
+    trimmed = vad.trim_silence(wav, SR, max_pause_ms=300)
+    pad = SR * vad.VAD_HANGOVER_MS // 1000
+    # 말소리 1초 + 구간마다 앞뒤 여유 + 줄인 쉼 300ms 정도만 남는다 (원래 5초)
+    assert trimmed.size < SR * 1.0 + pad * 4 + SR * 0.3 + SR * 0.1
+    assert trimmed.size > SR * 1.0
+    assert trimmed.dtype == np.float32
+
+
+def test_trim_silence_keeps_original_without_speech():
+    wav = _silence(1.0)
+    assert vad.trim_silence(wav, SR) is wav
+
+
+def test_short_click_is_not_speech():
+    wav = np.concatenate([_silence(1.0), _tone(0.03), _silence(1.0)])
+    assert vad.speech_segments(wav, SR) == []
+
+
+def test_frame_signal_pads_short_input():
+    frames = vad.frame_signal(np.ones(10, dtype=np.float32), 480, 160)
+    assert frames.shape == (1, 480)
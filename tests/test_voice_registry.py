@@ -0,0 +1,58 @@
+# tests/test_voice_registry.py
+# ✅ scripts/voice_registry: 저장된 음성 지문과 비교해 voice_id 재사용
+import asyncio
+
+from audio.fingerprint import VoiceFingerprint
+from firebase.repository import InMemoryRepository
+from scripts.voice_registry import VoiceRegistry
+
+
+def _fingerprint(content_hash="h1", embedding=(1.0, 0.0, 0.0)):
+    return VoiceFingerprint(pcm_hash=f"pcm-{content_hash}", embedding=list(embedding), duration=30.0,
+                            content_hash=content_hash)
+
+
+def _registry(**guardian):
+    repository = InMemoryRepository()
+    if guardian:
+        repository.guardians["g1"] = guardian
+    return VoiceRegistry(repository)
+
+
+def test_unknown_guardian_has_no_voice():
+    registry = _registry()
+    assert registry.current_voice_id("g1") is None
+    assert registry.find_existing("g1", _fingerprint()) is None
+    assert registry.find_by_content_hash("g1", "h1") is None
+    assert registry.stats() == {"hits": 0, "misses": 1}
+
+
+def test_find_existing_matches_stored_fingerprint():
+    registry = _registry(voiceId="v1", voiceFingerprint=_fingerprint().to_dict())
+    assert registry.current_voice_id("g1") == "v1"
+    assert registry.find_existing("g1", _fingerprint(content_hash="other")) == "v1"
+    assert registry.find_existing("g1", _fingerprint(content_hash="other", embedding=(0.0, 1.0, 0.0))) is None
+    assert registry.stats() == {"hits": 1, "misses": 1}
+
+
+def test_voice_without_fingerprint_is_never_reused():
+    registry = _registry(voiceId="v1")
+    assert registry.current_voice_id("g1") == "v1"
+    assert registry.find_existing("g1", _fingerprint()) is None
+    assert registry.find_by_content_hash("g1", "h1") is None
+
+
+def test_find_by_content_hash():
+    registry = _registry(voiceId="v1", voiceFingerprint=_fingerprint().to_dict())
+    record = registry.find_by_content_hash("g1", "h1")
+    assert record.voice_id == "v1" and record.fingerprint.content_hash == "h1"
+    assert registry.find_by_content_hash("g1", "h2") is None
+    assert registry.find_by_content_hash("g1", "") is None
+
+
+def test_remember_returns_replaced_voice_id():
+    registry = _registry(voiceId="v1", voiceFingerprint=_fingerprint().to_dict())
+    assert asyncio.run(registry.remember("g1", "v1", _fingerprint())) is None
+    assert asyncio.run(registry.remember("g1", "v2", _fingerprint("h2"))) == "v1"
+    assert registry.current_voice_id("g1") == "v2"
+    assert registry.find_by_content_hash("g1", "h2").voice_id == "v2"
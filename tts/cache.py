@@ -0,0 +1,184 @@
+# tts/cache.py
+# ✅ TTS 결과 캐시 (content-addressed)
+# - 키: sha256(voice_id, text, model, voice_settings, speed, output_format) — 요청 값만으로 계산
+#   (native speed 지원 여부처럼 프로세스마다 달라지는 상태는 넣지 않는다: 같은 요청이면 어느 워커에서나 같은 키)
+# - 1차: 로컬 디스크 LRU (용량 제한) → 2차: Firebase Storage `tts_cache/` → 미스 시 합성 + 업로드
+# - 로컬 tier 의 mp3 바이트는 /tts-stream 이 합성 없이 바로 내려줄 때 읽는다 (read_local)
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+
+from core import metrics, pool
+from core.storage import CACHE_IMMUTABLE, MP3
+from tts.elevenlabs_client import DEFAULT_VOICE_SETTINGS, TTS_MODEL_ID, TTS_OUTPUT_FORMAT
+
+CACHE_PREFIX = "tts_cache"
+DEFAULT_CACHE_DIR = os.getenv("TTS_CACHE_DIR", os.path.join(tempfile.gettempdir(), "tts_cache"))
+DEFAULT_MAX_BYTES = int(os.getenv("TTS_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+
+def cache_key(text: str, voice_id: str, speed: float = 1.0, model_id: str = TTS_MODEL_ID,
+              output_format: str = TTS_OUTPUT_FORMAT, voice_settings: dict = None) -> str:
+    payload = {
+        "voice_id": voice_id,
+        "text": text.strip(),
+        "model_id": model_id,
+        "voice_settings": voice_settings if voice_settings is not None else DEFAULT_VOICE_SETTINGS,
+        "speed": speed,
+        "output_format": output_format,
+    }
+    raw = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class LocalLRU:
+    """ 디스크에 mp3 를 저장하고 총 용량을 max_bytes 이하로 유지하는 LRU """
+
+    def __init__(self, directory: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> size
+        self._total = 0
+        self._enabled = True
+        try:
+            os.makedirs(directory, exist_ok=True)
+            self._load_existing()
+        except OSError as e:
+            # read-only 파일시스템이면 로컬 tier 없이 동작
+            print("⚠️ TTS 로컬 캐시 비활성화:", e)
+            self._enabled = False
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.mp3")
+
+    def _load_existing(self):
+        files = []
+        for name in os.listdir(self.directory):
+            if name.endswith(".mp3"):
+                path = os.path.join(self.directory, name)
+                stat = os.stat(path)
+                files.append((stat.st_mtime, name[:-4], stat.st_size))
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+            self._total += size
+        self._evict()
+
+    def _evict(self):
+        while self._total > self.max_bytes and self._entries:
+            key, size = self._entries.popitem(last=False)
+            self._total -= size
+            try:
+                os.remove(self._path(key))
+            except FileNotFoundError:
+                pass
+
+    def contains(self, key: str) -> bool:
+        if not self._enabled:
+            return False
+        with self._lock:
+            if key not in self._entries:
+                return False
+            self._entries.move_to_end(key)
+            return True
+
+    def get(self, key: str):
+        if not self.contains(key):
+            return None
+        try:
+            with open(self._path(key), "rb") as f:
+                return f.read()
+        except FileNotFoundError:
+            with self._lock:
+                self._total -= self._entries.pop(key, 0)
+            return None
+
+    def put(self, key: str, data: bytes):
+        if not self._enabled or len(data) > self.max_bytes:
+            return
+        path = self._path(key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self._total -= self._entries.pop(key, 0)
+            self._entries[key] = len(data)
+            self._total += len(data)
+            self._evict()
+
+    @property
+    def total_bytes(self) -> int:
+        return self._total
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class TTSCache:
+    """ 로컬 LRU + Storage 2단 TTS 캐시. get_or_create 는 재생 URL, read_local 은 로컬 mp3 바이트를 반환 """
+
+    def __init__(self, storage, local: LocalLRU = None, prefix: str = CACHE_PREFIX):
+        self.storage = storage
+        self.local = local if local is not None else LocalLRU()   # 빈 LocalLRU 는 len() 이 0 이라 falsy
+        self.prefix = prefix
+        self.hits_local = 0
+        self.hits_remote = 0
+        self.misses = 0
+
+    def blob_path(self, key: str) -> str:
+        return f"{self.prefix}/{key}.mp3"
+
+    async def get_or_create(self, text: str, voice_id: str, synthesize, speed: float = 1.0,
+                            output_format: str = TTS_OUTPUT_FORMAT) -> str:
+        """ synthesize: mp3 바이트를 반환하는 코루틴 함수 (미스일 때만 호출) """
+        key = cache_key(text, voice_id, speed=speed, output_format=output_format)
+        path = self.blob_path(key)
+
+        # 1차: 로컬 디스크 (로컬에 있으면 Storage 에도 이미 업로드된 상태)
+        if self.local.contains(key):
+            self.hits_local += 1
+            metrics.record_cache("tts", "hit_local")
+            return await self.storage.url_async(path)
+
+        # 2차: Storage tts_cache/
+        if await self.storage.exists_async(path):
+            self.hits_remote += 1
+            metrics.record_cache("tts", "hit_remote")
+            return await self.storage.url_async(path)
+
+        # 미스: 합성 → 업로드(메모리에서 바로) → 로컬 저장
+        self.misses += 1
+        metrics.record_cache("tts", "miss")
+        audio = await synthesize()
+        return await self.put(key, audio)
+
+    async def read_local(self, key: str):
+        """ 로컬 디스크에 있으면 mp3 바이트, 없으면 None (스트리밍 엔드포인트가 합성을 건너뛸 때) """
+        audio = await pool.io_pool.run(self.local.get, key)
+        if audio is not None:
+            self.hits_local += 1
+            metrics.record_cache("tts", "hit_local")
+        return audio
+
+    async def put(self, key: str, audio: bytes, token: str = None) -> str:
+        """ 합성한 mp3 를 tts_cache/ 에 올리고 로컬 tier 에도 저장. 재생 URL 반환 """
+        with metrics.span("storage.upload", kind="tts_cache"):
+            url = await self.storage.upload_async(self.blob_path(key), audio, MP3, CACHE_IMMUTABLE, token)
+        await pool.io_pool.run(self.local.put, key, audio)
+        return url
+
+    def stats(self) -> dict:
+        lookups = self.hits_local + self.hits_remote + self.misses
+        return {
+            "hits_local": self.hits_local,
+            "hits_remote": self.hits_remote,
+            "misses": self.misses,
+            "hit_ratio": round((self.hits_local + self.hits_remote) / lookups, 4) if lookups else 0.0,
+            "local_entries": len(self.local),
+            "local_bytes": self.local.total_bytes,
+            "local_max_bytes": self.local.max_bytes,
+        }
@@ -1,67 +1,158 @@
 import os
-import requests
+import asyncio
+import random
+import httpx
 from dotenv import load_dotenv
-from pydub import AudioSegment
+from core.resources import resources
+from core import metrics
+from core.admission import tts_gate, cpu_gate, INTERACTIVE
 
 load_dotenv()
-ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY")
 
-def text_to_speech(text: str, voice_id: str, file_name="output.mp3"):
-    url = f"https://api.elevenlabs.io/v1/text-to-speech/{voice_id}"
+TTS_MODEL_ID = "eleven_multilingual_v2"
+DEFAULT_VOICE_SETTINGS = {
+    "stability": 0.35,
+    "similarity_boost": 0.75,
+    "style" : 0.35,
+}
+
+# 일반 합성은 고음질, 스트리밍은 첫 바이트가 빨리 오도록 저비트레이트 (TTS 캐시 키에도 포함)
+TTS_OUTPUT_FORMAT = "mp3_44100_128"
+STREAM_OUTPUT_FORMAT = "mp3_22050_32"
+
+TTS_TIMEOUT_SECONDS = float(os.getenv("ELEVENLABS_TIMEOUT", "30"))
+TTS_MAX_RETRIES = int(os.getenv("ELEVENLABS_MAX_RETRIES", "3"))
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+# ✅ ElevenLabs voice_settings.speed 로 합성 단계에서 속도 조절 (후처리 ffmpeg 패스 없음)
+NATIVE_SPEED_MIN = 0.7
+NATIVE_SPEED_MAX = 1.2
+_native_speed_supported = True
+
+
+def supports_native_speed(speed: float) -> bool:
+    return _native_speed_supported and NATIVE_SPEED_MIN <= speed <= NATIVE_SPEED_MAX
+
+
+def build_voice_settings(speed: float = 1.0) -> dict:
+    settings = dict(DEFAULT_VOICE_SETTINGS)
+    if speed != 1.0 and supports_native_speed(speed):
+        settings["speed"] = speed
+    return settings
+
+
+class TTSError(RuntimeError):
+    """ ElevenLabs TTS 호출 실패 """
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(f"TTS 실패 ({status_code}): {message}")
+        self.status_code = status_code
+        self.body = message
+
+
+def _rejects_speed(error: TTSError) -> bool:
+    """ 요청 검증 오류(400/422) 중 본문이 voice_settings.speed 를 짚은 경우만 (다른 검증 오류로 기능을 끄지 않음) """
+    return error.status_code in (400, 422) and "speed" in (error.body or "").lower()
+
+# ✅ 비동기 클라이언트: core.resources 의 공유 커넥션 풀(HTTP/2 가능 시) 재사용 + 429/5xx 재시도
+def get_async_client() -> httpx.AsyncClient:
+    return resources.elevenlabs_http
 
-    headers = {
-        "xi-api-key": ELEVENLABS_API_KEY,
-        "Content-Type": "application/json"
-    }
 
+def _retry_delay(attempt: int, response: httpx.Response = None) -> float:
+    if response is not None:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after and retry_after.isdigit():
+            return float(retry_after)
+    return 0.5 * (2 ** attempt) + random.uniform(0, 0.25)
+
+
+async def _post_tts(text: str, voice_id: str, voice_settings: dict, timeout: float,
+                    priority: str = INTERACTIVE) -> bytes:
+    client = get_async_client()
     payload = {
-        "model_id": "eleven_multilingual_v2",
+        "model_id": TTS_MODEL_ID,
         "text": text,
-        "voice_settings": {
-            "stability": 0.35,
-            "similarity_boost": 0.75,
-            "style" : 0.35,
-        }
+        "voice_settings": voice_settings,
     }
 
-    response = requests.post(url, headers=headers, json=payload)
+    metrics.record_tts_characters(text)
+    for attempt in range(TTS_MAX_RETRIES + 1):
+        try:
+            async with tts_gate.slot(priority):
+                with metrics.span("tts.request"):
+                    response = await client.post(
+                        f"/text-to-speech/{voice_id}", json=payload, params={"output_format": TTS_OUTPUT_FORMAT},
+                        timeout=timeout,
+                    )
+        except (httpx.TimeoutException, httpx.TransportError) as e:
+            if attempt >= TTS_MAX_RETRIES:
+                raise TTSError(0, str(e))
+            await asyncio.sleep(_retry_delay(attempt))
+            continue
+
+        if response.status_code == 200:
+            return response.content
+        if response.status_code in RETRYABLE_STATUS and attempt < TTS_MAX_RETRIES:
+            print(f"⚠️ TTS 재시도 {attempt + 1}/{TTS_MAX_RETRIES}:", response.status_code)
+            await asyncio.sleep(_retry_delay(attempt, response))
+            continue
 
-    if response.status_code == 200:
-        with open(file_name, "wb") as f:
-            f.write(response.content)
-        return file_name
-    else:
         print("❌ TTS 실패:", response.status_code, response.text)
-        return None
-    
-def create_voice(voice_name: str, file_path: str):
-    url = "https://api.elevenlabs.io/v1/voices/add"
-    headers = {"xi-api-key": ELEVENLABS_API_KEY}
-    files = {"files": open(file_path, "rb")}
-    data = {"name": voice_name, "description": "보호자 음성 자동 등록"}
-
-    response = requests.post(url, headers=headers, files=files, data=data)
-    if response.status_code == 200:
-        return response.json()
-    else:
-        print("Voice 등록 실패:", response.status_code, response.text)
-        return None
-    
-import subprocess
-
-
-def process_audio_speed(input_path: str, output_path: str, speed=0.8):
-    # 임시 출력 파일
-    tmp_output = f"tmp_{output_path}"
-
-    # ffmpeg 명령어
-    cmd = ["ffmpeg", "-i", input_path, "-filter:a", f"atempo={speed}", tmp_output, "-y"]
-    subprocess.run(cmd, check=True)
-
-    # 기존 파일 덮어쓰기
-    os.replace(tmp_output, output_path)
-
-    print(f"✅ 속도 조절된 파일 저장 완료 (ffmpeg atempo): {output_path}")
-    return output_path
+        raise TTSError(response.status_code, response.text)
+
+
+async def text_to_speech_async(text: str, voice_id: str, speed: float = 1.0, timeout: float = None,
+                               priority: str = INTERACTIVE) -> bytes:
+    """ ElevenLabs TTS 비동기 호출 → (speed 적용된) mp3 바이트. priority=BACKGROUND 면 대화형 요청에 양보 """
+    global _native_speed_supported
+    request_timeout = timeout or TTS_TIMEOUT_SECONDS
+
+    if speed == 1.0:
+        return await _post_tts(text, voice_id, build_voice_settings(), request_timeout, priority)
+
+    if supports_native_speed(speed):
+        try:
+            return await _post_tts(text, voice_id, build_voice_settings(speed), request_timeout, priority)
+        except TTSError as e:
+            # speed 설정을 거부하는 모델/계정이면 이후로는 프로세스 내 time-stretch 사용 (이번 요청은 speed 없이 한 번 더)
+            if not _rejects_speed(e):
+                raise
+            print("⚠️ voice_settings.speed 미지원 → time-stretch 로 대체:", e)
+            _native_speed_supported = False
+
+    # ✅ fallback: speed 없이(1.0 배속) 합성 후 디코딩된 버퍼를 time-stretch, 한 번만 재인코딩
+    from core import pool
+    from tts.speed import time_stretch_mp3
+
+    audio = await _post_tts(text, voice_id, build_voice_settings(), request_timeout, priority)
+    async with cpu_gate.slot(priority):
+        with metrics.span("tts.time_stretch"):
+            return await pool.cpu_pool.run(time_stretch_mp3, audio, speed)
+
+
+async def stream_text_to_speech(text: str, voice_id: str, speed: float = 1.0, output_format: str = STREAM_OUTPUT_FORMAT,
+                                latency_level: int = 3, chunk_size: int = 4096, priority: str = INTERACTIVE):
+    """ ElevenLabs 스트리밍 TTS → mp3 청크를 도착하는 대로 yield """
+    client = get_async_client()
+    payload = {
+        "model_id": TTS_MODEL_ID,
+        "text": text,
+        "voice_settings": build_voice_settings(speed),
+    }
+    params = {"output_format": output_format, "optimize_streaming_latency": latency_level}
+    metrics.record_tts_characters(text, mode="stream")
 
+    # 스트림이 끝날 때까지 ElevenLabs 동시 요청 슬롯 하나를 차지
+    async with tts_gate.slot(priority):
+        async with client.stream(
+            "POST", f"/text-to-speech/{voice_id}/stream", json=payload, params=params
+        ) as response:
+            if response.status_code != 200:
+                body = await response.aread()
+                print("❌ 스트리밍 TTS 실패:", response.status_code, body[:200])
+                raise TTSError(response.status_code, body.decode(errors="ignore"))
+            async for chunk in response.aiter_bytes(chunk_size):
+                if chunk:
+                    yield chunk
 
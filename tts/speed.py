@@ -0,0 +1,16 @@
+# tts/speed.py
+# ✅ 네이티브 speed 를 쓸 수 없을 때의 fallback: 디코딩된 버퍼를 프로세스 안에서 time-stretch
+# (cpu_pool 에서 spawn 으로 import 되므로 모듈 최상단에는 가벼운 것만 둔다)
+from audio.preprocess import decode_audio, encode_mp3
+
+TTS_SAMPLE_RATE = 44100
+TTS_BITRATE = "128k"
+
+
+def time_stretch_mp3(audio: bytes, speed: float) -> bytes:
+    """ mp3 바이트 → 피치 유지 time-stretch → mp3 바이트 (인코딩 1회) """
+    import librosa
+
+    wav = decode_audio(audio, TTS_SAMPLE_RATE)
+    stretched = librosa.effects.time_stretch(wav, rate=speed)
+    return encode_mp3(stretched, TTS_SAMPLE_RATE, bitrate=TTS_BITRATE)
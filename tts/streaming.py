@@ -0,0 +1,56 @@
+# tts/streaming.py
+# ✅ 스트리밍 TTS 속도 조절
+# - 기본: ElevenLabs voice_settings.speed (추가 처리 없음)
+# - 범위 밖 / 미지원: 청크를 ffmpeg 파이프(atempo)에 흘려보내 실시간으로 조절
+import asyncio
+
+from audio.preprocess import FFMPEG_PATH
+from tts.elevenlabs_client import stream_text_to_speech, supports_native_speed
+
+READ_CHUNK_SIZE = 4096
+
+
+async def _feed(source, stdin: asyncio.StreamWriter):
+    try:
+        async for chunk in source:
+            stdin.write(chunk)
+            await stdin.drain()
+    finally:
+        stdin.close()
+
+
+async def stream_with_speed(source, speed: float = 0.83, ffmpeg_path: str = FFMPEG_PATH):
+    """ mp3 청크 async iterator → atempo 적용된 mp3 청크 async iterator """
+    proc = await asyncio.create_subprocess_exec(
+        ffmpeg_path, "-hide_banner", "-loglevel", "error",
+        "-f", "mp3", "-i", "pipe:0",
+        "-filter:a", f"atempo={speed}",
+        "-f", "mp3", "-flush_packets", "1", "pipe:1",
+        stdin=asyncio.subprocess.PIPE,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.DEVNULL,
+    )
+    feeder = asyncio.create_task(_feed(source, proc.stdin))
+    try:
+        while True:
+            chunk = await proc.stdout.read(READ_CHUNK_SIZE)
+            if not chunk:
+                break
+            yield chunk
+        await feeder  # TTS 쪽 예외가 있으면 여기서 올라옴
+        if await proc.wait() != 0:
+            raise RuntimeError(f"ffmpeg atempo 스트리밍 실패 (code={proc.returncode})")
+    finally:
+        if not feeder.done():
+            feeder.cancel()
+        if proc.returncode is None:
+            proc.kill()
+            await proc.wait()
+
+
+def stream_speech(text: str, voice_id: str, speed: float = 0.83):
+    """ 스트리밍 TTS + 속도 조절 (가능하면 합성 단계에서, 아니면 ffmpeg 파이프로) """
+    if speed == 1.0 or supports_native_speed(speed):
+        return stream_text_to_speech(text, voice_id, speed=speed)
+    source = stream_text_to_speech(text, voice_id)
+    return stream_with_speed(source, speed=speed)